@@ -0,0 +1,228 @@
+# api.py
+# 运行：python api.py --host 127.0.0.1 --port 8502
+#
+# 资源目录的只读 REST/JSON 接口（WSGI，仅依赖标准库），供 LIMS 对接与批处理脚本使用：
+#   GET /strains?字段=关键词&q=全字段关键词&fuzzy=模糊/拼音关键词&page=1&page_size=20
+#   GET /strains/{id}
+#   GET /strains/{id}/images
+#   GET /strains/{id}/images/{n}?size=original|display|thumb
+# MRC_STORAGE_BACKEND=sqlite 时，列表的检索、计数与分页直接在 SQLite 目录库中完成。
+# 响应带 ETag（基于工作簿文件特征），支持 If-None-Match -> 304。
+# 解析后的目录与索引常驻内存（LiveCatalog），跨请求复用；工作簿变化时后台增量更新。
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+from socketserver import ThreadingMixIn
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote
+from wsgiref.simple_server import WSGIServer, make_server
+
+import numpy as np
+import pandas as pd
+
+from app import (
+    CATALOG_SHEETS,
+    CatalogVersion,
+    LiveCatalog,
+    catalog_display_frame,
+    column_text,
+    get_image_derivatives,
+    parse_sheet_list,
+    pick_catalog_source,
+)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+# ---------------------------
+# 查询
+# ---------------------------
+def _filter_positions(cat: CatalogVersion, params: Dict[str, str]) -> np.ndarray:
+    df = cat.df
+    conditions = {k: v for k, v in params.items() if k in df.columns and v.strip()}
+    indexed = {k: v for k, v in conditions.items() if k in cat.search_cols}
+    # 已建索引的字段与全字段检索走目录版本上的结果缓存（与页面共享）
+    positions = cat.filter_positions(indexed, params.get("q", ""), params.get("fuzzy", ""))
+
+    # 未建索引的字段：只在已命中的行里做字面子串匹配
+    for col, value in conditions.items():
+        if col in indexed or not len(positions):
+            continue
+        sub = column_text(df[col].iloc[positions])
+        positions = positions[sub.str.contains(value.strip(), case=False, regex=False).to_numpy()]
+    return positions
+
+
+def _sql_page(cat: CatalogVersion, params: Dict[str, str], page: int, page_size: int) -> Optional[dict]:
+    """SQLite 后端且只有字段/全字段条件时，计数与分页直接在库中完成；否则返回 None 走内存路径。"""
+    store = cat.store
+    conditions = {k: v for k, v in params.items() if k in cat.df.columns and v.strip()}
+    if store is None or params.get("fuzzy", "").strip() or any(k not in store.columns for k in conditions):
+        return None
+    q = params.get("q", "")
+    rows = store.page(conditions, q, (page - 1) * page_size, page_size)
+    return {
+        "total": store.count(conditions, q),
+        "page": page,
+        "page_size": page_size,
+        "items": rows.to_dict(orient="records"),
+    }
+
+
+def _records(df: pd.DataFrame, positions) -> List[dict]:
+    return catalog_display_frame(df.iloc[positions]).to_dict(orient="records")
+
+
+def _image_url(rid: str, n: int) -> str:
+    return f"/strains/{quote(rid, safe='')}/images/{n}"
+
+
+def _image_source(path: str) -> str:
+    # 远程图片给出原 URL；本地图片只给文件名，不暴露服务器上的目录结构
+    if path.lower().startswith(("http://", "https://")):
+        return path
+    return os.path.basename(path)
+
+
+# ---------------------------
+# WSGI
+# ---------------------------
+def _etag(fingerprint: str, environ: dict) -> str:
+    key = f"{environ.get('PATH_INFO', '')}?{environ.get('QUERY_STRING', '')}"
+    return f'W/"{fingerprint}-{hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]}"'
+
+
+def _json(start_response, status: str, payload, etag: Optional[str] = None):
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    headers = [("Content-Type", "application/json; charset=utf-8"), ("Content-Length", str(len(body)))]
+    if etag:
+        headers.append(("ETag", etag))
+    start_response(status, headers)
+    return [body]
+
+
+def _not_found(start_response, msg: str):
+    return _json(start_response, "404 Not Found", {"error": msg})
+
+
+def _route(path: str) -> Tuple[str, List[str]]:
+    # PEP 3333：PATH_INFO 已按 latin-1 解码，这里还原为 UTF-8（中文编号）
+    path = path.encode("latin-1", "replace").decode("utf-8", "replace")
+    parts = [p for p in path.strip("/").split("/") if p]
+    if not parts or parts[0] != "strains":
+        return "", parts
+    if len(parts) == 1:
+        return "list", []
+    if len(parts) == 2:
+        return "detail", parts[1:]
+    if len(parts) == 3 and parts[2] == "images":
+        return "images", parts[1:2]
+    if len(parts) == 4 and parts[2] == "images":
+        return "image", [parts[1], parts[3]]
+    return "", parts
+
+
+def make_app(live: LiveCatalog):
+    def application(environ, start_response):
+        if environ.get("REQUEST_METHOD", "GET") not in ("GET", "HEAD"):
+            return _json(start_response, "405 Method Not Allowed", {"error": "只支持 GET"})
+
+        kind, args = _route(environ.get("PATH_INFO", ""))
+        if not kind:
+            return _not_found(start_response, "未知路径")
+
+        cat = live.version
+        etag = _etag(cat.fingerprint, environ)
+        inm = environ.get("HTTP_IF_NONE_MATCH", "")
+        if inm and etag in [t.strip() for t in inm.split(",")]:
+            start_response("304 Not Modified", [("ETag", etag)])
+            return [b""]
+
+        params = {k: v[-1] for k, v in parse_qs(environ.get("QUERY_STRING", "")).items()}
+        df = cat.df
+
+        if kind == "list":
+            try:
+                page = max(1, int(params.pop("page", "1")))
+                page_size = min(MAX_PAGE_SIZE, max(1, int(params.pop("page_size", str(DEFAULT_PAGE_SIZE)))))
+            except ValueError:
+                return _json(start_response, "400 Bad Request", {"error": "page/page_size 必须为整数"})
+            payload = _sql_page(cat, params, page, page_size)
+            if payload is not None:
+                return _json(start_response, "200 OK", payload, etag)
+            positions = _filter_positions(cat, params)
+            start = (page - 1) * page_size
+            payload = {
+                "total": int(len(positions)),
+                "page": page,
+                "page_size": page_size,
+                "items": _records(df, positions[start:start + page_size]),
+            }
+            return _json(start_response, "200 OK", payload, etag)
+
+        rid = args[0].strip()
+        pos = cat.position_of(rid)
+        if pos is None:
+            return _not_found(start_response, f"未找到记录：{cat.id_col} = {rid}")
+
+        if kind == "detail":
+            return _json(start_response, "200 OK", _records(df, [pos])[0], etag)
+
+        images = cat.images_for(pos)
+        if kind == "images":
+            items = [
+                {"index": n, "url": _image_url(rid, n), "source": _image_source(p)}
+                for n, p in enumerate(images)
+            ]
+            return _json(start_response, "200 OK", {"id": rid, "images": items}, etag)
+
+        try:
+            src = images[int(args[1])]
+        except (ValueError, IndexError):
+            return _not_found(start_response, "图片序号不存在")
+        if src.lower().startswith(("http://", "https://")):
+            start_response("302 Found", [("Location", src)])
+            return [b""]
+        size = params.get("size", "original")
+        path = get_image_derivatives(src).get(size, src)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return _not_found(start_response, "图片文件不可读")
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        start_response("200 OK", [("Content-Type", ctype), ("Content-Length", str(len(data))), ("ETag", etag)])
+        return [data]
+
+    return application
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微生物资源目录 REST/JSON 接口")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument(
+        "--excel",
+        default="",
+        help="工作簿路径，或目录/通配符（联合目录）；缺省与 app.py 相同（含 MRC_CATALOG_SOURCES）",
+    )
+    parser.add_argument("--sheets", default="", help='参与合并的工作表名，逗号分隔，"*" 表示全部（缺省取 MRC_CATALOG_SHEETS）')
+    args = parser.parse_args()
+
+    # 启动时即加载，首个请求不承担解析开销；后台线程监视工作簿变化
+    live = LiveCatalog(args.excel or pick_catalog_source(), sheets=parse_sheet_list(args.sheets or CATALOG_SHEETS))
+    with make_server(args.host, args.port, make_app(live), server_class=_ThreadingWSGIServer) as httpd:
+        print(f"Serving on http://{args.host}:{args.port}/strains")
+        httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
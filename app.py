@@ -1,20 +1,55 @@
 # app.py
 # 运行：streamlit run app.py
 
+import functools
+import glob
+import hashlib
+import asyncio
+import concurrent.futures as cf
+import json
+import logging
 import math
 import os
+import posixpath
 import re
+import sqlite3
 import tempfile
+import threading
+import time
+import unicodedata
+import urllib.request
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from contextlib import contextmanager
 from io import BytesIO
-from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from urllib.parse import urlparse
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 import html as _html
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as pa_feather
+from pandas.io.parsers import TextParser
 import streamlit as st
 
-# 用于提取 Excel 嵌入图片
-from openpyxl import load_workbook
-from PIL import Image
+# 用于流式读取 Excel 与解码嵌入图片
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+from PIL import Image, ImageOps
+
+# 用于导出菌种数据单
+from docx import Document
+from docx.shared import Cm
+
+# 可选：拼音检索（未安装时模糊检索只匹配原文）
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
 
 
 # ---------------------------
@@ -22,6 +57,8 @@ from PIL import Image
 # ---------------------------
 st.set_page_config(page_title="微生物资源目录", layout="wide")
 
+logger = logging.getLogger("microbial_catalog")
+
 SANDBOX_XLSX_PATH = "/mnt/data/Cqut_Microbial_Resource_Center_Data.xlsx"
 LOCAL_FALLBACK_XLSX = "Cqut_Microbial_Resource_Center_Data.xlsx"
 
@@ -29,8 +66,32 @@ ID_COL_CANDIDATES = ["菌种编号", "编号", "ID", "id", "strain_id"]
 IMAGE_COL_CANDIDATES = ["菌种照片", "图片", "照片", "image", "img", "photo", "picture"]
 
 # 导出嵌入图片的目录：部署环境通常只有 /tmp 可写，所以用 tempfile.gettempdir()
+# 图片按内容摘要存放（EXPORT_ROOT/objects/ab/abcdef….png），同一图片只解码一次、跨工作簿版本复用
 EXPORT_ROOT = os.path.join(tempfile.gettempdir(), "_extracted_images")
 
+# 批量提取嵌入图片时的进程数（PNG 编码是 CPU 密集型）；1 表示串行
+IMAGE_WORKERS = int(os.environ.get("MRC_IMAGE_WORKERS", "1"))
+
+# 图片派生尺寸（缩略图/展示图）缓存：按源图生成一次，目录总大小超限时按最近使用时间淘汰
+DERIVATIVE_ROOT = os.path.join(tempfile.gettempdir(), "_image_derivatives")
+DERIVATIVE_FORMAT = os.environ.get("MRC_DERIVATIVE_FORMAT", "webp").lower()  # webp / jpeg
+DERIVATIVE_QUALITY = int(os.environ.get("MRC_DERIVATIVE_QUALITY", "80"))
+DERIVATIVE_SIZES = {"thumb": 320, "display": 1280}  # 长边像素
+DERIVATIVE_CACHE_MB = float(os.environ.get("MRC_DERIVATIVE_CACHE_MB", "512"))
+
+# 清洗后数据的列式快照目录；清洗规则变化时递增 SNAPSHOT_VERSION 使旧快照失效
+SNAPSHOT_ROOT = os.path.join(tempfile.gettempdir(), "_catalog_snapshots")
+SNAPSHOT_VERSION = 3
+
+# 内存紧凑存储：不重复值占比不超过该比例的文本列转为 category，其余文本列转为 Arrow 字符串
+COMPACT_CATEGORY_RATIO = float(os.environ.get("MRC_COMPACT_CATEGORY_RATIO", "0.5"))
+# 解析为日期类型的列（展示时仍格式化为“2025年6月30日”）
+DATE_COLS = ["保藏日期"]
+
+# 超过该大小（MB）的工作簿改用 openpyxl 只读流式解析，按块构建列数据以控制峰值内存
+STREAM_INGEST_MIN_MB = float(os.environ.get("MRC_STREAM_INGEST_MB", "20"))
+STREAM_CHUNK_ROWS = int(os.environ.get("MRC_STREAM_CHUNK_ROWS", "5000"))
+
 
 # ---------------------------
 # CSS：更克制、更科研门户风（统一间距/层级/控件/表格）
@@ -241,20 +302,445 @@ header{visibility:hidden;}
 """
 
 
+# ---------------------------
+# 性能埋点（可选：MRC_PROFILE=1 或 URL 加 ?debug=1）
+# ---------------------------
+PROFILE_ENABLED = os.environ.get("MRC_PROFILE", "").lower() in ("1", "true", "yes", "on")
+# 每个埋点一行 JSON，便于离线汇总分析
+PROFILE_LOG = os.environ.get("MRC_PROFILE_LOG", os.path.join(tempfile.gettempdir(), "_catalog_profile.jsonl"))
+
+_profile_log_lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _profile_state() -> threading.local:
+    # 按线程记录：Streamlit 每个会话的重跑在各自线程中执行；未开启时 records 为 None，埋点几乎零开销。
+    # 放在 cache_resource 中：跨重跑缓存的对象（如 LiveCatalog）调用的是旧一轮脚本的函数，也要写到同一份状态
+    return threading.local()
+
+
+def profile_begin(enabled: bool):
+    state = _profile_state()
+    state.records = [] if enabled else None
+    state.stack = []
+    state.rerun_id = hashlib.sha1(f"{time.time()}-{threading.get_ident()}".encode()).hexdigest()[:12]
+
+
+def profile_enabled() -> bool:
+    return getattr(_profile_state(), "records", None) is not None
+
+
+@contextmanager
+def profile_span(name: str, **fields):
+    """记录一段代码的耗时；yield 的 dict 可补充 cache/rows/bytes 等字段。"""
+    state = _profile_state()
+    records = getattr(state, "records", None)
+    if records is None:
+        yield {}
+        return
+    rec = {"name": name, "depth": len(state.stack), **fields}
+    records.append(rec)
+    state.stack.append(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        rec["ms"] = round((time.perf_counter() - t0) * 1000, 2)
+        state.stack.pop()
+
+
+def profile_note(**fields):
+    """给当前（最内层）埋点补充字段；缓存函数体内调用 profile_note(cache="miss") 即可区分命中/未命中。"""
+    stack = getattr(_profile_state(), "stack", None)
+    if stack:
+        stack[-1].update(fields)
+
+
+def profiled(name: str, cached: bool = False):
+    """函数级埋点装饰器；cached=True 时默认记为缓存命中，缓存函数体执行时改记为 miss。"""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profile_enabled():
+                return fn(*args, **kwargs)
+            with profile_span(name, **({"cache": "hit"} if cached else {})):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profile_end(page: str) -> List[dict]:
+    """结束本次重跑的记录：追加写入 JSONL 日志并返回记录（供调试面板展示）。"""
+    state = _profile_state()
+    records = getattr(state, "records", None)
+    state.records = None
+    if not records:
+        return []
+    ts = time.strftime("%Y-%m-%dT%H:%M:%S")
+    lines = [
+        json.dumps({"ts": ts, "rerun": state.rerun_id, "page": page, **rec}, ensure_ascii=False, default=str)
+        for rec in records
+    ]
+    try:
+        with _profile_log_lock, open(PROFILE_LOG, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+    except OSError:
+        logger.warning("无法写入性能日志：%s", PROFILE_LOG)
+    return records
+
+
+def render_profile_panel(records: List[dict]):
+    if not records:
+        return
+    total = sum(r["ms"] for r in records if r["depth"] == 0)
+    with st.expander(f"性能调试面板（本次重跑 {total:.1f} ms）"):
+        rows = [
+            {
+                "阶段": "\u3000" * r["depth"] + r["name"],
+                "耗时(ms)": r["ms"],
+                "缓存": r.get("cache", ""),
+                "行数": r.get("rows", ""),
+                "字节": r.get("bytes", ""),
+                "备注": r.get("note", ""),
+            }
+            for r in records
+        ]
+        st.dataframe(pd.DataFrame(rows).astype(str), hide_index=True, use_container_width=True)
+        st.caption(f"明细已追加到 {PROFILE_LOG}")
+
+
 # ---------------------------
 # 数据加载与清洗
 # ---------------------------
-@st.cache_data(show_spinner=False)
-def load_excel(excel_path: str) -> pd.DataFrame:
-    df = pd.read_excel(excel_path, sheet_name=0)
+def excel_fingerprint(excel_path: str) -> str:
+    """
+    工作簿文件特征（修改时间 + 大小），用于缓存失效判断。
+    文件被替换/编辑后特征随之改变，所有以它为键的缓存（快照、导出图片）都会重建。
+    """
+    st_info = os.stat(excel_path)
+    return f"mtime{int(st_info.st_mtime)}_size{st_info.st_size}"
+
+
+def _cell_text(v) -> str:
+    # 文本列中的数值：整数值的浮点数按整数显示（17782357020 而非 17782357020.0）
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v)
+
+
+def _clean_excel_frame(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = [str(c).strip() for c in df.columns]
     df = df.replace({pd.NA: "", None: ""}).fillna("")
     for c in df.columns:
         if df[c].dtype == "object":
-            df[c] = df[c].astype(str).map(lambda x: re.sub(r"[ \t]+", " ", x).strip())
+            s = df[c]
+            # 含空单元格的数值列在 fillna 后为 object：数值逐个转文本，纯文本列直接向量化
+            if pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+                s = s.map(_cell_text)
+            # 向量化清洗：合并连续空格/制表符并去除首尾空白
+            df[c] = s.astype(str).str.replace(r"[ \t]+", " ", regex=True).str.strip()
+    return df
+
+
+_CN_DATE_RE = re.compile(r"^(\d{4})年(\d{1,2})月(\d{1,2})日$")
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?: 00:00:00)?$")
+_EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+_ARROW_STRING = pd.ArrowDtype(pa.string())
+
+
+def _parse_date_text(v: str):
+    """单个日期文本 -> Timestamp；空串 -> NaT；无法识别 -> None。"""
+    if v == "":
+        return pd.NaT
+    m = _CN_DATE_RE.match(v) or _ISO_DATE_RE.match(v)
+    try:
+        if m:
+            return pd.Timestamp(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        if v.isdigit() and 1 <= int(v) <= 2958465:
+            # Excel 日期序列号（单元格未设日期格式时 pandas 读出为整数）
+            return _EXCEL_EPOCH + pd.Timedelta(days=int(v))
+    except ValueError:
+        return None
+    return None
+
+
+def _parse_date_column(s: pd.Series) -> Optional[pd.Series]:
+    """所有非空值都能识别为日期时返回 datetime64 列，否则返回 None（保持文本，不丢信息）。"""
+    text = s.astype(str).str.strip()
+    parsed = {}
+    for v in pd.unique(text):
+        ts = _parse_date_text(v)
+        if ts is None:
+            return None
+        parsed[v] = ts
+    return pd.to_datetime(text.map(parsed))
+
+
+def format_catalog_date(ts) -> str:
+    return "" if pd.isna(ts) else f"{ts.year}年{ts.month}月{ts.day}日"
+
+
+def column_text(s: pd.Series) -> pd.Series:
+    """任意列 -> 展示/检索用文本。日期列格式化为“YYYY年M月D日”（按不重复值格式化），其余列同 astype(str)。"""
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        codes, uniques = pd.factorize(s)
+        labels = np.array([format_catalog_date(u) for u in uniques] + [""], dtype=object)
+        return pd.Series(labels[codes], index=s.index)
+    return s.astype(str)
+
+
+def catalog_display_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """把日期列换回展示文本，其余列原样（category/Arrow 字符串取值即为原文本）。"""
+    date_cols = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c].dtype)]
+    if not date_cols:
+        return df
+    df = df.copy()
+    for c in date_cols:
+        df[c] = column_text(df[c])
+    return df
+
+
+def compact_catalog_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    清洗后的紧凑化：日期列解析为 datetime64；低基数文本列转 category（每个值只存一份）；
+    其余文本列转 Arrow 字符串（连续缓冲区，无逐个 Python str 对象，快照可零拷贝映射）。
+    取值文本不变，检索/展示结果与紧凑化前一致。
+    """
+    out = {}
+    for c in df.columns:
+        s = df[c]
+        if c in DATE_COLS:
+            dates = _parse_date_column(s)
+            if dates is not None:
+                out[c] = dates
+                continue
+        if s.dtype == object or s.dtype == _ARROW_STRING:
+            if len(s) and s.nunique(dropna=False) <= len(s) * COMPACT_CATEGORY_RATIO:
+                out[c] = s.astype(str).astype("category")
+            else:
+                out[c] = s.astype(_ARROW_STRING)
+        else:
+            out[c] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def _stream_cell(v):
+    # 与 pandas 的 openpyxl 读取一致：空单元格为 ""，公式错误值（#VALUE! 等）为 NaN，整数值的浮点数为 int
+    if v is None:
+        return ""
+    if isinstance(v, str) and v in ERROR_CODES:
+        return np.nan
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _clean_stream_chunk(rows: List[tuple], columns: List[str]) -> pa.Table:
+    """
+    一块原始行 -> 清洗后的 Arrow 表：与 pd.read_excel 相同的 TextParser 类型推断（数值/布尔/日期、NA 文本），
+    再按 _clean_excel_frame 清洗。各块的列类型可能不同，由 _concat_stream_chunks 统一。
+    """
+    width = len(columns)
+    data = [[_stream_cell(v) for v in r[:width]] + [""] * (width - len(r[:width])) for r in rows]
+    if data:
+        df = TextParser(data, names=columns, header=None, skip_blank_lines=False).read()
+    else:
+        df = pd.DataFrame({c: pd.Series([], dtype=object) for c in columns})
+    return pa.Table.from_pandas(_clean_excel_frame(df), preserve_index=False)
+
+
+def _is_blank_text(col: pa.ChunkedArray) -> bool:
+    return pa.types.is_string(col.type) and pc.all(pc.equal(col, "")).as_py() is not False
+
+
+def _concat_stream_chunks(chunks: List[pa.Table]) -> pa.Table:
+    """
+    合并各块，列类型按整表解析的结果统一：各块类型一致时保留；整数与浮点混合转浮点；
+    日期列中整块为空的部分补 NaT；其余不一致的列转为文本（取值文本与 pandas 整表解析相同）。
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    names = chunks[0].column_names
+    for j, name in enumerate(names):
+        cols = [t.column(j) for t in chunks]
+        typed = {c.type for c in cols if not _is_blank_text(c)}
+        blank = any(_is_blank_text(c) for c in cols)
+        if len({c.type for c in cols}) == 1:
+            continue
+        if len(typed) == 1 and pa.types.is_timestamp(next(iter(typed))):
+            target = next(iter(typed))
+            cols = [pa.nulls(len(c), target) if _is_blank_text(c) else c for c in cols]
+        elif not blank and all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in typed):
+            cols = [c.cast(pa.float64()) for c in cols]
+        elif typed == {pa.bool_()}:
+            # 布尔列含空值时 pandas 整表解析为浮点 1.0/0.0，清洗后为 "1"/"0"
+            cols = [c if _is_blank_text(c) else pa.array([str(int(v)) for v in c.to_pylist()], type=pa.string()) for c in cols]
+        else:
+            cols = [
+                c if pa.types.is_string(c.type)
+                else pa.array(["" if v is None else _cell_text(v) for v in c.to_pylist()], type=pa.string())
+                for c in cols
+            ]
+        chunks = [t.set_column(j, name, c) for t, c in zip(chunks, cols)]
+    return pa.concat_tables(chunks)
+
+
+def stream_excel(excel_path: str, chunk_rows: int = STREAM_CHUNK_ROWS, sheet: Union[int, str] = 0) -> pa.Table:
+    """
+    只读流式解析工作表（默认第一个）：iter_rows(values_only=True) 逐行读取，每 chunk_rows 行清洗为一个 Arrow 块。
+    峰值内存约为“已清洗的紧凑列数据 + 一个原始块”，不会构建整表单元格对象。
+    类型推断与清洗规则与 pandas 解析相同，两条路径得到相同的 dtype 与取值。
+    """
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if isinstance(sheet, str) else wb.worksheets[sheet]
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pa.table({})
+        columns = [
+            str(c).strip() if c is not None and str(c).strip() else f"Unnamed: {i}"
+            for i, c in enumerate(header)
+        ]
+
+        chunks: List[pa.Table] = []
+        truncated = 0
+        buf: List[tuple] = []
+        pending_blank = 0
+        for r in rows:
+            # 中间的空行保留（保证 df 行号与 Excel 行号对应），末尾空行丢弃（同 pandas）
+            if all(v is None for v in r):
+                pending_blank += 1
+                continue
+            if pending_blank:
+                buf.extend([()] * pending_blank)
+                pending_blank = 0
+            if len(r) > len(columns) and any(v is not None for v in r[len(columns):]):
+                truncated += 1
+            buf.append(r)
+            if len(buf) >= chunk_rows:
+                chunks.append(_clean_stream_chunk(buf, columns))
+                buf = []
+        if buf or not chunks:
+            chunks.append(_clean_stream_chunk(buf, columns))
+    finally:
+        wb.close()
+
+    if truncated:
+        logger.warning("%s：%d 行在表头宽度之外有内容，这些单元格已忽略", excel_path, truncated)
+    return _concat_stream_chunks(chunks)
+
+
+def _snapshot_prefix(excel_path: str) -> str:
+    # 文件名 + 绝对路径摘要：不同目录下的同名工作簿互不覆盖
+    base = os.path.splitext(os.path.basename(excel_path))[0]
+    digest = hashlib.sha1(os.path.abspath(excel_path).encode("utf-8")).hexdigest()[:8]
+    return f"{base}_{digest}_v"
+
+
+def _snapshot_path(excel_path: str, fingerprint: str, sheet: Union[int, str] = 0) -> str:
+    name = f"{_snapshot_prefix(excel_path)}{SNAPSHOT_VERSION}_{fingerprint}"
+    if sheet != 0:
+        name += "_s" + hashlib.sha1(str(sheet).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(SNAPSHOT_ROOT, name + ".feather")
+
+
+def _read_snapshot(snap_path: str) -> Optional[pd.DataFrame]:
+    if not os.path.exists(snap_path):
+        return None
+    try:
+        # 未压缩的 Feather(Arrow IPC) 可直接内存映射，读取只需毫秒级；
+        # 字符串列保持 Arrow 存储（直接引用映射的缓冲区），字典列还原为 category
+        table = pa_feather.read_table(snap_path, memory_map=True)
+        return table.to_pandas(types_mapper={pa.string(): _ARROW_STRING}.get)
+    except Exception:
+        return None
+
+
+def _write_snapshot(df, excel_path: str, snap_path: str, fingerprint: str) -> bool:
+    # 部署环境可能只读：写快照失败不影响正常加载
+    # 多个会话可能同时未命中快照：各自写唯一的临时文件，再原子替换
+    tmp_path = None
+    try:
+        os.makedirs(SNAPSHOT_ROOT, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_ROOT, suffix=".tmp")
+        os.close(fd)
+        pa_feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, snap_path)
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    # 清理同一工作簿旧版本的快照（同一版本其他工作表的快照保留）
+    prefix = _snapshot_prefix(excel_path)
+    current = f"{prefix}{SNAPSHOT_VERSION}_{fingerprint}"
+    for name in os.listdir(SNAPSHOT_ROOT):
+        old = os.path.join(SNAPSHOT_ROOT, name)
+        if name.startswith(prefix) and name.endswith(".feather") and not name.startswith(current):
+            try:
+                os.remove(old)
+            except Exception:
+                continue
+    return True
+
+
+def _mapped_frame(df: pd.DataFrame, excel_path: str, snap_path: str, fingerprint: str) -> pd.DataFrame:
+    """
+    写快照后改为内存映射读回：堆上的副本随即释放，字符串列直接引用映射的文件页，
+    同一主机上的多个服务进程共享同一份页缓存（只读，零拷贝）。写快照失败时返回原 DataFrame。
+    """
+    if _write_snapshot(df, excel_path, snap_path, fingerprint):
+        mapped = _read_snapshot(snap_path)
+        if mapped is not None:
+            return mapped
+    return df
+
+
+@profiled("read_catalog_frame")
+def read_catalog_frame(excel_path: str, fingerprint: str, sheet: Union[int, str] = 0) -> pd.DataFrame:
+    """读取清洗后的数据：优先内存映射快照，否则解析工作簿并写快照（不经过 Streamlit 缓存）。"""
+    snap_path = _snapshot_path(excel_path, fingerprint, sheet)
+    df = _read_snapshot(snap_path)
+    if df is not None:
+        profile_note(cache="snapshot", rows=len(df))
+        return df
+
+    profile_note(cache="miss", bytes=os.path.getsize(excel_path))
+    if os.path.getsize(excel_path) >= STREAM_INGEST_MIN_MB * 1024 * 1024:
+        table = stream_excel(excel_path, sheet=sheet)
+        df = compact_catalog_frame(table.to_pandas(types_mapper={pa.string(): _ARROW_STRING}.get))
+        del table
+        df = _mapped_frame(df, excel_path, snap_path, fingerprint)
+        profile_note(rows=len(df), note="流式解析")
+        return df
+
+    df = compact_catalog_frame(_clean_excel_frame(pd.read_excel(excel_path, sheet_name=sheet)))
+    df = _mapped_frame(df, excel_path, snap_path, fingerprint)
+    profile_note(rows=len(df))
     return df
 
 
+# cache_resource 不序列化返回值：所有会话共享同一个只读 DataFrame，调用方不得原地修改
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _load_excel_cached(excel_path: str, fingerprint: str) -> pd.DataFrame:
+    profile_note(cache="miss")
+    return read_catalog_frame(excel_path, fingerprint)
+
+
+@profiled("load_excel", cached=True)
+def load_excel(excel_path: str) -> pd.DataFrame:
+    """
+    读取并清洗工作簿。首次解析后会在 SNAPSHOT_ROOT 下写入列式快照（Feather），
+    之后按文件特征直接内存映射快照；工作簿被修改时自动重新解析。
+    返回的 DataFrame 跨会话共享，只读。
+    """
+    return _load_excel_cached(excel_path, excel_fingerprint(excel_path))
+
+
 def pick_excel_path() -> str:
     if os.path.exists(SANDBOX_XLSX_PATH):
         return SANDBOX_XLSX_PATH
@@ -270,6 +756,25 @@ def detect_id_col(df: pd.DataFrame) -> str:
     return df.columns[0]
 
 
+def build_id_index(df: pd.DataFrame, id_col: str) -> Dict[str, int]:
+    """
+    归一化编号（去首尾空白）-> 行位置（iloc）。编号重复时保留首条，与原先“取第一条命中”一致；
+    重复编号只在建索引时记录一次日志，详情页查询不再重复扫描。
+    """
+    index: Dict[str, int] = {}
+    duplicates: Dict[str, int] = {}
+    for pos, key in enumerate(df[id_col].astype(str).str.strip().tolist()):
+        if key in index:
+            duplicates[key] = duplicates.get(key, 1) + 1
+            continue
+        index[key] = pos
+
+    if duplicates:
+        sample = "，".join(f"{k}×{n}" for k, n in list(duplicates.items())[:20])
+        logger.warning("%s 列存在 %d 个重复编号（详情页取首条）：%s", id_col, len(duplicates), sample)
+    return index
+
+
 def detect_image_col(df: pd.DataFrame) -> Optional[str]:
     for c in IMAGE_COL_CANDIDATES:
         if c in df.columns:
@@ -277,6 +782,129 @@ def detect_image_col(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
+# ---------------------------
+# 联合目录：多工作簿 / 多工作表合并
+# ---------------------------
+# 目录来源：目录或通配符（多个用 os.pathsep 分隔），设置后按联合目录加载
+CATALOG_SOURCES = os.environ.get("MRC_CATALOG_SOURCES", "")
+# 参与合并的工作表名（逗号分隔），"*" 表示全部工作表；留空表示每个工作簿的第一个工作表
+CATALOG_SHEETS = os.environ.get("MRC_CATALOG_SHEETS", "")
+FEDERATION_WORKERS = int(os.environ.get("MRC_FEDERATION_WORKERS", "4"))
+
+# 合并后标记每行来源的列
+SOURCE_COL = "数据来源"
+
+
+def pick_catalog_source() -> str:
+    """设置了 MRC_CATALOG_SOURCES 时返回联合目录来源，否则返回单个工作簿路径。"""
+    return CATALOG_SOURCES or pick_excel_path()
+
+
+def parse_sheet_list(spec: str) -> Optional[List[str]]:
+    sheets = [s.strip() for s in (spec or "").split(",") if s.strip()]
+    return sheets or None
+
+
+def resolve_catalog_sources(spec: str) -> List[str]:
+    """目录 -> 其中所有 .xlsx；通配符 -> 匹配文件；普通路径 -> 自身。结果排序去重。"""
+    paths: List[str] = []
+    for part in [p.strip() for p in spec.split(os.pathsep) if p.strip()]:
+        if os.path.isdir(part):
+            found = glob.glob(os.path.join(part, "*.xlsx"))
+        elif glob.has_magic(part):
+            found = glob.glob(part)
+        else:
+            found = [part] if os.path.exists(part) else []
+        for p in sorted(found):
+            # 跳过 Excel 打开文件时生成的 ~$ 锁文件
+            if not os.path.basename(p).startswith("~$") and p not in paths:
+                paths.append(p)
+    return paths
+
+
+def federated_fingerprint(paths: List[str], sheets: Optional[List[str]]) -> str:
+    """所有成员工作簿特征 + 工作表列表的摘要；任一文件增删改都会改变。"""
+    parts = [f"{os.path.abspath(p)}|{excel_fingerprint(p)}" for p in paths]
+    parts.append("sheets=" + ",".join(sheets or []))
+    return "fed_" + hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class RowLocator:
+    """合并目录中每行的来源：第 pos 行来自 sources[source_ids[pos]] = (工作簿, 工作表) 的第 excel_rows[pos] 行。"""
+
+    def __init__(self, sources: List[Tuple[str, Union[int, str]]], source_ids: np.ndarray, excel_rows: np.ndarray):
+        self.sources = sources
+        self.source_ids = source_ids
+        self.excel_rows = excel_rows
+
+    def locate(self, pos: int) -> Tuple[str, Union[int, str], int]:
+        path, sheet = self.sources[int(self.source_ids[pos])]
+        return path, sheet, int(self.excel_rows[pos])
+
+
+def _sheets_for(excel_path: str, sheets: Optional[List[str]]) -> List[Union[int, str]]:
+    if sheets is None:
+        return [0]
+    names = list_sheet_names(excel_path)
+    if sheets == ["*"]:
+        return list(names)
+    return [s for s in sheets if s in names]
+
+
+def _align_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """按 ID_COL_CANDIDATES / IMAGE_COL_CANDIDATES 识别编号列和图片列，统一改名为首选列名后再合并。"""
+    rename = {}
+    for col, canonical in ((detect_id_col(df), ID_COL_CANDIDATES[0]), (detect_image_col(df), IMAGE_COL_CANDIDATES[0])):
+        if col and col != canonical and canonical not in df.columns:
+            rename[col] = canonical
+    # 合并后同一列可能来自不同类型的源列，统一为展示文本（合并后再整体紧凑化）
+    return catalog_display_frame(df.rename(columns=rename)).astype(str)
+
+
+def load_federated_catalog(
+    paths: List[str],
+    sheets: Optional[List[str]] = None,
+    workers: int = FEDERATION_WORKERS,
+) -> Tuple[pd.DataFrame, RowLocator]:
+    """
+    并发读取多个工作簿/工作表（各自走快照缓存），对齐列后合并为一个 DataFrame，
+    并在 SOURCE_COL 列标记来源；返回的 RowLocator 用于把合并后的行映射回源工作表（嵌入图片）。
+    """
+    fingerprints = {p: excel_fingerprint(p) for p in paths}
+    jobs = [(p, s) for p in paths for s in _sheets_for(p, sheets)]
+    if not jobs:
+        return pd.DataFrame(), RowLocator([], np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64))
+    with cf.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        frames = list(pool.map(lambda job: read_catalog_frame(job[0], fingerprints[job[0]], job[1]), jobs))
+
+    lengths = [len(frame) for frame in frames]
+    # df 第 i 行 ≈ Excel 第 i+2 行（第 1 行是表头）
+    locator = RowLocator(
+        jobs,
+        np.repeat(np.arange(len(jobs), dtype=np.int32), lengths),
+        np.concatenate([np.arange(2, n + 2, dtype=np.int64) for n in lengths]),
+    )
+
+    # 合并结果同样按成员集合 + 联合特征写快照并内存映射：成员未变时跳过对齐/合并/紧凑化
+    key = "federated_" + hashlib.sha1(
+        "\n".join(sorted(os.path.abspath(p) for p in paths) + ["sheets=" + ",".join(sheets or [])]).encode("utf-8")
+    ).hexdigest()[:12]
+    fingerprint = federated_fingerprint(paths, sheets)
+    snap_path = _snapshot_path(key, fingerprint)
+    df = _read_snapshot(snap_path)
+    if df is not None:
+        return df, locator
+
+    parts: List[pd.DataFrame] = []
+    for (path, sheet), frame in zip(jobs, frames):
+        frame = _align_frame(frame)
+        label = os.path.basename(path) if sheets is None else f"{os.path.basename(path)} / {sheet}"
+        frame[SOURCE_COL] = label
+        parts.append(frame)
+    df = compact_catalog_frame(pd.concat(parts, ignore_index=True, sort=False).fillna(""))
+    return _mapped_frame(df, key, snap_path, fingerprint), locator
+
+
 # ---------------------------
 # URL Query Params
 # ---------------------------
@@ -294,43 +922,221 @@ def set_query_id(val: str):
 # ---------------------------
 # 头部/面包屑
 # ---------------------------
+# 与静态站点（build_site.py）共用
+HEADER_HTML = """
+<div class="nimr-topbar">
+  <div class="row">
+    <div class="nimr-logo">MR</div>
+    <div>
+      <div class="nimr-title">Lab 106 · 微生物资源中心（资源目录）</div>
+      <div class="nimr-subtitle">Lab 106 · Microbial Resource Center (Resource Catalog)</div>
+    </div>
+  </div>
+</div>
+"""
+
+
 def render_header():
     st.markdown(CSS, unsafe_allow_html=True)
-    st.markdown(
-        """
-        <div class="nimr-topbar">
-          <div class="row">
-            <div class="nimr-logo">MR</div>
-            <div>
-              <div class="nimr-title">Lab 106 · 微生物资源中心（资源目录）</div>
-              <div class="nimr-subtitle">Lab 106 · Microbial Resource Center (Resource Catalog)</div>
-            </div>
-          </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 
-def render_breadcrumb(labels: List[Tuple[str, bool]]):
+def breadcrumb_html(labels: List[Tuple[str, bool]]) -> str:
     parts = []
     for lab, cur in labels:
         parts.append(f"<b>{lab}</b>" if cur else lab)
-    st.markdown(
-        f'<div class="nimr-breadcrumb">当前位置： {" &nbsp;›&nbsp; ".join(parts)}</div>',
-        unsafe_allow_html=True,
-    )
+    return f'<div class="nimr-breadcrumb">当前位置： {" &nbsp;›&nbsp; ".join(parts)}</div>'
+
+
+def render_breadcrumb(labels: List[Tuple[str, bool]]):
+    st.markdown(breadcrumb_html(labels), unsafe_allow_html=True)
+
+
+# ---------------------------
+# 字段检索索引（字符 n-gram 倒排）
+# ---------------------------
+SEARCH_COLS = ["菌种编号", "菌种命名", "菌种来源", "申请人"]
+
+# 同时索引 1/2/3 元组：单字查询直接命中，二元组适合中文名，三元组适合拉丁学名/编号
+NGRAM_SIZES = (1, 2, 3)
+
+# 候选集足够小时不再继续求交集，直接逐个校验更快
+NGRAM_VERIFY_THRESHOLD = 64
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
+
+
+class NgramIndex:
+    """
+    单列字符 n-gram 倒排索引：gram -> 升序行位置数组（iloc 位置）。
+    子串查询先对查询串各 gram 的倒排表求交集得到候选行，再只对候选行做包含校验。
+    """
+
+    def __init__(self, values: List[str]):
+        self.values = [str(v).lower() for v in values]
+        postings: Dict[str, List[int]] = {}
+        for i, v in enumerate(self.values):
+            grams = {v[j:j + n] for n in NGRAM_SIZES for j in range(len(v) - n + 1)}
+            for g in grams:
+                postings.setdefault(g, []).append(i)
+        self.postings = {g: np.asarray(ids, dtype=np.int64) for g, ids in postings.items()}
+
+    def patched(self, new_values: List[str], old_to_new: np.ndarray, dirty: np.ndarray) -> "NgramIndex":
+        """
+        增量更新，返回新索引（旧索引保持不变，正在读取的请求不受影响）：
+        未变化的行只做位置重映射，只有新增/修改的行（dirty，新位置）需要重新切分 gram。
+        """
+        new = NgramIndex.__new__(NgramIndex)
+        new.values = [str(v).lower() for v in new_values]
+
+        kept = old_to_new[old_to_new >= 0]
+        monotonic = bool(np.all(np.diff(kept) > 0))
+        postings: Dict[str, np.ndarray] = {}
+        for g, p in self.postings.items():
+            q = old_to_new[p]
+            q = q[q >= 0]
+            if len(q):
+                postings[g] = q if monotonic else np.sort(q)
+
+        extra: Dict[str, List[int]] = {}
+        for i in dirty.tolist():
+            v = new.values[i]
+            for g in {v[j:j + n] for n in NGRAM_SIZES for j in range(len(v) - n + 1)}:
+                extra.setdefault(g, []).append(i)
+        for g, ids in extra.items():
+            add = np.asarray(ids, dtype=np.int64)
+            postings[g] = np.union1d(postings[g], add) if g in postings else add
+
+        new.postings = postings
+        return new
+
+    def search(self, query: str) -> np.ndarray:
+        q = (query or "").strip().lower()
+        if not q:
+            return np.arange(len(self.values), dtype=np.int64)
+
+        # 纯 ASCII（拉丁名、编号）用三元组，含中文时用二元组；查询过短则退化为更短的 gram
+        n = min(len(q), 3 if q.isascii() else 2)
+        grams = {q[j:j + n] for j in range(len(q) - n + 1)}
+
+        lists = []
+        for g in grams:
+            p = self.postings.get(g)
+            if p is None:
+                return _EMPTY_POSITIONS
+            lists.append(p)
+        lists.sort(key=len)
+
+        cand = lists[0]
+        for p in lists[1:]:
+            if len(cand) <= NGRAM_VERIFY_THRESHOLD:
+                break
+            cand = np.intersect1d(cand, p, assume_unique=True)
+            if not len(cand):
+                return _EMPTY_POSITIONS
+
+        # 查询串本身就是一个 gram 时，倒排表即精确结果
+        if len(q) == n:
+            return cand
+        values = self.values
+        return np.asarray([i for i in cand.tolist() if q in values[i]], dtype=np.int64)
+
+
+class SearchIndex:
+    """多个检索字段的 n-gram 索引集合；多字段条件取行位置交集。"""
+
+    def __init__(self, df: pd.DataFrame, cols: List[str]):
+        self.size = len(df)
+        self.columns = {c: NgramIndex(column_text(df[c]).tolist()) for c in cols if c in df.columns}
+
+    def patched(self, new_df: pd.DataFrame, old_to_new: np.ndarray, dirty: np.ndarray) -> "SearchIndex":
+        new = SearchIndex.__new__(SearchIndex)
+        new.size = len(new_df)
+        new.columns = {
+            c: idx.patched(column_text(new_df[c]).tolist(), old_to_new, dirty)
+            for c, idx in self.columns.items()
+        }
+        return new
+
+    def filter(self, conditions: Dict[str, str]) -> np.ndarray:
+        positions: Optional[np.ndarray] = None
+        for col, value in conditions.items():
+            if col not in self.columns or not str(value or "").strip():
+                continue
+            hit = self.columns[col].search(value)
+            positions = hit if positions is None else np.intersect1d(positions, hit, assume_unique=True)
+            if not len(positions):
+                break
+        if positions is None:
+            return np.arange(self.size, dtype=np.int64)
+        return positions
 
 
 # ---------------------------
 # 搜索（全字段）
 # ---------------------------
-def build_global_search_mask(df: pd.DataFrame, query: str) -> pd.Series:
-    q = (query or "").strip().lower()
-    if not q:
+# 全字段检索是否额外建立三元组倒排索引做预筛（内存换速度，大目录可开启）
+GLOBAL_SEARCH_NGRAM = os.environ.get("MRC_GLOBAL_SEARCH_NGRAM", "0") == "1"
+
+
+def normalize_search_text(s: str) -> str:
+    """检索归一化：全角转半角（NFKC）、转小写、连续空白合并为一个空格。"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", str(s or ""))).strip().lower()
+
+
+def build_search_text(df: pd.DataFrame) -> pd.Series:
+    """
+    每行所有字段以 " | " 拼接后归一化，得到单列全文文本（Arrow 字符串）。
+    整列在 Arrow 中拼接/归一化，不做逐行 Python join；后续 str.contains 也走 Arrow 内核。
+    """
+    if not len(df.columns):
+        return pd.Series([""] * len(df), index=df.index, dtype=pd.ArrowDtype(pa.string()))
+    arrays = [pa.array(column_text(df[c]).tolist(), type=pa.string()) for c in df.columns]
+    text = pc.binary_join_element_wise(*arrays, " | ")
+    text = pc.utf8_lower(pc.utf8_normalize(text, "NFKC"))
+    text = pc.utf8_trim_whitespace(pc.replace_substring_regex(text, pattern=r"\s+", replacement=" "))
+    return pd.Series(pd.arrays.ArrowExtensionArray(text), index=df.index)
+
+
+def build_global_search_mask(
+    df: pd.DataFrame,
+    query: str,
+    search_text: Optional[pd.Series] = None,
+    ngram_index: Optional[NgramIndex] = None,
+) -> pd.Series:
+    """
+    全字段检索：查询按空白拆成多个词，所有词都命中（AND）的行为 True。
+    search_text 为预先计算的全文列（缺省时现算）；给出 ngram_index 时先用倒排表预筛。
+    """
+    terms = normalize_search_text(query).split(" ")
+    terms = [t for t in terms if t]
+    if not terms:
         return pd.Series([True] * len(df), index=df.index)
-    all_text = df.astype(str).agg(" | ".join, axis=1).str.lower()
-    return all_text.str.contains(re.escape(q), na=False)
+    if search_text is None:
+        search_text = build_search_text(df)
+
+    if ngram_index is not None:
+        positions = ngram_index.search(terms[0])
+        for t in terms[1:]:
+            if not len(positions):
+                break
+            positions = np.intersect1d(positions, ngram_index.search(t), assume_unique=True)
+        mask = np.zeros(len(df), dtype=bool)
+        mask[positions] = True
+        return pd.Series(mask, index=df.index)
+
+    # 逐词收窄：后一个词只在前面已命中的行里查找
+    hit = np.arange(len(search_text))
+    sub = search_text
+    for t in terms:
+        m = sub.str.contains(t, regex=False).to_numpy(dtype=bool, na_value=False)
+        hit = hit[m]
+        if not len(hit):
+            break
+        sub = sub[m]
+    mask = np.zeros(len(df), dtype=bool)
+    mask[hit] = True
+    return pd.Series(mask, index=df.index)
 
 
 def short_text(s: str, n: int = 60) -> str:
@@ -338,6 +1144,353 @@ def short_text(s: str, n: int = 60) -> str:
     return (s[:n] + "…") if len(s) > n else s
 
 
+def short_text_series(s: pd.Series, n: int = 60) -> pd.Series:
+    """short_text 的向量化版本。"""
+    s = s.astype(str).str.replace("\n", " / ", regex=False).str.strip()
+    return s.where(s.str.len() <= n, s.str[:n] + "…")
+
+
+# ---------------------------
+# 模糊 / 拼音检索（三元组相似度预筛 + 有界编辑距离校验）
+# ---------------------------
+FUZZY_COLS = ["菌种命名", "属、种"]
+FUZZY_MIN_COVERAGE = 0.5  # 查询串三元组至少有这一比例出现在候选词中
+FUZZY_CANDIDATES = 200  # 近似候选词只对相似度最高的这么多个计算编辑距离（包含查询串的词全部返回，不受此限）
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def _padded_trigrams(s: str) -> set:
+    s = f" {s} "
+    return {s[j:j + 3] for j in range(len(s) - 2)}
+
+
+def substring_edit_distance(pattern: str, text: str) -> int:
+    """
+    pattern 与 text 中任一子串的最小编辑距离（Myers 位并行算法，O(len(text))），
+    用于“拼写略有误差的词出现在较长字段中”的校验。
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    peq: Dict[str, int] = {}
+    for i, ch in enumerate(pattern):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    pv, mv, score, best = full, 0, m, m
+    for ch in text:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & full) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # 子串匹配：文本起点不计代价，移位时不补 1
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        if score < best:
+            best = score
+            if best == 0:
+                break
+    return best
+
+
+def fuzzy_terms(value: str) -> List[str]:
+    """一个单元格的检索词：归一化原文；含中文时追加全拼与首字母（需安装 pypinyin）。"""
+    text = normalize_search_text(value)
+    if not text:
+        return []
+    terms = [text]
+    if lazy_pinyin is not None and _CJK_RE.search(text):
+        terms.append("".join(lazy_pinyin(text)).replace(" ", "").lower())
+        terms.append("".join(lazy_pinyin(text, style=Style.FIRST_LETTER)).replace(" ", "").lower())
+    return terms
+
+
+class FuzzyIndex:
+    """
+    FUZZY_COLS 的模糊检索索引：检索词（原文/拼音）去重后建立三元组 -> 词编号倒排，以及词 -> 行位置。
+    包含查询串的词（精确子串）由三元组倒排表求交后直接校验，全部返回；其余词按三元组覆盖率与 Jaccard
+    相似度选出少量近似候选，只对这些词计算有界编辑距离，不逐行比较。
+    """
+
+    def __init__(self, df: pd.DataFrame, cols: List[str] = FUZZY_COLS):
+        rows: List[int] = []
+        terms: List[str] = []
+        for c in cols:
+            if c not in df.columns:
+                continue
+            text = column_text(df[c])
+            codes, uniques = pd.factorize(text)
+            per_value = [fuzzy_terms(str(u)) for u in uniques]
+            for pos, code in enumerate(codes):
+                for t in per_value[code]:
+                    rows.append(pos)
+                    terms.append(t)
+
+        term_codes, uniq_terms = pd.factorize(pd.Series(terms, dtype=object))
+        self.terms: List[str] = [str(t) for t in uniq_terms]
+        # 词 -> 行位置（同一行多次命中同一词时去重）
+        pairs = np.unique(np.stack([term_codes.astype(np.int64), np.asarray(rows, dtype=np.int64)]), axis=1) \
+            if len(rows) else np.empty((2, 0), dtype=np.int64)
+        bounds = np.searchsorted(pairs[0], np.arange(len(self.terms) + 1))
+        self.term_rows = [pairs[1, bounds[k]:bounds[k + 1]] for k in range(len(self.terms))]
+
+        grams: Dict[str, List[int]] = {}
+        self.gram_counts = np.zeros(len(self.terms), dtype=np.int32)
+        for k, t in enumerate(self.terms):
+            g = _padded_trigrams(t)
+            self.gram_counts[k] = len(g)
+            for x in g:
+                grams.setdefault(x, []).append(k)
+        self.grams = {x: np.asarray(ids, dtype=np.int64) for x, ids in grams.items()}
+
+    def _exact_terms(self, q: str) -> np.ndarray:
+        """包含 q 的全部词编号。q 不超过 3 个字符时必然落在某个（补空格的）三元组内；更长时各三元组倒排表求交。"""
+        if len(q) <= 3:
+            lists = [ids for g, ids in self.grams.items() if q in g]
+            cand = np.unique(np.concatenate(lists)) if lists else _EMPTY_POSITIONS
+        else:
+            lists = [self.grams.get(q[j:j + 3]) for j in range(len(q) - 2)]
+            if any(p is None for p in lists):
+                return _EMPTY_POSITIONS
+            lists.sort(key=len)
+            cand = lists[0]
+            for p in lists[1:]:
+                cand = np.intersect1d(cand, p, assume_unique=True)
+        terms = self.terms
+        return np.asarray([k for k in cand.tolist() if q in terms[k]], dtype=np.int64)
+
+    def search(self, query: str) -> np.ndarray:
+        """返回按相似度排序的行位置（最相似在前）：精确子串命中在前，近似命中按编辑距离排在其后。"""
+        q = normalize_search_text(query)
+        if not q or not self.terms:
+            return _EMPTY_POSITIONS
+        q_grams = [g for g in _padded_trigrams(q) if g in self.grams]
+        n_q = len(_padded_trigrams(q))
+        if q_grams:
+            inter = np.bincount(np.concatenate([self.grams[g] for g in q_grams]), minlength=len(self.terms))
+        else:
+            inter = np.zeros(len(self.terms), dtype=np.int64)
+
+        def jaccard(ks: np.ndarray) -> np.ndarray:
+            return inter[ks] / (n_q + self.gram_counts[ks] - inter[ks])
+
+        # 精确子串全部返回（不经过候选上限）
+        exact = self._exact_terms(q)
+        scored = [(0, -j, term) for term, j in zip(exact.tolist(), jaccard(exact).tolist())]
+
+        # 允许的编辑距离随查询长度增加；很短的查询只接受精确子串
+        limit = 0 if len(q) <= 3 else max(1, len(q) // 4)
+        if limit:
+            near = inter >= max(1, math.ceil(n_q * FUZZY_MIN_COVERAGE))
+            near[exact] = False
+            cand = np.flatnonzero(near)
+            jac = jaccard(cand)
+            # 覆盖率优先（短查询命中长字段），Jaccard 次之
+            for k in np.lexsort((-jac, -inter[cand]))[:FUZZY_CANDIDATES]:
+                term = cand[k]
+                d = substring_edit_distance(q, self.terms[term])
+                if d <= limit:
+                    scored.append((d, -jac[k], term))
+        scored.sort()
+
+        best: Dict[int, int] = {}
+        for rank, (_, _, term) in enumerate(scored):
+            for pos in self.term_rows[term].tolist():
+                best.setdefault(pos, rank)
+        return np.fromiter(best.keys(), dtype=np.int64, count=len(best))
+
+
+# ---------------------------
+# 分面筛选（属 / 种 / 来源地 / 申请人 + 保藏日期区间）
+# ---------------------------
+_LATIN_TAXON_RE = re.compile(r"[A-Z][a-z]+(?: (?:sp\.|[a-z]+))?")
+_SOURCE_PLACE_RE = re.compile(r"^[\u4e00-\u9fff]+")
+
+
+def _taxon_tail(v: str) -> str:
+    # “门-纲-目-科-属-种”层级串取最后一段；括号内的连字符（如 Deinococcus-Thermus）不影响最后一段
+    v = re.sub(r"\s+", " ", v).strip()
+    if not v or v.startswith(("（", "(")):
+        return ""
+    return v.rsplit("-", 1)[-1].strip()
+
+
+def species_of(v: str) -> str:
+    """属、种 -> 种名：优先取拉丁学名（如 Sphingomonas sp.），没有拉丁名时用中文原文。"""
+    tail = _taxon_tail(v)
+    m = _LATIN_TAXON_RE.search(tail)
+    return m.group(0) if m else tail
+
+
+def genus_of(v: str) -> str:
+    """属、种 -> 属名（拉丁学名首词）；只有中文名称时无法可靠拆分，返回空。"""
+    m = _LATIN_TAXON_RE.search(_taxon_tail(v))
+    return m.group(0).split(" ")[0] if m else ""
+
+
+def source_place_of(v: str) -> str:
+    """菌种来源 -> 来源地：取开头的中文部分（“西藏高原 24k ICE…” -> “西藏高原”）。"""
+    v = v.strip()
+    m = _SOURCE_PLACE_RE.match(v)
+    return m.group(0) if m else re.split(r"[\s，,]", v, 1)[0]
+
+
+# 分面名称 -> (源列, 取值函数)；取值函数为 None 时直接用单元格文本
+FACETS: Dict[str, Tuple[str, Optional[Callable[[str], str]]]] = {
+    "属": ("属、种", genus_of),
+    "种": ("属、种", species_of),
+    "来源地": ("菌种来源", source_place_of),
+    "申请人": ("申请人", None),
+}
+DATE_FACET_COL = "保藏日期"
+
+
+class Facet:
+    """单个分面：每行的取值编码 + 每个取值的升序行位置（倒排表），构建后只读。"""
+
+    def __init__(self, keys: pd.Series):
+        codes, uniques = pd.factorize(keys, sort=False)
+        self.codes = codes.astype(np.int32)
+        self.values: List[str] = [str(u) for u in uniques]
+        # 按编码稳定排序后切段：每段即该取值的升序行位置
+        order = np.argsort(self.codes, kind="stable")
+        bounds = np.searchsorted(self.codes[order], np.arange(len(self.values) + 1))
+        self.postings = {v: order[bounds[k]:bounds[k + 1]] for k, v in enumerate(self.values)}
+        totals = np.diff(bounds)
+        # 选项按总数降序，空值不作为选项
+        self.options = [self.values[k] for k in np.argsort(-totals, kind="stable") if self.values[k]]
+
+    def positions(self, selected: List[str]) -> np.ndarray:
+        lists = [self.postings[v] for v in selected if v in self.postings]
+        if len(lists) == 1:
+            return lists[0]
+        return np.sort(np.concatenate(lists)) if lists else _EMPTY_POSITIONS
+
+    def counts(self, base: np.ndarray) -> Dict[str, int]:
+        bins = np.bincount(self.codes[base], minlength=len(self.values))
+        return {v: int(n) for v, n in zip(self.values, bins)}
+
+
+class DateFacet:
+    """日期区间分面：按日期排序的行位置，区间查询为两次二分查找。"""
+
+    def __init__(self, s: pd.Series):
+        values = s.to_numpy(dtype="datetime64[D]")
+        valid = np.flatnonzero(~np.isnat(values))
+        self.order = valid[np.argsort(values[valid], kind="stable")]
+        self.sorted_days = values[self.order]
+        self.min = self.sorted_days[0].astype(object) if len(self.order) else None
+        self.max = self.sorted_days[-1].astype(object) if len(self.order) else None
+
+    def positions(self, lo, hi) -> np.ndarray:
+        i = np.searchsorted(self.sorted_days, np.datetime64(lo, "D"), side="left")
+        j = np.searchsorted(self.sorted_days, np.datetime64(hi, "D"), side="right")
+        return np.sort(self.order[i:j])
+
+
+class FacetIndex:
+    """
+    目录的全部分面。组合筛选为各分面行位置的交集；每个分面的计数只受“其他分面”的选择影响
+    （同一分面内多选为并集），计数用取值编码 bincount，不扫描 DataFrame。
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.facets: Dict[str, Facet] = {}
+        for name, (col, fn) in FACETS.items():
+            if col not in df.columns:
+                continue
+            text = column_text(df[col])
+            if fn is not None:
+                # 按不重复值计算，再映射回各行
+                uniq = pd.unique(text)
+                text = text.map(dict(zip(uniq, (fn(str(u)) for u in uniq))))
+            self.facets[name] = Facet(text)
+        self.date: Optional[DateFacet] = None
+        if DATE_FACET_COL in df.columns and pd.api.types.is_datetime64_any_dtype(df[DATE_FACET_COL].dtype):
+            self.date = DateFacet(df[DATE_FACET_COL])
+
+    def _narrow(self, base: np.ndarray, selections: Dict[str, List[str]], date_range, skip: str = "") -> np.ndarray:
+        positions = base
+        for name, selected in selections.items():
+            if name == skip or not selected or name not in self.facets or not len(positions):
+                continue
+            positions = np.intersect1d(positions, self.facets[name].positions(selected), assume_unique=True)
+        if date_range and self.date is not None and skip != DATE_FACET_COL and len(positions):
+            positions = np.intersect1d(positions, self.date.positions(*date_range), assume_unique=True)
+        return positions
+
+    def apply(self, base: np.ndarray, selections: Dict[str, List[str]], date_range=None) -> np.ndarray:
+        """收窄后的行位置，保持 base 的顺序（模糊检索结果按相似度排序）。"""
+        narrowed = self._narrow(base, selections, date_range)
+        if narrowed is base:
+            return base
+        return base[np.isin(base, narrowed, assume_unique=True)]
+
+    def counts(self, base: np.ndarray, selections: Dict[str, List[str]], date_range=None) -> Dict[str, Dict[str, int]]:
+        return {
+            name: facet.counts(self._narrow(base, selections, date_range, skip=name))
+            for name, facet in self.facets.items()
+        }
+
+
+# ---------------------------
+# 排序（每个目录版本缓存一次排序置换，检索结果只按名次重排）
+# ---------------------------
+_NATURAL_RE = re.compile(r"(\d+)")
+
+
+def natural_sort_key(s: str) -> tuple:
+    """自然顺序：数字段按数值比较（CQUT-B-9 < CQUT-B-102），其余部分全角转半角、不区分大小写。"""
+    parts = _NATURAL_RE.split(unicodedata.normalize("NFKC", s).strip().lower())
+    return tuple((0, int(p), "") if i % 2 else (1, 0, p) for i, p in enumerate(parts))
+
+
+def _taxon_sort_text(v: str) -> str:
+    # 属、种按拉丁学名（属 + 种加词）排序，没有学名时用原文
+    return species_of(v) or v
+
+
+# 可排序列 -> 排序文本取值函数（None 表示直接用单元格文本）；日期类型的列按真实日期排序，其余按自然顺序
+SORT_COLS: Dict[str, Optional[Callable[[str], str]]] = {
+    "保藏日期": None,
+    "菌种编号": None,
+    "属、种": _taxon_sort_text,
+}
+# 同一列的排序方向在界面上的说明
+_SORT_DIRECTIONS = {"保藏日期": ("从早到晚", "从晚到早")}
+
+
+def sort_permutations(s: pd.Series, key_fn: Optional[Callable[[str], str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    返回 (升序置换, 降序置换)：置换为行位置（iloc）数组。空值在两个方向上都排在最后，
+    同值保持工作簿顺序。文本列只对不重复值做一次自然顺序比较，再按名次做整数 argsort。
+    """
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        empty = s.isna().to_numpy()
+        key = s.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    else:
+        codes, uniques = pd.factorize(column_text(s))
+        texts = [key_fn(u) if key_fn else u for u in uniques.tolist()]
+        order = sorted(range(len(texts)), key=lambda i: natural_sort_key(texts[i]))
+        rank = np.empty(len(texts) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(texts))
+        rank[-1] = 0  # factorize 的缺失值编码为 -1
+        key = rank[codes]
+        blank = np.array([t.strip().lower() in ("", "nan", "none") for t in texts] + [True], dtype=bool)
+        empty = blank[codes]
+    last = np.iinfo(np.int64).max
+    asc = np.argsort(np.where(empty, last, key), kind="stable")
+    desc = np.argsort(np.where(empty, last, -key), kind="stable")
+    return asc, desc
+
+
 # ---------------------------
 # 分页（稳定：session_state）
 # ---------------------------
@@ -389,68 +1542,572 @@ def resolve_image_path(token: str, excel_dir: str) -> Optional[str]:
     return None
 
 
-@st.cache_data(show_spinner=False)
-def extract_embedded_images(excel_path: str) -> Dict[int, List[str]]:
+def resolve_image_tokens(tokens: Iterable[str], excel_dir: str) -> Dict[str, Optional[str]]:
     """
-    从 Excel 工作表中提取嵌入图片对象，按“图片锚点所在行号(Excel行号)”索引。
-    返回：
-      { excel_row_number: [saved_image_path1, saved_image_path2, ...], ... }
-    注意：Excel 行号从 1 开始。
+    批量版 resolve_image_path：每个候选目录只列一次目录项，纯文件名直接查集合，
+    带目录的相对路径/绝对路径才逐个 stat。未找到的 token 记为 None（负缓存）。
     """
-    wb = load_workbook(excel_path)
-    ws = wb.worksheets[0]
+    listings = []
+    for d in (excel_dir, tempfile.gettempdir(), os.getcwd()):
+        try:
+            listings.append((d, set(os.listdir(d))))
+        except OSError:
+            continue
+
+    resolved: Dict[str, Optional[str]] = {}
+    for token in tokens:
+        if token in resolved:
+            continue
+        t = token.strip()
+        if t.lower().startswith("file://"):
+            t = t[7:].strip()
+        if not t or re.match(r"^https?://", t, re.IGNORECASE) or os.path.basename(t) != t:
+            resolved[token] = resolve_image_path(token, excel_dir)
+            continue
+        resolved[token] = next((os.path.join(d, t) for d, names in listings if t in names), None)
+    return resolved
 
-    # 为避免旧文件残留：按文件特征创建导出目录
-    st_info = os.stat(excel_path)
-    tag = f"mtime{int(st_info.st_mtime)}_size{st_info.st_size}"
-    out_dir = os.path.join(EXPORT_ROOT, tag)
 
-    # 部署环境可能只读：无法落盘则直接返回空映射，不影响详情页
+_OOXML_NS = {
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+    "xdr": "http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+}
+
+
+def _zip_rels(zf: zipfile.ZipFile, part: str) -> Dict[str, str]:
+    """读取某个部件的 .rels：rId -> 目标部件在 zip 内的路径。"""
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+    if rels_path not in zf.namelist():
+        return {}
+    root = ET.fromstring(zf.read(rels_path))
+    out: Dict[str, str] = {}
+    for rel in root.findall("rel:Relationship", _OOXML_NS):
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") == "External" or not target:
+            continue
+        if target.startswith("/"):
+            path = target.lstrip("/")
+        else:
+            path = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+        out[rel.get("Id", "")] = path
+    return out
+
+
+def _sheet_elements(zf: zipfile.ZipFile) -> List[ET.Element]:
+    wb_root = ET.fromstring(zf.read("xl/workbook.xml"))
+    return wb_root.findall("main:sheets/main:sheet", _OOXML_NS)
+
+
+def list_sheet_names(excel_path: str) -> List[str]:
+    """只读 workbook.xml 获取工作表名（不加载任何单元格）。"""
+    with zipfile.ZipFile(excel_path) as zf:
+        return [el.get("name", "") for el in _sheet_elements(zf)]
+
+
+def read_image_anchors(excel_path: str, sheet: Union[int, str] = 0) -> List[Tuple[int, str]]:
+    """
+    直接解析 zip 内的 drawing XML，获取工作表（默认第一个）中图片的锚点行与媒体文件：
+      [(excel_row_number, zip_member_name), ...]（按 drawing 中的出现顺序）
+    不加载任何单元格，代价只与图片数量有关。
+    """
+    anchors: List[Tuple[int, str]] = []
+    with zipfile.ZipFile(excel_path) as zf:
+        sheets = _sheet_elements(zf)
+        if isinstance(sheet, str):
+            matched = [el for el in sheets if el.get("name") == sheet]
+        else:
+            matched = sheets[sheet:sheet + 1]
+        if not matched:
+            return anchors
+        sheet_part = _zip_rels(zf, "xl/workbook.xml").get(matched[0].get(f"{{{_OOXML_NS['r']}}}id", ""))
+        if not sheet_part or sheet_part not in zf.namelist():
+            return anchors
+
+        sheet_rels = _zip_rels(zf, sheet_part)
+        sheet_root = ET.fromstring(zf.read(sheet_part))
+        for drawing in sheet_root.findall("main:drawing", _OOXML_NS):
+            drawing_part = sheet_rels.get(drawing.get(f"{{{_OOXML_NS['r']}}}id", ""))
+            if not drawing_part or drawing_part not in zf.namelist():
+                continue
+            drawing_rels = _zip_rels(zf, drawing_part)
+            drawing_root = ET.fromstring(zf.read(drawing_part))
+            for anchor in list(drawing_root):
+                row_el = anchor.find("xdr:from/xdr:row", _OOXML_NS)
+                blip = anchor.find(".//a:blip", _OOXML_NS)
+                if row_el is None or blip is None:
+                    continue
+                media = drawing_rels.get(blip.get(f"{{{_OOXML_NS['r']}}}embed", ""))
+                if not media:
+                    continue
+                try:
+                    excel_row = int(row_el.text or "") + 1
+                except ValueError:
+                    continue
+                anchors.append((excel_row, media))
+    return anchors
+
+
+class ImageIndex(dict):
+    """
+    { excel_row_number: [zip_member_name, ...] }；objects 记录已提取的 zip 成员 -> 落盘 PNG 路径，
+    同一工作簿版本内再次查看同一行时直接取路径，不再打开 zip、读取与摘要图片字节。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.objects: Dict[str, str] = {}
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def get_image_index(excel_path: str, fingerprint: str, sheet: Union[int, str] = 0) -> ImageIndex:
+    """
+    轻量图片索引：只读锚点，不解码任何图片。
+    fingerprint 仅用于缓存失效。每次打开详情页都会查询：跨会话共享同一份，不逐次反序列化。
+    """
+    profile_note(note="重建图片锚点索引")
+    index = ImageIndex()
     try:
-        os.makedirs(out_dir, exist_ok=True)
+        anchors = read_image_anchors(excel_path, sheet)
     except Exception:
-        return {}
+        return index
+    for excel_row, member in anchors:
+        index.setdefault(excel_row, []).append(member)
+    return index
+
+
+def _image_object_path(raw: bytes) -> str:
+    digest = hashlib.sha1(raw).hexdigest()
+    return os.path.join(EXPORT_ROOT, "objects", digest[:2], f"{digest}.png")
+
 
+def _encode_png(raw: bytes, save_path: str) -> bool:
+    """解码图片字节并另存为 PNG（先写临时文件再原子替换，避免并发读到半截文件）。"""
+    # 同一进程内的多个会话可能同时提取同一张图：临时文件名必须唯一
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        im = Image.open(BytesIO(raw))
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(save_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            im.save(f, format="PNG")
+        os.replace(tmp_path, save_path)
+        return True
+    except Exception:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def extract_row_images(excel_path: str, members: List[str], objects: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    按需提取若干嵌入图片（zip 成员名），返回落盘的 PNG 路径。
+    已提取过的图片（内容摘要相同）直接复用；单张失败则跳过，不影响其余图片。
+    给出 objects（ImageIndex.objects）时先按成员名查已落盘的路径，全部命中则不打开 zip，并记录新提取的结果。
+    """
+    if objects is None:
+        objects = {}
+    known = {m: objects.get(m) for m in members}
+    known = {m: p for m, p in known.items() if p and os.path.exists(p)}
+    todo = [m for m in members if m not in known]
+    if todo:
+        with zipfile.ZipFile(excel_path) as zf:
+            for member in todo:
+                try:
+                    raw = zf.read(member)
+                except Exception:
+                    continue
+                save_path = _image_object_path(raw)
+                if os.path.exists(save_path) or _encode_png(raw, save_path):
+                    known[member] = objects[member] = save_path
+    return [known[m] for m in members if m in known]
+
+
+def _extract_members_parallel(excel_path: str, members: List[str], workers: int) -> Dict[str, Optional[str]]:
+    """
+    多进程解码/编码：主进程按顺序读取 zip 字节并提交任务，最多保持 workers*4 个任务在途，
+    避免一次性把所有图片字节读入内存。返回 { member: saved_path 或 None(失败) }。
+    """
+    done: Dict[str, Optional[str]] = {}
+    with zipfile.ZipFile(excel_path) as zf, cf.ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight: Dict[cf.Future, Tuple[str, str]] = {}
+        for member in members:
+            if member in done:
+                continue
+            try:
+                raw = zf.read(member)
+            except Exception:
+                done[member] = None
+                continue
+            save_path = _image_object_path(raw)
+            if os.path.exists(save_path):
+                done[member] = save_path
+                continue
+            done[member] = None
+            in_flight[pool.submit(_encode_png, raw, save_path)] = (member, save_path)
+            if len(in_flight) >= workers * 4:
+                finished, _ = cf.wait(in_flight, return_when=cf.FIRST_COMPLETED)
+                for fut in finished:
+                    m, p = in_flight.pop(fut)
+                    done[m] = p if fut.result() else None
+        for fut in cf.as_completed(in_flight):
+            m, p = in_flight[fut]
+            done[m] = p if fut.result() else None
+    return done
+
+
+@profiled("extract_embedded_images", cached=True)
+def extract_embedded_images(excel_path: str, workers: Optional[int] = None) -> Dict[int, List[str]]:
+    """
+    从 Excel 工作表中提取全部嵌入图片对象，按“图片锚点所在行号(Excel行号)”索引。
+    返回：
+      { excel_row_number: [saved_image_path1, saved_image_path2, ...], ... }
+    注意：Excel 行号从 1 开始。
+    详情页只按需提取当前行（见 get_images_for_record），本函数用于整体预热/批量处理。
+    workers > 1 时使用进程池并行编码（默认取 MRC_IMAGE_WORKERS），结果与串行一致。
+    """
+    workers = IMAGE_WORKERS if workers is None else workers
+    return _extract_embedded_images_cached(excel_path, excel_fingerprint(excel_path), max(1, int(workers)))
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _extract_embedded_images_cached(excel_path: str, fingerprint: str, workers: int = 1) -> Dict[int, List[str]]:
+    profile_note(cache="miss")
+    index = get_image_index(excel_path, fingerprint)
     mapping: Dict[int, List[str]] = {}
-    images = getattr(ws, "_images", [])
 
-    for idx, img in enumerate(images, start=1):
+    if workers > 1:
+        members = [m for row_members in index.values() for m in row_members]
         try:
-            anchor = img.anchor
-            row0 = anchor._from.row  # type: ignore
-            excel_row = int(row0) + 1
+            done = _extract_members_parallel(excel_path, members, workers)
         except Exception:
-            continue
+            # 进程池不可用（受限环境/无法 fork 等）时退回串行
+            done = None
+        if done is not None:
+            index.objects.update((m, p) for m, p in done.items() if p)
+            # 按锚点顺序组装，保证映射与串行结果一致；单张失败的图片跳过
+            for excel_row, row_members in index.items():
+                paths = [done[m] for m in row_members if done.get(m)]
+                if paths:
+                    mapping[excel_row] = paths
+            return mapping
+
+    for excel_row, members in index.items():
+        paths = extract_row_images(excel_path, members, index.objects)
+        if paths:
+            mapping[excel_row] = paths
+    return mapping
+
+
+# ---------------------------
+# 图片派生：缩略图/展示图（WebP/JPEG），按 LRU 控制磁盘占用
+# ---------------------------
+def _derivative_ext() -> str:
+    return "jpg" if DERIVATIVE_FORMAT in ("jpg", "jpeg") else "webp"
+
+
+def _derivative_paths(src_path: str) -> Dict[str, str]:
+    # 以源文件路径 + 修改时间 + 大小为键：源图被替换时自动生成新派生图
+    st_info = os.stat(src_path)
+    key = f"{os.path.abspath(src_path)}|{st_info.st_mtime_ns}|{st_info.st_size}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    base = os.path.join(DERIVATIVE_ROOT, digest[:2], digest)
+    return {kind: f"{base}_{kind}.{_derivative_ext()}" for kind in DERIVATIVE_SIZES}
+
+
+def _save_derivative(im: Image.Image, max_side: int, save_path: str):
+    out = im.copy()
+    out.thumbnail((max_side, max_side))
+    if _derivative_ext() == "jpg":
+        out = out.convert("RGB")
+        fmt = "JPEG"
+    else:
+        if out.mode not in ("RGB", "RGBA"):
+            out = out.convert("RGBA")
+        fmt = "WEBP"
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(save_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            out.save(f, format=fmt, quality=DERIVATIVE_QUALITY)
+        os.replace(tmp_path, save_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class DerivativeUsage:
+    """缓存目录占用（字节）的进程内估计：启动后首次写入时扫描一次，之后按新写入的文件累加，超过上限时才重新扫描并淘汰。"""
+
+    def __init__(self):
+        self.total: Optional[int] = None
+        self.lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _derivative_usage() -> DerivativeUsage:
+    return DerivativeUsage()
+
+
+@st.cache_resource(show_spinner=False)
+def _remote_usage() -> DerivativeUsage:
+    return DerivativeUsage()
+
 
+def _record_derivatives(paths: Iterable[str]):
+    """登记新写入的派生图；累计占用超过上限时按 LRU 淘汰。"""
+    _record_cache_files(_derivative_usage(), paths, DERIVATIVE_CACHE_MB, _enforce_derivative_cap)
+
+
+def _record_cache_files(usage: DerivativeUsage, paths: Iterable[str], cap_mb: float, enforce: Callable[[], int]):
+    """登记新写入的缓存文件；累计占用超过 cap_mb 时由 enforce 重新扫描并淘汰。"""
+    added = 0
+    for p in paths:
         try:
-            raw = img._data()  # type: ignore
-        except Exception:
+            added += os.path.getsize(p)
+        except OSError:
+            continue
+    with usage.lock:
+        if usage.total is not None:
+            usage.total += added
+            if usage.total <= cap_mb * 1024 * 1024:
+                return
+        usage.total = enforce()
+
+
+def _enforce_derivative_cap() -> int:
+    """派生图目录按 DERIVATIVE_CACHE_MB 淘汰；remote/ 下的远程原图另有上限（REMOTE_CACHE_MB），不计入。"""
+    return _enforce_cache_cap(DERIVATIVE_ROOT, DERIVATIVE_CACHE_MB, skip="remote")
+
+
+def _enforce_cache_cap(root: str, cap_mb: float, skip: Optional[str] = None) -> int:
+    """
+    目录总大小超过上限时，按修改时间（命中时会刷新）从旧到新删除，直到降到上限的 90%；返回清理后的总大小。
+    skip 为 root 下不参与统计与淘汰的子目录。
+    """
+    cap = cap_mb * 1024 * 1024
+    entries = []
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root and skip in dirnames:
+            dirnames.remove(skip)
+        for name in filenames:
+            p = os.path.join(dirpath, name)
             try:
-                raw = img._data  # type: ignore
-            except Exception:
+                st_info = os.stat(p)
+            except OSError:
                 continue
-
+            entries.append((st_info.st_mtime, st_info.st_size, p))
+            total += st_info.st_size
+    if total <= cap:
+        return total
+    entries.sort()
+    for _, size, p in entries:
+        if total <= cap * 0.9:
+            break
         try:
-            im = Image.open(BytesIO(raw))
-            save_path = os.path.join(out_dir, f"row{excel_row}_img{idx}.png")
-            im.save(save_path, format="PNG")
-            mapping.setdefault(excel_row, []).append(save_path)
-        except Exception:
+            os.remove(p)
+            total -= size
+        except OSError:
             continue
+    return total
 
-    return mapping
 
+def get_image_derivatives(src_path: str) -> Dict[str, str]:
+    """
+    返回 { "thumb": ..., "display": ..., "original": src_path }。
+    URL 或无法处理的图片只返回 original；派生图失败不影响原图展示。
+    """
+    result = {"original": src_path}
+    if re.match(r"^https?://", src_path, re.IGNORECASE):
+        return result
+    try:
+        paths = _derivative_paths(src_path)
+    except OSError:
+        return result
+
+    if all(os.path.exists(p) for p in paths.values()):
+        # 刷新修改时间，作为 LRU 的“最近使用”
+        for p in paths.values():
+            try:
+                os.utime(p)
+            except OSError:
+                pass
+        result.update(paths)
+        return result
+
+    try:
+        with Image.open(src_path) as im:
+            im = ImageOps.exif_transpose(im)
+            for kind, max_side in DERIVATIVE_SIZES.items():
+                _save_derivative(im, max_side, paths[kind])
+    except Exception:
+        return result
+    _record_derivatives(paths.values())
+    result.update(paths)
+    return result
+
+
+# ---------------------------
+# 图片列批量解析 + 远程图片预取（asyncio，有界并发）
+# ---------------------------
+# 未找到的本地图片 token / 下载失败的 URL 在这段时间（秒）内不再重试
+IMAGE_MISS_TTL = float(os.environ.get("MRC_IMAGE_MISS_TTL", "60"))
+# 加载目录后在后台把 URL 图片下载到派生图缓存，详情页只读本地文件
+URL_PREFETCH = os.environ.get("MRC_URL_PREFETCH", "1") == "1"
+URL_PREFETCH_CONCURRENCY = int(os.environ.get("MRC_URL_PREFETCH_CONCURRENCY", "8"))
+URL_FETCH_TIMEOUT = float(os.environ.get("MRC_URL_FETCH_TIMEOUT", "10"))
+URL_FETCH_MAX_MB = float(os.environ.get("MRC_URL_FETCH_MAX_MB", "20"))
+# 预取的远程原图（DERIVATIVE_ROOT/remote）总大小上限，超出按最近使用时间淘汰；被淘汰的 URL 下次预取时重新下载
+REMOTE_CACHE_MB = float(os.environ.get("MRC_REMOTE_CACHE_MB", "1024"))
+_REMOTE_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+
+
+def _remote_cache_path(url: str) -> str:
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext not in _REMOTE_IMAGE_EXTS:
+        ext = ".img"
+    return os.path.join(DERIVATIVE_ROOT, "remote", digest[:2], digest + ext)
+
+
+def cached_remote_image(url: str) -> Optional[str]:
+    """URL 图片已预取到本地时返回本地副本路径，并刷新其修改时间（远程原图缓存按 REMOTE_CACHE_MB 做 LRU 淘汰）。"""
+    p = _remote_cache_path(url)
+    try:
+        os.utime(p)
+    except OSError:
+        return None
+    return p
+
+
+def _enforce_remote_cap() -> int:
+    return _enforce_cache_cap(os.path.join(DERIVATIVE_ROOT, "remote"), REMOTE_CACHE_MB)
+
+
+@st.cache_resource(show_spinner=False)
+def _remote_failures() -> Dict[str, float]:
+    # 进程级：URL -> 最近一次下载失败的时间（time.monotonic）
+    return {}
+
+
+def _fetch_remote_image(url: str) -> bool:
+    """阻塞下载一张图片：超过大小上限或不是可识别的图片都视为失败；成功后顺带生成派生图。"""
+    limit = int(URL_FETCH_MAX_MB * 1024 * 1024)
+    req = urllib.request.Request(url, headers={"User-Agent": "microbial-catalog-prefetch"})
+    with urllib.request.urlopen(req, timeout=URL_FETCH_TIMEOUT) as resp:
+        data = resp.read(limit + 1)
+    if len(data) > limit:
+        return False
+    with Image.open(BytesIO(data)) as im:
+        im.verify()
+
+    path = _remote_cache_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    _record_cache_files(_remote_usage(), [path], REMOTE_CACHE_MB, _enforce_remote_cap)
+    get_image_derivatives(path)
+    return True
+
+
+async def _prefetch_async(urls: List[str], concurrency: int) -> Dict[str, bool]:
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(url: str) -> Tuple[str, bool]:
+        async with sem:
+            try:
+                return url, await asyncio.to_thread(_fetch_remote_image, url)
+            except Exception:
+                return url, False
+
+    return dict(await asyncio.gather(*(fetch(u) for u in urls)))
 
+
+def prefetch_remote_images(urls: Iterable[str], concurrency: int = URL_PREFETCH_CONCURRENCY) -> Dict[str, bool]:
+    """
+    把尚未缓存的 URL 图片下载到本地派生图缓存，同时最多 concurrency 个请求；返回 {url: 是否成功}。
+    已缓存的 URL 与 IMAGE_MISS_TTL 内失败过的 URL 直接跳过。
+    """
+    failures = _remote_failures()
+    now = time.monotonic()
+    todo = [
+        u for u in dict.fromkeys(urls)
+        if not os.path.exists(_remote_cache_path(u)) and now - failures.get(u, -math.inf) > IMAGE_MISS_TTL
+    ]
+    if not todo:
+        return {}
+    result = asyncio.run(_prefetch_async(todo, concurrency))
+    now = time.monotonic()
+    for url, ok in result.items():
+        if ok:
+            failures.pop(url, None)
+        else:
+            failures[url] = now
+    logger.info("远程图片预取完成：%d / %d", sum(result.values()), len(result))
+    return result
+
+
+def start_remote_prefetch(urls: List[str]) -> Optional[threading.Thread]:
+    if not URL_PREFETCH or not urls:
+        return None
+    t = threading.Thread(target=prefetch_remote_images, args=(urls,), name="image-prefetch", daemon=True)
+    t.start()
+    return t
+
+
+class ImageTokenResolver:
+    """
+    图片列 token -> 本地路径/URL 的查找表，加载目录时一次性批量解析，详情页按表查找、不再逐个 stat。
+    未找到的 token 超过 IMAGE_MISS_TTL 秒后才重新检查（后补的图片文件仍能被发现）。
+    URL 已预取到本地时返回本地副本，否则返回 URL 本身。
+    """
+
+    def __init__(self, tokens: Iterable[str], excel_dir: str):
+        self.excel_dir = excel_dir
+        self._resolved = resolve_image_tokens(tokens, excel_dir)
+        now = time.monotonic()
+        self._missed = {t: now for t, p in self._resolved.items() if p is None}
+        self._lock = threading.Lock()
+
+    def resolve(self, token: str) -> Optional[str]:
+        checked = self._missed.get(token)
+        if token not in self._resolved or (checked is not None and time.monotonic() - checked > IMAGE_MISS_TTL):
+            p = resolve_image_path(token, self.excel_dir)
+            with self._lock:
+                self._resolved[token] = p
+                if p is None:
+                    self._missed[token] = time.monotonic()
+                else:
+                    self._missed.pop(token, None)
+        p = self._resolved[token]
+        if p and re.match(r"^https?://", p, re.IGNORECASE):
+            return cached_remote_image(p) or p
+        return p
+
+    def urls(self) -> List[str]:
+        return [p for p in self._resolved.values() if p and re.match(r"^https?://", p, re.IGNORECASE)]
+
+
+@profiled("get_images_for_record")
 def get_images_for_record(
     df: pd.DataFrame,
     excel_path: str,
     df_row_index: int,
     img_col: Optional[str],
+    sheet: Union[int, str] = 0,
+    excel_row: Optional[int] = None,
+    resolver: Optional[ImageTokenResolver] = None,
 ) -> List[str]:
     """
     聚合两类图片来源：
-    1) 单元格文本（URL/路径） -> resolved paths
+    1) 单元格文本（URL/路径） -> resolved paths（传入 resolver 时查批量解析结果）
     2) Excel 嵌入图片对象 -> extracted png paths
+    合并目录中的行需传入其来源工作簿/工作表及源 Excel 行号（excel_row）。
     """
     excel_dir = os.path.dirname(os.path.abspath(excel_path))
     results: List[str] = []
@@ -459,14 +2116,16 @@ def get_images_for_record(
     if img_col and img_col in df.columns:
         tokens = split_image_tokens(df.loc[df_row_index, img_col])
         for t in tokens:
-            p = resolve_image_path(t, excel_dir)
+            p = resolver.resolve(t) if resolver is not None else resolve_image_path(t, excel_dir)
             if p:
                 results.append(p)
 
     # 2) 嵌入图片：将 df 行号映射到 Excel 行号（df第0行≈Excel第2行，Excel第1行是表头）
-    excel_row = int(df_row_index) + 2
-    embedded_map = extract_embedded_images(excel_path)
-    for p in embedded_map.get(excel_row, []):
+    #    只解码本行的图片，其余行不受影响
+    if excel_row is None:
+        excel_row = int(df_row_index) + 2
+    index = get_image_index(excel_path, excel_fingerprint(excel_path), sheet)
+    for p in extract_row_images(excel_path, index.get(excel_row, []), index.objects):
         results.append(p)
 
     # 去重
@@ -474,32 +2133,51 @@ def get_images_for_record(
     for p in results:
         if p not in dedup:
             dedup.append(p)
+    profile_note(rows=len(dedup))
     return dedup
 
 
 # ---------------------------
 # 列表表格：自渲染 HTML（更可控、更美观）
 # ---------------------------
-def _render_table_html(df_show: pd.DataFrame, center_cols: Optional[set] = None) -> str:
+# 已渲染行片段的缓存上限（条）
+ROW_HTML_CACHE_SIZE = 20000
+
+PAGE_SIZE_OPTIONS = [10, 20, 50, 100, 200, 500]
+
+
+def _escape_series(s: pd.Series) -> pd.Series:
+    """html.escape 的向量化版本（含引号）。"""
+    return (
+        s.str.replace("&", "&amp;", regex=False)
+         .str.replace("<", "&lt;", regex=False)
+         .str.replace(">", "&gt;", regex=False)
+         .str.replace('"', "&quot;", regex=False)
+         .str.replace("'", "&#x27;", regex=False)
+    )
+
+
+def _table_row_fragments(df_show: pd.DataFrame, center_cols: Optional[set] = None) -> List[str]:
+    """整列拼接 <td>，一次得到所有 <tr> 片段（不逐行 iterrows）。"""
     center_cols = center_cols or set()
+    if df_show.empty:
+        return []
 
-    cols = list(df_show.columns)
-    thead = "".join([f"<th>{_html.escape(str(c))}</th>" for c in cols])
+    rows: Optional[pd.Series] = None
+    for c in df_show.columns:
+        cell = df_show[c].astype(str)
+        if c != "操作":
+            cell = _escape_series(cell)
+        # “操作”列允许 HTML（链接）
+        cell = cell.mask(cell == "", "&nbsp;")
+        cls = "td-center" if c in center_cols else "td-left"
+        td = f'<td class="{cls}">' + cell + "</td>"
+        rows = td if rows is None else rows + td
+    return ("<tr>" + rows + "</tr>").tolist()
 
-    body_rows = []
-    for _, r in df_show.iterrows():
-        tds = []
-        for c in cols:
-            v = r.get(c, "")
-            if c == "操作":
-                # 允许 HTML（链接）
-                cell = str(v)
-            else:
-                cell = _html.escape(str(v))
-            cls = "td-center" if c in center_cols else "td-left"
-            tds.append(f'<td class="{cls}">{cell if cell else "&nbsp;"}</td>')
-        body_rows.append("<tr>" + "".join(tds) + "</tr>")
 
+def _table_html(cols: List[str], body_rows: List[str]) -> str:
+    thead = "".join([f"<th>{_html.escape(str(c))}</th>" for c in cols])
     return f"""
     <table class="nimr-table">
       <thead><tr>{thead}</tr></thead>
@@ -510,27 +2188,968 @@ def _render_table_html(df_show: pd.DataFrame, center_cols: Optional[set] = None)
     """
 
 
+@profiled("_render_table_html")
+def _render_table_html(df_show: pd.DataFrame, center_cols: Optional[set] = None) -> str:
+    return _table_html(list(df_show.columns), _table_row_fragments(df_show, center_cols))
+
+
+def list_columns(df: pd.DataFrame, id_col: str) -> List[str]:
+    """列表页展示的列（不含“操作”列）。"""
+    preferred = [id_col, "菌种命名", "属、种", "保藏日期", "菌种来源"]
+    show_cols = [c for c in preferred if c in df.columns]
+    if len(show_cols) < 3:
+        show_cols = list(df.columns[: min(5, len(df.columns))])
+    return show_cols
+
+
+def _build_display_frame(page_df: pd.DataFrame, show_cols: List[str], id_col: str) -> pd.DataFrame:
+    """列表页展示用的数据：截断长文本 + “查看”链接（向量化）。"""
+    page_df = catalog_display_frame(page_df)
+    display_df = pd.DataFrame(index=page_df.index)
+    for c in show_cols:
+        display_df[c] = short_text_series(page_df[c], 80 if c == "属、种" else 60)
+    rid = page_df[id_col].astype(str).str.strip()
+    links = '<a class="nimr-link" href="?id=' + _escape_series(rid) + '">查看</a>'
+    display_df["操作"] = links.where(rid != "", "-")
+    return display_df
+
+
+class RowHtmlCache:
+    """进程内共享的 LRU：键为 (工作簿特征, 行位置, 可见列)，值为该行的 <tr> 片段。各会话与后台线程都须持锁访问。"""
+
+    def __init__(self):
+        self.entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self.lock = threading.Lock()
+
+
+@st.cache_resource(show_spinner=False)
+def _row_html_cache() -> RowHtmlCache:
+    return RowHtmlCache()
+
+
+@profiled("render_rows_html")
+def render_rows_html(
+    df: pd.DataFrame,
+    positions: np.ndarray,
+    show_cols: List[str],
+    id_col: str,
+    center_cols: set,
+    fingerprint: str,
+) -> List[str]:
+    """
+    按行位置取 <tr> 片段：命中缓存的直接复用，未命中的行一次性向量化渲染后写入缓存。
+    翻页/同条件重跑时不会重复构建未变化的 HTML。
+    """
+    row_cache = _row_html_cache()
+    cols_key = tuple(show_cols)
+    keys = [(fingerprint, int(p), cols_key) for p in positions]
+
+    # 查找、补齐、提升与淘汰在同一把锁内完成，避免其他会话在中途淘汰本页的键
+    with row_cache.lock:
+        cache = row_cache.entries
+        missing = [i for i, k in enumerate(keys) if k not in cache]
+        if missing:
+            page_df = df.iloc[positions[missing]]
+            fragments = _table_row_fragments(_build_display_frame(page_df, show_cols, id_col), center_cols)
+            for i, frag in zip(missing, fragments):
+                cache[keys[i]] = frag
+
+        rows = []
+        for k in keys:
+            cache.move_to_end(k)
+            rows.append(cache[k])
+        while len(cache) > ROW_HTML_CACHE_SIZE:
+            cache.popitem(last=False)
+    if profile_enabled():
+        profile_note(cache=f"{len(keys) - len(missing)}/{len(keys)} 命中", rows=len(rows), bytes=sum(len(r) for r in rows))
+    return rows
+
+
+# ---------------------------
+# 存储后端：SQLite（可选，FTS5 三元组全文索引）
+# ---------------------------
+# memory：检索与分页在内存索引上完成（默认）；sqlite：字段检索、全字段检索、计数与分页改由 SQLite 完成
+STORAGE_BACKEND = os.environ.get("MRC_STORAGE_BACKEND", "memory").lower()
+STORE_ROOT = os.path.join(tempfile.gettempdir(), "_catalog_store")
+STORE_VERSION = 1
+STORE_CHUNK_ROWS = 5000  # 建库时每批写入的行数
+# 三元组分词：不足 3 个字符的查询词无法走全文索引，改为 instr 扫描
+_FTS_MIN_TERM = 3
+
+
+def _store_path(excel_path: str, fingerprint: str) -> str:
+    return os.path.join(STORE_ROOT, f"{_snapshot_prefix(excel_path)}{STORE_VERSION}_{fingerprint}.sqlite")
+
+
+def _sql_ident(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_value(v):
+    # sqlite3 只接受 Python 原生类型；缺失值存 NULL
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+def build_catalog_store(
+    df: pd.DataFrame,
+    search_cols: List[str],
+    id_col: str,
+    excel_path: str,
+    path: str,
+):
+    """
+    建库（写入临时文件后原子替换，建成后只读）：
+      records：各列展示值，_pos 为行位置（主键），_key 为归一化编号（B-tree 索引）；
+      catalog_search：各检索字段与全字段文本的小写形式，SQLite 支持时为 FTS5 trigram 虚表，否则为普通表。
+    全字段文本按批现算后写入，不在内存中保留整列。
+    """
+    os.makedirs(STORE_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=STORE_ROOT, suffix=".tmp")
+    os.close(fd)
+    fields = {c: f"c{i}" for i, c in enumerate(search_cols)}
+    names = ", ".join(list(fields.values()) + ["g"])
+    con = sqlite3.connect(tmp_path)
+    try:
+        cols = ", ".join(_sql_ident(c) for c in df.columns)
+        con.execute(f"CREATE TABLE records (_pos INTEGER PRIMARY KEY, _key TEXT, {cols})")
+        try:
+            con.execute(f"CREATE VIRTUAL TABLE catalog_search USING fts5({names}, tokenize='trigram')")
+            fts = True
+        except sqlite3.OperationalError:
+            # 未编译 FTS5 或版本过旧（trigram 需 3.34+）：普通表 + instr 扫描，结果相同
+            con.execute(f"CREATE TABLE catalog_search (_pos INTEGER PRIMARY KEY, {names})")
+            fts = False
+
+        marks = ", ".join("?" * (len(df.columns) + 2))
+        search_marks = ", ".join("?" * (len(fields) + 2))
+        keys = df[id_col].astype(str).str.strip()
+        for start in range(0, len(df), STORE_CHUNK_ROWS):
+            stop = min(start + STORE_CHUNK_ROWS, len(df))
+            chunk = catalog_display_frame(df.iloc[start:stop])
+            con.executemany(
+                f"INSERT INTO records VALUES ({marks})",
+                (
+                    (start + i, key, *[_sql_value(v) for v in row])
+                    for i, (key, row) in enumerate(zip(keys.iloc[start:stop], chunk.itertuples(index=False, name=None)))
+                ),
+            )
+            texts = [column_text(df[c].iloc[start:stop]).str.lower().tolist() for c in fields]
+            texts.append(build_search_text(df.iloc[start:stop]).astype(str).tolist())
+            con.executemany(
+                f"INSERT INTO catalog_search (rowid, {names}) VALUES ({search_marks})",
+                ((start + i, *vals) for i, vals in enumerate(zip(*texts))),
+            )
+        con.execute("CREATE INDEX records_key ON records (_key)")
+        con.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        con.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [("fts", "1" if fts else "0"), ("fields", json.dumps(fields, ensure_ascii=False)), ("rows", str(len(df)))],
+        )
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+
+    # 清理同一来源旧版本的库文件（已打开的旧连接不受影响）
+    prefix, current = _snapshot_prefix(excel_path), os.path.basename(path)
+    for name in os.listdir(STORE_ROOT):
+        if name.startswith(prefix) and name.endswith(".sqlite") and name != current:
+            try:
+                os.remove(os.path.join(STORE_ROOT, name))
+            except OSError:
+                continue
+
+
+class CatalogStore:
+    """
+    以只读、不可变方式打开的目录库：多个会话/进程可同时读同一文件，内存占用只有 SQLite 页缓存。
+    sqlite3 连接不能跨线程共享，每个线程各开一个连接。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        meta = dict(self._conn().execute("SELECT key, value FROM meta"))
+        self.fts = meta["fts"] == "1"
+        self.columns: Dict[str, str] = json.loads(meta["fields"])  # 检索字段 -> 库中列名
+        self.rows = int(meta["rows"])
+
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            uri = Path(self.path).resolve().as_uri() + "?mode=ro&immutable=1"
+            con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._local.con = con
+        return con
+
+    def _where(self, conditions: Dict[str, str], global_query: str) -> Tuple[str, list]:
+        """与内存索引相同的语义：字段条件为不区分大小写的子串，全字段检索按空白拆词、逐词 AND。"""
+        terms = [
+            (self.columns[col], str(v).strip().lower())
+            for col, v in conditions.items()
+            if col in self.columns and str(v or "").strip()
+        ]
+        terms += [("g", t) for t in normalize_search_text(global_query).split(" ") if t]
+
+        match, clauses, params = [], [], []
+        for col, t in terms:
+            if self.fts and len(t) >= _FTS_MIN_TERM:
+                match.append(f'{col} : "{t.replace(chr(34), chr(34) * 2)}"')
+            else:
+                clauses.append(f"instr({col}, ?) > 0")
+                params.append(t)
+        if match:
+            clauses.insert(0, "catalog_search MATCH ?")
+            params.insert(0, " AND ".join(match))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def filter_positions(self, conditions: Dict[str, str], global_query: str = "") -> np.ndarray:
+        where, params = self._where(conditions, global_query)
+        if not where:
+            return np.arange(self.rows, dtype=np.int64)
+        cur = self._conn().execute(f"SELECT rowid FROM catalog_search{where} ORDER BY rowid", params)
+        return np.fromiter((r[0] for r in cur), dtype=np.int64)
+
+    def count(self, conditions: Dict[str, str], global_query: str = "") -> int:
+        where, params = self._where(conditions, global_query)
+        if not where:
+            return self.rows
+        return self._conn().execute(f"SELECT count(*) FROM catalog_search{where}", params).fetchone()[0]
+
+    def page(self, conditions: Dict[str, str], global_query: str, offset: int, limit: int) -> pd.DataFrame:
+        """命中行中第 offset 行起的 limit 行（展示值），只从库中读取这一页。"""
+        where, params = self._where(conditions, global_query)
+        cur = self._conn().execute(
+            f"SELECT r.* FROM records r JOIN "
+            f"(SELECT rowid AS p FROM catalog_search{where} ORDER BY rowid LIMIT ? OFFSET ?) s "
+            f"ON r._pos = s.p ORDER BY r._pos",
+            params + [int(limit), int(offset)],
+        )
+        out = pd.DataFrame(cur.fetchall(), columns=[d[0] for d in cur.description])
+        return out.drop(columns=["_pos", "_key"])
+
+    def position_of(self, rid: str) -> Optional[int]:
+        """编号 -> 行位置（走 _key 索引）；编号重复时取首条，与 build_id_index 一致。"""
+        row = self._conn().execute("SELECT min(_pos) FROM records WHERE _key = ?", (str(rid).strip(),)).fetchone()
+        return row[0]
+
+
+# ---------------------------
+# 目录版本与热更新（后台监视文件特征 + 行级增量差异）
+# ---------------------------
+# 后台监视工作簿 mtime/size 的轮询间隔（秒）
+WATCH_INTERVAL_SEC = float(os.environ.get("MRC_WATCH_INTERVAL", "2"))
+
+# 每个目录版本缓存的检索结果（行位置数组）总长度上限，超出按最近使用淘汰
+FILTER_CACHE_MAX_POSITIONS = int(os.environ.get("MRC_FILTER_CACHE_POSITIONS", "2000000"))
+
+
+class CatalogVersion:
+    """
+    某一工作簿版本的数据及其派生索引；构建完成后不再修改，热更新时整体换成新对象。
+    由 LiveCatalog（cache_resource）持有，所有会话读同一个对象，不复制；数据来自内存映射的快照。
+    检索索引、编号索引与全字段文本首次使用时才构建；SQLite 后端下检索、计数、分页与编号查询
+    都走目录库，这些内存索引不再构建。
+    """
+
+    def __init__(
+        self,
+        excel_path: str,
+        fingerprint: str,
+        df: pd.DataFrame,
+        search_index: Optional[SearchIndex] = None,
+        id_index: Optional[Dict[str, int]] = None,
+        search_text: Optional[pd.Series] = None,
+        global_ngram_index: Optional[NgramIndex] = None,
+        locator: Optional[RowLocator] = None,
+    ):
+        self.excel_path = excel_path  # 单个工作簿路径，或联合目录来源
+        self.locator = locator
+        self.fingerprint = fingerprint
+        self.df = df
+        self.id_col = detect_id_col(df)
+        self.img_col = detect_image_col(df)
+        self.search_cols = [c for c in SEARCH_COLS if c in df.columns]
+        self._search_index = search_index
+        self._id_index = id_index
+        self._search_text = search_text
+        self._global_ngram_index = global_ngram_index
+        self._facets: Optional[FacetIndex] = None
+        self._fuzzy_index: Optional[FuzzyIndex] = None
+        self._image_tokens: Optional[List[str]] = None
+        self._image_resolvers: Dict[str, ImageTokenResolver] = {}
+        self._image_lock = threading.Lock()
+        # (列, 是否降序) -> (排序置换, 每行在该顺序中的名次)
+        self._sort_orders: Dict[Tuple[str, bool], Tuple[np.ndarray, np.ndarray]] = {}
+        self._store: Optional[CatalogStore] = None
+        self._store_failed = False
+        self._store_lock = threading.Lock()
+        # 检索条件 -> 命中行位置；随版本一起替换，热更新后自然失效
+        self._filter_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._filter_cache_size = 0
+        self._filter_lock = threading.Lock()
+
+    @property
+    def search_index(self) -> SearchIndex:
+        if self._search_index is None:
+            self._search_index = SearchIndex(self.df, self.search_cols)
+        return self._search_index
+
+    @property
+    def id_index(self) -> Dict[str, int]:
+        if self._id_index is None:
+            self._id_index = build_id_index(self.df, self.id_col)
+        return self._id_index
+
+    def position_of(self, rid: str) -> Optional[int]:
+        """编号 -> 行位置；编号重复时取首条。SQLite 后端查库，不构建内存编号索引。"""
+        store = self.store
+        if store is not None:
+            return store.position_of(rid)
+        return self.id_index.get(str(rid).strip())
+
+    @property
+    def search_text(self) -> pd.Series:
+        if self._search_text is None:
+            self._search_text = build_search_text(self.df)
+        return self._search_text
+
+    @property
+    def global_ngram_index(self) -> NgramIndex:
+        if self._global_ngram_index is None:
+            self._global_ngram_index = NgramIndex(self.search_text.astype(str).tolist())
+        return self._global_ngram_index
+
+    @property
+    def facets(self) -> FacetIndex:
+        # 构建只需 factorize + argsort，热更新后新版本直接重建
+        if self._facets is None:
+            self._facets = FacetIndex(self.df)
+        return self._facets
+
+    @property
+    def fuzzy_index(self) -> FuzzyIndex:
+        # 首次模糊检索时构建（含拼音转换），热更新后新版本重建
+        if self._fuzzy_index is None:
+            self._fuzzy_index = FuzzyIndex(self.df)
+        return self._fuzzy_index
+
+    @property
+    def sort_columns(self) -> List[str]:
+        cols = [c for c in SORT_COLS if c in self.df.columns]
+        return cols if self.id_col in cols else cols + [self.id_col]
+
+    def _sort_order(self, col: str, descending: bool) -> Tuple[np.ndarray, np.ndarray]:
+        # 每列首次排序时同时算出升/降两个方向；热更新后新版本重新计算
+        key = (col, descending)
+        if key not in self._sort_orders:
+            for desc, perm in zip((False, True), sort_permutations(self.df[col], SORT_COLS.get(col))):
+                rank = np.empty(len(perm), dtype=np.int64)
+                rank[perm] = np.arange(len(perm))
+                self._sort_orders[(col, desc)] = (perm, rank)
+        return self._sort_orders[key]
+
+    def sorted_positions(self, positions: np.ndarray, col: str, descending: bool = False) -> np.ndarray:
+        """把命中行位置按 col 重排：只用缓存的排序置换/名次，不对 DataFrame 排序。"""
+        perm, rank = self._sort_order(col, descending)
+        if len(positions) * 8 >= len(perm):
+            # 命中行较多：沿整表置换挑出命中行（线性）
+            mask = np.zeros(len(perm), dtype=bool)
+            mask[positions] = True
+            return perm[mask[perm]]
+        return positions[np.argsort(rank[positions])]
+
+    @property
+    def store(self) -> Optional[CatalogStore]:
+        """MRC_STORAGE_BACKEND=sqlite 时的目录库（每个文件特征建一次，多进程共用）；内存后端或建库失败时为 None。"""
+        if STORAGE_BACKEND != "sqlite" or self._store_failed:
+            return None
+        with self._store_lock:
+            if self._store is None and not self._store_failed:
+                path = _store_path(self.excel_path, self.fingerprint)
+                try:
+                    if not os.path.exists(path):
+                        build_catalog_store(self.df, self.search_cols, self.id_col, self.excel_path, path)
+                    self._store = CatalogStore(path)
+                except (OSError, sqlite3.Error):
+                    # 只读部署等：退回内存检索
+                    logger.exception("目录库不可用，改用内存检索：%s", path)
+                    self._store_failed = True
+        return self._store
+
+    @property
+    def image_tokens(self) -> List[str]:
+        """图片列中出现过的全部 token（去重，按不重复单元格拆分）。"""
+        if self._image_tokens is None:
+            tokens: Dict[str, None] = {}
+            if self.img_col:
+                for v in column_text(self.df[self.img_col]).unique():
+                    tokens.update(dict.fromkeys(split_image_tokens(v)))
+            self._image_tokens = list(tokens)
+        return self._image_tokens
+
+    def image_resolver(self, excel_path: str) -> ImageTokenResolver:
+        # 相对路径以工作簿所在目录为准：联合目录按来源目录各建一份
+        excel_dir = os.path.dirname(os.path.abspath(excel_path))
+        with self._image_lock:
+            resolver = self._image_resolvers.get(excel_dir)
+            if resolver is None:
+                resolver = ImageTokenResolver(self.image_tokens, excel_dir)
+                self._image_resolvers[excel_dir] = resolver
+        return resolver
+
+    def warm(self) -> Optional[threading.Thread]:
+        """加载/热更新后预热：SQLite 后端先建好目录库，再解析图片 token 并启动 URL 预取。"""
+        self.store
+        return self.warm_images()
+
+    def warm_images(self) -> Optional[threading.Thread]:
+        """加载时一次性解析图片列 token，并在后台把 URL 图片预取到本地缓存。"""
+        paths = [self.excel_path] if self.locator is None else [p for p, _ in self.locator.sources]
+        urls: Set[str] = set()
+        for path in dict.fromkeys(paths):
+            urls.update(self.image_resolver(path).urls())
+        return start_remote_prefetch(sorted(urls))
+
+    def filter_key(self, conditions: Dict[str, str], global_query: str = "", fuzzy_query: str = "") -> tuple:
+        """归一化后的检索条件：(((字段, 小写取值), …), 全字段查询, 模糊查询)，空条件与非检索列被去掉。"""
+        fields = tuple(sorted(
+            (col, str(v).strip().lower())
+            for col, v in conditions.items()
+            if col in self.search_cols and str(v or "").strip()
+        ))
+        return fields, normalize_search_text(global_query), normalize_search_text(fuzzy_query)
+
+    def filter_positions(self, conditions: Dict[str, str], global_query: str = "", fuzzy_query: str = "") -> np.ndarray:
+        """
+        字段检索 + 全字段检索 + 模糊检索的命中行位置（只读数组）。无模糊检索时为升序 iloc 位置，
+        有模糊检索时按相似度排序。结果按归一化后的条件缓存：翻页、来回切换页码只切片该数组，不再重复检索。
+        """
+        key = self.filter_key(conditions, global_query, fuzzy_query)
+        fields = key[0]
+        with self._filter_lock:
+            positions = self._filter_cache.get(key)
+            if positions is not None:
+                self._filter_cache.move_to_end(key)
+                profile_note(cache="hit")
+                return positions
+
+        profile_note(cache="miss")
+        store = self.store
+        if store is not None:
+            positions = store.filter_positions(dict(fields), key[1])
+        else:
+            positions = self.search_index.filter(dict(fields))
+        if key[1] and len(positions) and store is None:
+            ngram_index = self.global_ngram_index if GLOBAL_SEARCH_NGRAM else None
+            mask = build_global_search_mask(self.df, key[1], self.search_text, ngram_index)
+            positions = positions[mask.to_numpy()[positions]]
+        if key[2] and len(positions):
+            ranked = self.fuzzy_index.search(key[2])
+            positions = ranked[np.isin(ranked, positions, assume_unique=True)]
+        positions.setflags(write=False)
+
+        with self._filter_lock:
+            if key not in self._filter_cache:
+                self._filter_cache[key] = positions
+                self._filter_cache_size += len(positions)
+            while self._filter_cache_size > FILTER_CACHE_MAX_POSITIONS and len(self._filter_cache) > 1:
+                _, evicted = self._filter_cache.popitem(last=False)
+                self._filter_cache_size -= len(evicted)
+        return positions
+
+    def images_for(self, pos: int) -> List[str]:
+        """第 pos 行（iloc）的图片；联合目录中的行回到其源工作簿/工作表取嵌入图片。"""
+        df_row_index = int(self.df.index[pos])
+        if self.locator is None:
+            return get_images_for_record(
+                self.df, self.excel_path, df_row_index, self.img_col, resolver=self.image_resolver(self.excel_path)
+            )
+        path, sheet, excel_row = self.locator.locate(pos)
+        return get_images_for_record(
+            self.df, path, df_row_index, self.img_col, sheet, excel_row, resolver=self.image_resolver(path)
+        )
+
+
+class CatalogDiff:
+    """两个版本之间按编号的行级差异。old_to_new：旧行位置 -> 新行位置（-1 表示删除或已修改）。"""
+
+    def __init__(self, added: List[str], removed: List[str], changed: List[str],
+                 old_to_new: np.ndarray, new_to_old: np.ndarray, dirty: np.ndarray):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.old_to_new = old_to_new
+        self.new_to_old = new_to_old
+        self.dirty = dirty  # 新版本中需要重新建索引的行位置（新增 + 修改）
+
+    def summary(self) -> str:
+        return f"新增 {len(self.added)} 条，删除 {len(self.removed)} 条，修改 {len(self.changed)} 条"
+
+
+def _row_keys(df: pd.DataFrame, id_col: str) -> pd.Index:
+    # 编号 + 同编号内序号，保证重复编号也能一一对应
+    ids = df[id_col].astype(str).str.strip()
+    return pd.Index(ids + "\x00" + ids.groupby(ids).cumcount().astype(str))
+
+
+def diff_catalog_rows(old_df: pd.DataFrame, new_df: pd.DataFrame, id_col: str) -> CatalogDiff:
+    """按编号对齐两版数据，用整行哈希判断是否修改（向量化，不逐格比较）。"""
+    old_keys = _row_keys(old_df, id_col)
+    new_keys = _row_keys(new_df, id_col)
+    old_hash = pd.util.hash_pandas_object(old_df, index=False).to_numpy()
+    new_hash = pd.util.hash_pandas_object(new_df, index=False).to_numpy()
+
+    new_to_old = old_keys.get_indexer(new_keys)
+    matched = new_to_old >= 0
+    same = np.zeros(len(new_df), dtype=bool)
+    same[matched] = old_hash[new_to_old[matched]] == new_hash[matched]
+
+    old_to_new = np.full(len(old_df), -1, dtype=np.int64)
+    old_to_new[new_to_old[same]] = np.flatnonzero(same)
+    removed_mask = new_keys.get_indexer(old_keys) < 0
+
+    new_ids = new_df[id_col].astype(str).str.strip().to_numpy()
+    old_ids = old_df[id_col].astype(str).str.strip().to_numpy()
+    return CatalogDiff(
+        added=new_ids[~matched].tolist(),
+        removed=old_ids[removed_mask].tolist(),
+        changed=new_ids[matched & ~same].tolist(),
+        old_to_new=old_to_new,
+        new_to_old=np.where(same, new_to_old, -1),
+        dirty=np.flatnonzero(~same),
+    )
+
+
+def patch_catalog_version(
+    old: CatalogVersion,
+    new_df: pd.DataFrame,
+    fingerprint: str,
+    diff: CatalogDiff,
+    locator: Optional[RowLocator] = None,
+) -> CatalogVersion:
+    """在旧版本索引的基础上增量得到新版本：只为新增/修改的行重新切分和渲染。"""
+    dirty = diff.dirty
+    # 旧版本上未构建的索引（如 SQLite 后端）新版本也不构建，留到首次使用
+    search_index = None
+    if old._search_index is not None:
+        search_index = old._search_index.patched(new_df, diff.old_to_new, dirty)
+
+    id_col = old.id_col
+    new_ids = new_df[id_col].astype(str).str.strip()
+    if old._id_index is None or new_ids.duplicated().any():
+        id_index = None  # 存在重复编号时“取首条”的语义依赖顺序，直接重建
+    else:
+        id_index = {k: int(diff.old_to_new[p]) for k, p in old._id_index.items() if diff.old_to_new[p] >= 0}
+        for i in dirty.tolist():
+            id_index[new_ids.iat[i]] = i
+
+    search_text = None
+    global_ngram_index = None
+    if old._search_text is not None:
+        taken = old._search_text.array.take(diff.new_to_old, allow_fill=True)
+        search_text = pd.Series(taken, index=new_df.index)
+        if len(dirty):
+            search_text.iloc[dirty] = build_search_text(new_df.iloc[dirty]).array
+        if old._global_ngram_index is not None:
+            global_ngram_index = old._global_ngram_index.patched(search_text.astype(str).tolist(), diff.old_to_new, dirty)
+
+    # 未变化行的已渲染 HTML 片段迁移到新版本，避免翻页时整体重建
+    row_cache = _row_html_cache()
+    with row_cache.lock:
+        cache = row_cache.entries
+        for key in [k for k in cache if k[0] == old.fingerprint]:
+            frag = cache.pop(key)
+            pos = int(diff.old_to_new[key[1]])
+            if pos >= 0:
+                cache[(fingerprint, pos, key[2])] = frag
+
+    return CatalogVersion(
+        old.excel_path, fingerprint, new_df, search_index, id_index, search_text, global_ngram_index, locator
+    )
+
+
+class LiveCatalog:
+    """
+    持有当前目录版本，后台线程轮询工作簿 mtime/size。发现变化后重新解析、计算行级差异，
+    并在旧版本索引上增量修补出新版本，最后整体替换引用（读者拿到的始终是完整的某一版本）。
+    嵌入图片按内容摘要存放，未变化的图片不会重新解码；锚点索引按新特征重新读取（不解码图片）。
+    """
+
+    def __init__(
+        self,
+        excel_path: str,
+        watch: bool = True,
+        interval: float = WATCH_INTERVAL_SEC,
+        sheets: Optional[List[str]] = None,
+    ):
+        # excel_path 为目录/通配符/多个路径，或指定了工作表时，按联合目录加载
+        self.excel_path = excel_path
+        self.sheets = sheets
+        self.federated = sheets is not None or not os.path.isfile(excel_path)
+        self.interval = interval
+        self.last_diff: Optional[CatalogDiff] = None
+        self._failed_fingerprint: Optional[str] = None  # 最近一次更新失败时的文件特征（同一特征只记一次日志）
+        self._lock = threading.Lock()
+        fingerprint = self._fingerprint()
+        df, locator = self._read()
+        self._version = CatalogVersion(excel_path, fingerprint, df, locator=locator)
+        self._version.warm()
+        if watch:
+            threading.Thread(target=self._watch, name="catalog-watcher", daemon=True).start()
+
+    @property
+    def version(self) -> CatalogVersion:
+        return self._version
+
+    def _fingerprint(self) -> str:
+        if not self.federated:
+            return excel_fingerprint(self.excel_path)
+        return federated_fingerprint(resolve_catalog_sources(self.excel_path), self.sheets)
+
+    def _read(self) -> Tuple[pd.DataFrame, Optional[RowLocator]]:
+        if not self.federated:
+            return read_catalog_frame(self.excel_path, excel_fingerprint(self.excel_path)), None
+        return load_federated_catalog(resolve_catalog_sources(self.excel_path), self.sheets)
+
+    def refresh(self) -> Optional[CatalogDiff]:
+        """
+        文件特征变化时更新到新版本并返回差异；未变化返回 None。
+        工作簿正在替换（未写完的 xlsx 等）导致解析失败时记录日志、继续提供当前版本，下一次轮询再试。
+        """
+        try:
+            fingerprint = self._fingerprint()
+        except OSError:
+            return None
+        if fingerprint == self._version.fingerprint:
+            return None
+
+        with self._lock:
+            if fingerprint == self._version.fingerprint:
+                return None
+            try:
+                diff = self._update(fingerprint)
+            except Exception:
+                if fingerprint != self._failed_fingerprint:
+                    logger.exception("目录热更新失败，继续使用当前版本，稍后重试：%s", self.excel_path)
+                self._failed_fingerprint = fingerprint
+                return None
+            self._failed_fingerprint = None
+            return diff
+
+    def _update(self, fingerprint: str) -> Optional[CatalogDiff]:
+        # 调用方持有 self._lock；新版本完整构建后才替换引用，中途失败时 self._version 不变
+        old = self._version
+        new_df, locator = self._read()
+
+        if list(new_df.columns) != list(old.df.columns) or detect_id_col(new_df) != old.id_col:
+            # 表结构变化：无法按行对齐，整体重建
+            self._version = CatalogVersion(self.excel_path, fingerprint, new_df, locator=locator)
+            self._version.warm()
+            self.last_diff = None
+            logger.info("目录表结构已变化，已完整重建：%s", self.excel_path)
+            return None
+
+        diff = diff_catalog_rows(old.df, new_df, old.id_col)
+        self._version = patch_catalog_version(old, new_df, fingerprint, diff, locator)
+        self._version.warm()
+        self.last_diff = diff
+        logger.info("目录已更新（%s）：%s", fingerprint, diff.summary())
+        return diff
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            self.refresh()
+
+
+@st.cache_resource(show_spinner=False)
+def get_live_catalog(excel_path: str, sheets: Optional[Tuple[str, ...]] = None) -> LiveCatalog:
+    profile_note(cache="miss")
+    return LiveCatalog(excel_path, sheets=list(sheets) if sheets else None)
+
+
+# ---------------------------
+# 批量导出（CSV / xlsx / 菌种数据单 docx）
+# ---------------------------
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "_catalog_exports")
+EXPORT_FORMATS = {
+    "csv": "CSV",
+    "xlsx": "Excel（xlsx）",
+    "docx": "菌种数据单（每株一个 docx，zip 打包）",
+}
+EXPORT_CHUNK_ROWS = 2000  # 每次只物化这么多行，导出上万条时内存仍有界
+# 导出文件在下载按钮读取后即删除；会话中途关闭而遗留的文件超过该时长（秒）后清理
+EXPORT_MAX_AGE_SEC = float(os.environ.get("MRC_EXPORT_MAX_AGE_SEC", "3600"))
+EXPORT_IMAGE_WIDTH_CM = 12.0
+# python-docx 可直接嵌入的图片格式；其他格式（如 webp 派生图）临时转为 JPEG
+_DOCX_IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff"}
+
+
+class ExportJob:
+    """后台导出任务：工作线程写文件并累加 done，页面据此显示进度。"""
+
+    def __init__(self, fmt: str, total: int):
+        self.fmt = fmt
+        self.total = total
+        self.done = 0
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self.finished = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if self.total == 0 else min(1.0, self.done / self.total)
+
+
+def _export_chunks(positions: np.ndarray):
+    for start in range(0, len(positions), EXPORT_CHUNK_ROWS):
+        yield positions[start:start + EXPORT_CHUNK_ROWS]
+
+
+def _export_csv(cat: CatalogVersion, positions: np.ndarray, path: str, job: ExportJob):
+    # utf-8-sig：Excel 直接打开不乱码
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        cat.df.iloc[:0].to_csv(f, index=False)
+        for chunk in _export_chunks(positions):
+            catalog_display_frame(cat.df.iloc[chunk]).to_csv(f, index=False, header=False)
+            job.done += len(chunk)
+
+
+def _xlsx_value(v):
+    if isinstance(v, str):
+        return ILLEGAL_CHARACTERS_RE.sub("", v)
+    return v
+
+
+def _export_xlsx(cat: CatalogVersion, positions: np.ndarray, path: str, job: ExportJob):
+    # write_only 模式逐行落盘，不在内存中保留单元格对象
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("资源目录")
+    ws.append([str(c) for c in cat.df.columns])
+    for chunk in _export_chunks(positions):
+        for row in catalog_display_frame(cat.df.iloc[chunk]).itertuples(index=False, name=None):
+            ws.append([_xlsx_value(v) for v in row])
+        job.done += len(chunk)
+    wb.save(path)
+
+
+def _docx_image_stream(src: str) -> Optional[BytesIO]:
+    """优先取详情页同款 display 派生图；docx 不支持的格式转 JPEG 到内存。"""
+    path = get_image_derivatives(src).get("display", src)
+    try:
+        if os.path.splitext(path)[1].lower() in _DOCX_IMAGE_EXTS:
+            with open(path, "rb") as f:
+                return BytesIO(f.read())
+        with Image.open(path) as im:
+            buf = BytesIO()
+            im.convert("RGB").save(buf, format="JPEG", quality=DERIVATIVE_QUALITY)
+            buf.seek(0)
+            return buf
+    except Exception:
+        return None
+
+
+def build_strain_docx(cat: CatalogVersion, pos: int) -> bytes:
+    """单株菌种数据单：基本信息表 + 菌种照片。"""
+    row = catalog_display_frame(cat.df.iloc[[pos]]).iloc[0]
+    rid = str(row[cat.id_col]).strip()
+    doc = Document()
+    doc.add_heading(f"菌种数据单：{rid}", level=1)
+
+    fields = [(str(k), str(v).strip()) for k, v in row.items() if k != cat.img_col and str(v).strip()]
+    table = doc.add_table(rows=0, cols=2)
+    table.style = "Table Grid"
+    for k, v in fields:
+        cells = table.add_row().cells
+        cells[0].text = k
+        cells[1].text = v
+
+    images = cat.images_for(pos) if cat.img_col else []
+    if images:
+        doc.add_heading("菌种照片", level=2)
+    for src in images:
+        if re.match(r"^https?://", src, re.IGNORECASE):
+            doc.add_paragraph(src)
+            continue
+        stream = _docx_image_stream(src)
+        if stream is None:
+            doc.add_paragraph(f"（图片无法读取：{os.path.basename(src)}）")
+            continue
+        doc.add_picture(stream, width=Cm(EXPORT_IMAGE_WIDTH_CM))
+
+    buf = BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def _export_docx(cat: CatalogVersion, positions: np.ndarray, path: str, job: ExportJob):
+    # 每株生成后立即写入 zip 并释放；docx 本身已压缩，zip 只做存储
+    used = set()
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for pos in positions:
+            rid = str(cat.df.iloc[pos][cat.id_col]).strip() or f"row{int(pos) + 1}"
+            name = re.sub(r'[\\/:*?"<>|\s]+', "_", rid)
+            stem, k = name, 1
+            while name in used:
+                k += 1
+                name = f"{stem}_{k}"
+            used.add(name)
+            zf.writestr(f"{name}.docx", build_strain_docx(cat, int(pos)))
+            job.done += 1
+
+
+_EXPORTERS = {
+    "csv": (_export_csv, ".csv"),
+    "xlsx": (_export_xlsx, ".xlsx"),
+    "docx": (_export_docx, ".zip"),
+}
+
+
+def sweep_exports(max_age: float = EXPORT_MAX_AGE_SEC):
+    """删除导出目录中超过 max_age 秒的文件（未被下载的遗留导出、中断留下的临时文件）。"""
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(EXPORT_DIR)
+    except OSError:
+        return
+    for name in names:
+        p = os.path.join(EXPORT_DIR, name)
+        try:
+            if os.path.getmtime(p) < cutoff:
+                os.remove(p)
+        except OSError:
+            continue
+
+
+def export_catalog(cat: CatalogVersion, positions: np.ndarray, fmt: str, job: Optional[ExportJob] = None) -> str:
+    """把 positions 指定的行导出为 fmt，返回文件路径。先写临时文件再改名，失败不留半成品。"""
+    exporter, ext = _EXPORTERS[fmt]
+    job = job or ExportJob(fmt, len(positions))
+    sweep_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prefix = f"资源目录导出_{time.strftime('%Y%m%d_%H%M%S')}_"
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_DIR, prefix=prefix, suffix=ext + ".tmp")
+    os.close(fd)
+    path = tmp[: -len(".tmp")]
+    try:
+        exporter(cat, np.asarray(positions), tmp, job)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+@st.cache_resource(show_spinner=False)
+def _export_executor() -> cf.ThreadPoolExecutor:
+    # 进程内共享；导出多为 I/O 与压缩，两个线程足够且不挤占页面渲染
+    return cf.ThreadPoolExecutor(max_workers=2, thread_name_prefix="catalog-export")
+
+
+def start_export(cat: CatalogVersion, positions: np.ndarray, fmt: str) -> ExportJob:
+    """在后台线程中导出，立即返回任务对象。"""
+    job = ExportJob(fmt, len(positions))
+
+    def run():
+        try:
+            job.path = export_catalog(cat, positions, fmt, job)
+        except Exception as e:
+            logger.exception("导出失败")
+            job.error = str(e)
+        finally:
+            job.finished.set()
+
+    _export_executor().submit(run)
+    return job
+
+
+def _export_status(polling: bool):
+    job: Optional[ExportJob] = st.session_state.get("export_job")
+    if job is None:
+        return
+    if not job.finished.is_set():
+        st.progress(job.progress, text=f"正在导出 {EXPORT_FORMATS[job.fmt]}：{job.done} / {job.total}")
+    elif polling:
+        # 任务刚结束：整页重跑一次，停止轮询并刷新“开始导出”按钮
+        st.rerun()
+    elif job.error:
+        st.error(f"导出失败：{job.error}")
+    else:
+        # 文件留在磁盘上，按钮直接读文件句柄，会话状态里不保存文件内容
+        try:
+            f = open(job.path, "rb")
+        except OSError:
+            st.info("导出文件已过期，请重新导出。")
+            return
+        with f:
+            st.download_button(
+                f"下载导出文件（{job.total} 条）",
+                data=f,
+                file_name=os.path.basename(job.path),
+                key="export_download",
+                on_click=_export_downloaded,
+                args=(job,),
+            )
+
+
+def _export_downloaded(job: ExportJob):
+    """下载后删除导出文件并结束任务；未点击下载的文件由 sweep_exports 按时限清理。"""
+    try:
+        os.remove(job.path)
+    except OSError:
+        pass
+    if st.session_state.get("export_job") is job:
+        del st.session_state["export_job"]
+
+
+def render_export_status():
+    job: Optional[ExportJob] = st.session_state.get("export_job")
+    polling = job is not None and not job.finished.is_set()
+    # 任务进行中时只按间隔刷新进度片段，不重跑整页
+    st.fragment(_export_status, run_every=0.5 if polling else None)(polling)
+
+
 # ---------------------------
 # 列表页
 # ---------------------------
-def render_list(df: pd.DataFrame, id_col: str):
+@profiled("render_list")
+def render_list(cat: CatalogVersion):
+    df = cat.df
     render_breadcrumb([("首页", False), ("资源目录", True)])
     st.markdown('<div class="nimr-section-title">微生物资源目录</div>', unsafe_allow_html=True)
 
-    # 固定每页 10 条
-    page_size = 10
-
     # 过滤器卡片
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("**菌种检索**")
 
+    # 检索框放在表单里：输入过程中不触发重跑，点“检索”或回车时所有条件一次提交，并回到第 1 页
+    form = st.form("search_form", border=False)
+    global_query = form.text_input(
+        "全字段检索",
+        value="",
+        placeholder="在所有字段中检索，多个关键词用空格分隔（需同时命中）",
+        key="search_global",
+    )
+
+    fuzzy_query = form.text_input(
+        "模糊检索",
+        value="",
+        placeholder="菌种命名 / 属、种，容许拼写误差" + ("，支持拼音（如 kucao）" if lazy_pinyin is not None else "") + "，按相似度排序",
+        key="search_fuzzy",
+    )
+
     # 选择特定字段作为检索条件
-    search_cols = ["菌种编号", "菌种命名", "菌种来源", "申请人"]
-    search_cols = [col for col in search_cols if col in df.columns]
+    search_cols = [col for col in SEARCH_COLS if col in df.columns]
 
     search_conditions = {}
 
-    cols = st.columns(2, gap="large")
+    cols = form.columns(2, gap="large")
     for i, col in enumerate(search_cols):
         with cols[i % 2]:
             search_conditions[col] = st.text_input(
@@ -539,79 +3158,194 @@ def render_list(df: pd.DataFrame, id_col: str):
                 placeholder=f"输入{col}关键词",
                 key=f"search_{col}",
             )
+    form.form_submit_button("检索", type="primary", on_click=_go_page, args=(1,))
+
+    # 倒排索引求候选行位置，只取命中行，不再逐字段全表扫描
+    # 结果按条件缓存在目录版本上，翻页只对缓存的位置数组切片
+    with profile_span("filter") as span:
+        matched = cat.filter_positions(search_conditions, global_query, fuzzy_query)
+        positions = render_facets(cat, matched)
+        span.update(rows=len(positions), note=f"共 {len(df)} 行")
+    st.markdown("</div>", unsafe_allow_html=True)
 
-    filtered = df.copy()
-    for col, value in search_conditions.items():
-        if value.strip():
-            filtered = filtered[filtered[col].astype(str).str.contains(value.strip(), case=False, na=False)]
+    total = len(positions)
+    st.markdown('<div class="table-wrap">', unsafe_allow_html=True)
+    # SQLite 后端且未做模糊检索/分类筛选时，命中行即目录库的检索结果：计数与分页交给目录库
+    fields, query, fuzzy = cat.filter_key(search_conditions, global_query, fuzzy_query)
+    store_query = (dict(fields), query) if cat.store is not None and not fuzzy and positions is matched else None
+    render_results(cat, positions, store_query)
+    positions = apply_sort(cat, positions)  # 导出与页面顺序一致
+
+    # 批量导出当前检索结果（全部命中行，不限当前页）
+    with st.expander(f"批量导出当前结果（{total} 条）"):
+        e1, e2 = st.columns([3, 1], gap="small", vertical_alignment="bottom")
+        with e1:
+            fmt = st.selectbox(
+                "导出格式", list(EXPORT_FORMATS), format_func=EXPORT_FORMATS.get, key="export_format"
+            )
+        with e2:
+            job = st.session_state.get("export_job")
+            running = job is not None and not job.finished.is_set()
+            if st.button("开始导出", use_container_width=True, disabled=(total == 0 or running)):
+                st.session_state.export_job = start_export(cat, positions, fmt)
+        render_export_status()
 
-    filtered = filtered.reset_index(drop=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
-    total = len(filtered)
-    total_pages = max(1, math.ceil(total / page_size))
-    ensure_pagination_state(total_pages)
 
-    st.markdown('<div class="table-wrap">', unsafe_allow_html=True)
+def _go_page(page: int):
+    st.session_state.page = page
 
-    start = (st.session_state.page - 1) * page_size
-    end = start + page_size
-    page_df = filtered.iloc[start:end].copy()
 
-    preferred = [id_col, "菌种命名", "属、种", "保藏日期", "菌种来源"]
-    show_cols = [c for c in preferred if c in page_df.columns]
-    if len(show_cols) < 3:
-        show_cols = list(page_df.columns[: min(5, len(page_df.columns))])
+def _sort_label(spec: str) -> str:
+    if not spec:
+        return "默认顺序"
+    col, order = spec.rsplit("|", 1)
+    asc, desc = _SORT_DIRECTIONS.get(col, ("升序", "降序"))
+    return f"{col}（{desc if order == 'desc' else asc}）"
 
-    view_links = []
-    for _, r in page_df.iterrows():
-        rid = str(r.get(id_col, "")).strip()
-        view_links.append(f'<a class="nimr-link" href="?id={_html.escape(rid)}">查看</a>' if rid else "-")
-    page_df["操作"] = view_links
 
-    display_df = page_df[show_cols + ["操作"]].copy()
-    for c in show_cols:
-        display_df[c] = display_df[c].map(lambda x: short_text(x, 80 if c == "属、种" else 60))
+def apply_sort(cat: CatalogVersion, positions: np.ndarray) -> np.ndarray:
+    """按会话中选择的排序重排命中行；未选择时保持检索结果的顺序（工作簿顺序或模糊检索相似度）。"""
+    spec = st.session_state.get("sort_by", "")
+    if not spec:
+        return positions
+    col, order = spec.rsplit("|", 1)
+    if col not in cat.sort_columns:
+        return positions
+    with profile_span("sort", col=col, rows=len(positions)):
+        return cat.sorted_positions(positions, col, order == "desc")
+
+
+@st.fragment
+def render_results(
+    cat: CatalogVersion, positions: np.ndarray, store_query: Optional[Tuple[Dict[str, str], str]] = None
+):
+    """
+    结果表格 + 分页器。翻页、改每页条数只重跑本片段：页头/CSS、目录加载与检索都不重新执行，
+    命中行位置沿用上次整页运行传入的 positions，只切片渲染当前页。
+    给出 store_query（归一化的字段条件与全字段查询）且未排序时，计数与当前页直接从目录库读取。
+    """
+    # 片段单独重跑时 main() 不执行：开启埋点时在这里单独记一次
+    standalone = not profile_enabled() and st.session_state.get("profile_on", False)
+    if standalone:
+        profile_begin(True)
+
+    df, id_col, fingerprint = cat.df, cat.id_col, cat.fingerprint
+    # 排序：命中行位置按缓存的排序名次重排，改排序后回到第 1 页
+    sort_options = [""] + [f"{c}|{d}" for c in cat.sort_columns for d in ("asc", "desc")]
+    if st.session_state.get("sort_by", "") not in sort_options:
+        st.session_state.sort_by = ""
+    st.selectbox("排序", sort_options, format_func=_sort_label, key="sort_by", on_change=_go_page, args=(1,))
+    sorted_positions = apply_sort(cat, positions)
+    store = cat.store if store_query is not None and sorted_positions is positions else None
+    positions = sorted_positions
+
+    # 每页条数（默认 10 条，可选更大页）
+    page_size = int(st.session_state.get("page_size", PAGE_SIZE_OPTIONS[0]))
+    total = store.count(*store_query) if store is not None else len(positions)
+    total_pages = max(1, math.ceil(total / page_size))
+    ensure_pagination_state(total_pages)
+    page = st.session_state.page
+
+    start = (page - 1) * page_size
+    end = start + page_size
+    page_positions = positions[start:end]
 
+    show_cols = list_columns(df, id_col)
     center_cols = {id_col, "保藏日期", "操作"}
-    table_html = _render_table_html(display_df, center_cols=center_cols)
-    st.markdown(table_html, unsafe_allow_html=True)
+    with profile_span("render_results", rows=len(page_positions)):
+        if store is not None:
+            page_df = store.page(*store_query, start, page_size)
+            body_rows = _table_row_fragments(_build_display_frame(page_df, show_cols, id_col), center_cols)
+        else:
+            body_rows = render_rows_html(df, page_positions, show_cols, id_col, center_cols, fingerprint)
+        table_html = _table_html(show_cols + ["操作"], body_rows)
+        st.markdown(table_html, unsafe_allow_html=True)
 
+    # 按钮回调里改页码：点击后本片段重跑时已是新页，无需 st.rerun()
     b1, b2, b3, b4 = st.columns([1, 1, 1, 1], gap="small", vertical_alignment="center")
     with b1:
-        if st.button("⏮ 首页", use_container_width=True, disabled=(st.session_state.page == 1)):
-            st.session_state.page = 1
-            st.rerun()
+        st.button("⏮ 首页", use_container_width=True, disabled=(page == 1), on_click=_go_page, args=(1,))
     with b2:
-        if st.button("◀ 上一页", use_container_width=True, disabled=(st.session_state.page == 1)):
-            st.session_state.page -= 1
-            st.rerun()
+        st.button("◀ 上一页", use_container_width=True, disabled=(page == 1), on_click=_go_page, args=(page - 1,))
     with b3:
-        if st.button("下一页 ▶", use_container_width=True, disabled=(st.session_state.page >= total_pages)):
-            st.session_state.page += 1
-            st.rerun()
+        st.button(
+            "下一页 ▶", use_container_width=True, disabled=(page >= total_pages), on_click=_go_page, args=(page + 1,)
+        )
     with b4:
-        if st.button("末页 ⏭", use_container_width=True, disabled=(st.session_state.page >= total_pages)):
-            st.session_state.page = total_pages
-            st.rerun()
+        st.button(
+            "末页 ⏭", use_container_width=True, disabled=(page >= total_pages), on_click=_go_page, args=(total_pages,)
+        )
 
     st.markdown(
         f"""
         <div class="pager">
           <div class="pill">共 {total} 条记录</div>
-          <div class="pill">第 {st.session_state.page} / {total_pages} 页（当前显示 {start+1 if total>0 else 0}-{min(end,total)}）</div>
+          <div class="pill">第 {page} / {total_pages} 页（当前显示 {start+1 if total>0 else 0}-{min(end,total)}）</div>
         </div>
         """,
         unsafe_allow_html=True,
     )
 
-    st.markdown("</div>", unsafe_allow_html=True)
+    st.selectbox("每页显示条数", PAGE_SIZE_OPTIONS, key="page_size")
+
+    if standalone:
+        render_profile_panel(profile_end("list_results"))
+
+
+def render_facets(cat: CatalogVersion, positions: np.ndarray) -> np.ndarray:
+    """分面筛选控件（带实时计数），返回在文本检索结果上进一步收窄后的行位置。"""
+    facets = cat.facets
+    if not facets.facets and facets.date is None:
+        return positions
+
+    # 先按会话中已有的选择算计数，再渲染控件（控件取值即这些选择）
+    selections: Dict[str, List[str]] = {}
+    for name, facet in facets.facets.items():
+        key = f"facet_{name}"
+        # 目录更新后已不存在的取值从选择中去掉，避免控件报错
+        selected = [v for v in st.session_state.get(key, []) if v in facet.postings]
+        st.session_state[key] = selected
+        selections[name] = selected
+
+    date_range = None
+    d = facets.date
+    has_slider = d is not None and d.min is not None and d.min < d.max
+    if has_slider:
+        lo, hi = st.session_state.get("facet_date", (d.min, d.max))
+        lo, hi = max(lo, d.min), min(hi, d.max)
+        st.session_state.facet_date = (lo, hi)
+        # 滑块在全范围时不过滤（无日期的记录也保留）
+        if (lo, hi) != (d.min, d.max):
+            date_range = (lo, hi)
+
+    counts = facets.counts(positions, selections, date_range)
+
+    st.markdown("**分类筛选**")
+    cols = st.columns(2, gap="large")
+    for i, (name, facet) in enumerate(facets.facets.items()):
+        c = counts[name]
+        with cols[i % 2]:
+            st.multiselect(
+                name,
+                facet.options,
+                format_func=lambda v, c=c: f"{v}（{c.get(v, 0)}）",
+                placeholder=f"全部{name}",
+                key=f"facet_{name}",
+            )
+    if has_slider:
+        st.slider(f"{DATE_FACET_COL}区间", min_value=d.min, max_value=d.max, format="YYYY-MM-DD", key="facet_date")
+
+    return facets.apply(positions, selections, date_range)
 
 
 # ---------------------------
 # 详情页（左：KV；右：图片固定区）
 # ---------------------------
-def render_detail(df: pd.DataFrame, id_col: str, rid: str, excel_path: str):
+@profiled("render_detail")
+def render_detail(cat: CatalogVersion, rid: str):
+    df, id_col = cat.df, cat.id_col
     render_breadcrumb([("首页", False), ("资源目录", False), (f"详情：{rid}", True)])
 
     st.markdown(
@@ -627,16 +3361,15 @@ def render_detail(df: pd.DataFrame, id_col: str, rid: str, excel_path: str):
         unsafe_allow_html=True,
     )
 
-    hit = df[df[id_col].astype(str).str.strip() == rid.strip()]
-    if hit.empty:
+    pos = cat.position_of(rid)
+    if pos is None:
         st.warning(f"未找到记录：{id_col} = {rid}")
         return
 
-    df_row_index = int(hit.index[0])
-    row = hit.iloc[0].to_dict()
+    row = catalog_display_frame(df.iloc[[pos]]).iloc[0].to_dict()
 
-    img_col = detect_image_col(df)
-    images = get_images_for_record(df, excel_path, df_row_index, img_col)
+    img_col = cat.img_col
+    images = cat.images_for(pos)
 
     left, right = st.columns([1.85, 1.0], gap="large", vertical_alignment="top")
 
@@ -652,11 +3385,25 @@ def render_detail(df: pd.DataFrame, id_col: str, rid: str, excel_path: str):
         st.markdown("**菌种图片**")
 
         if images:
-            for p in images:
+            for i, p in enumerate(images):
+                # 默认展示压缩后的展示图，原图通过下载按钮/链接获取
+                derivs = get_image_derivatives(p)
                 try:
-                    st.image(p, use_container_width=True)
+                    with profile_span("st.image") as span:
+                        st.image(derivs.get("display", p), use_container_width=True)
+                        if profile_enabled() and "display" in derivs:
+                            span["bytes"] = os.path.getsize(derivs["display"])
                 except Exception:
                     st.warning(f"无法加载图片：{p}")
+                    continue
+                if p.lower().startswith(("http://", "https://")):
+                    st.markdown(f'<a class="nimr-link" href="{_html.escape(p)}" target="_blank">查看原图</a>', unsafe_allow_html=True)
+                elif "display" in derivs:
+                    try:
+                        with open(p, "rb") as f:
+                            st.download_button("下载原图", f.read(), file_name=os.path.basename(p), key=f"orig_{i}")
+                    except OSError:
+                        pass
         else:
             st.info("未检测到图片：\n- 若 Excel 是“插入图片对象”，本程序会自动提取；\n- 若图片在列中以路径/URL存储，请确认可访问。")
 
@@ -693,17 +3440,31 @@ def _kv_html(columns: List[str], row: dict, exclude_cols: List[str] = []) -> str
 # 主程序
 # ---------------------------
 def main():
+    debug = "debug" in st.query_params and st.query_params.get("debug") not in ("0", "false")
+    st.session_state.profile_on = PROFILE_ENABLED or debug
+    profile_begin(st.session_state.profile_on)
     render_header()
 
-    excel_path = pick_excel_path()
-    df = load_excel(excel_path)
-    id_col = detect_id_col(df)
+    sheets = parse_sheet_list(CATALOG_SHEETS)
+    with profile_span("load_catalog", cache="hit") as span:
+        live = get_live_catalog(pick_catalog_source(), tuple(sheets) if sheets else None)
+        live.refresh()  # 本次重跑先同步检查一次（仅一次 os.stat），不必等后台轮询
+        cat = live.version
+        span["rows"] = len(cat.df)
+
+    # 会话期间目录被更新：提示一次差异摘要
+    seen = st.session_state.get("catalog_fp")
+    if seen and seen != cat.fingerprint and live.last_diff is not None:
+        st.toast(f"资源目录已更新：{live.last_diff.summary()}")
+    st.session_state.catalog_fp = cat.fingerprint
 
     rid = get_query_id()
     if rid:
-        render_detail(df, id_col, rid, excel_path)
+        render_detail(cat, rid)
     else:
-        render_list(df, id_col)
+        render_list(cat)
+
+    render_profile_panel(profile_end("detail" if rid else "list"))
 
 
 if __name__ == "__main__":
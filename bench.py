@@ -0,0 +1,479 @@
+# bench.py
+# 运行：python bench.py --sizes 1k,10k,100k --out bench_results/baseline.json
+#       python bench.py --sizes 1k,10k --out bench_results/new.json --compare bench_results/baseline.json
+#       python bench.py --compare bench_results/baseline.json bench_results/new.json
+#
+# 热点函数基准测试（无需启动 Streamlit）：
+#   - 按规模生成合成工作簿（中文/拉丁学名字段，可配置嵌入图片密度），同参数生成结果可复现并复用；
+#   - 每个用例在独立子进程中运行（缓存/快照/图片目录互不干扰），记录耗时、吞吐量与峰值 RSS；
+#   - 结果写成 JSON，可与另一份结果逐项对比，超过阈值的退化以非零退出码返回（便于 CI）。
+
+import argparse
+import concurrent.futures as cf
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.join(tempfile.gettempdir(), "_catalog_bench")
+DEFAULT_SIZES = "1k,10k,100k"
+DEFAULT_IMAGE_DENSITY = 0.05  # 带嵌入图片的行占比
+REGRESSION_THRESHOLD = 0.15  # 耗时或峰值内存增加超过 15% 记为退化
+NOISE_FLOOR_MS = 2.0  # 绝对差值小于此值的耗时变化视为噪声
+
+# 与正式目录一致的表头（第 12 列为“菌种照片”）
+COLUMNS = [
+    "菌种编号", "菌种命名", "申请人", "申请人联系电话", "筛选人", "筛选人联系电话", "属、种", "保藏日期",
+    "菌种功能", "基因序列", "菌种特性", "菌种照片", "菌种活性", "菌种来源", "筛选条件", "保藏参数",
+    "保藏方法", "规格及数量", "需保藏时间", "菌种架编号", "附加说明",
+]
+IMAGE_COLUMN_LETTER = "L"
+
+_SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董潘袁蔡蒋余于杜叶程"
+_GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍红建文辉力鹏飞琳潘尚宇晨浩然欣怡"
+_TAXA = [
+    ("Bacteria-Pseudomonadota(Proteobacteria)-\nAlphaproteobacteria-Sphingomonadales-\nSphingomonadaceae-Sphingomonas", "Sphingomonas"),
+    ("Bacteria-Deinococcota (Deinococcus-Thermus)-Deinococci-\nDeinococcales-Deinococcaceae-Deinococcus", "Deinococcus"),
+    ("Bacteria-Bacillota-Bacilli-Bacillales-Bacillaceae-Bacillus", "Bacillus"),
+    ("Bacteria-Actinomycetota-Actinomycetes-Micrococcales-Micrococcaceae-Arthrobacter", "Arthrobacter"),
+    ("Bacteria-Pseudomonadota-Gammaproteobacteria-Pseudomonadales-Pseudomonadaceae-Pseudomonas", "Pseudomonas"),
+    ("Fungi-Ascomycota-Saccharomycetes-Saccharomycetales-Saccharomycetaceae-Saccharomyces", "Saccharomyces"),
+]
+_EPITHETS = ["sp.", "subtilis", "radiodurans", "fluorescens", "cerevisiae", "globiformis", "aquatilis", "putida"]
+_PLACES = ["西藏高原", "重庆南山", "长江三峡", "青海湖", "云南普洱", "四川若尔盖", "嘉陵江", "缙云山"]
+_MEDIA = ["好养R2A液体培养基", "LB固体培养基", "PDA培养基", "牛肉膏蛋白胨培养基", "高氏一号培养基"]
+_TRAITS = ["辐照筛菌", "耐低温", "产芽孢", "降解石油烃", "耐盐", "固氮", "产淀粉酶"]
+_COLORS = ["黄色", "红色", "白色", "橙色", "乳白色", "粉色"]
+
+
+# ---------------------------
+# 合成工作簿
+# ---------------------------
+def _name(rng: random.Random) -> str:
+    return rng.choice(_SURNAMES) + "".join(rng.choice(_GIVEN) for _ in range(rng.randint(1, 2)))
+
+
+def _synthetic_row(i: int, rng: random.Random) -> list:
+    lineage, genus = rng.choice(_TAXA)
+    day = date(2020, 1, 1) + timedelta(days=rng.randint(0, 2000))
+    # 与真实数据一致：日期混有中文日期文本与 Excel 序列号
+    saved = f"{day.year}年{day.month}月{day.day}日" if rng.random() < 0.7 else (day - date(1899, 12, 30)).days
+    temp = rng.choice([4, 25, 28, 30, 37])
+    medium = rng.choice(_MEDIA)
+    return [
+        f"{day:%Y%m%d}{i:06d}{rng.choice('ABC')}",
+        f"CC-{rng.choice('HLMX')}-{i}",
+        _name(rng),
+        13000000000 + rng.randint(0, 999999999),
+        _name(rng),
+        "" if rng.random() < 0.5 else str(15000000000 + rng.randint(0, 999999999)),
+        f"{lineage}-{genus} {rng.choice(_EPITHETS)}",
+        saved,
+        f"{medium}{temp}摄氏度，{rng.choice(['正在探索', '降解效果良好', '待复筛'])}",
+        "（没有则不填）" if rng.random() < 0.8 else "".join(rng.choice("ACGT") for _ in range(120)),
+        f"{rng.choice(_TRAITS)}，{rng.choice(_COLORS)}",
+        "",
+        f"{medium}条件下 {rng.randint(1, 14)} 天降解率 {rng.randint(5, 95)}%",
+        f"{rng.choice(_PLACES)} {rng.randint(1, 30)}-{rng.randint(1, 9)}-{rng.randint(1, 9)}，{_name(rng)}",
+        f"{medium}{temp}℃",
+        f"OD600={rng.uniform(0.2, 2.0):.2f}",
+        rng.choice(["1：1甘油，-80℃", "冻干，4℃", "斜面，4℃"]),
+        f"每管{rng.choice([1, 2, 5, 10])}ml，共{rng.randint(1, 10)}管",
+        f"{day.year}.{day.month}-{day.year + 5}.{day.month}",
+        f"J-{rng.randint(1, 40):02d}-{rng.randint(1, 200):03d}",
+        "" if rng.random() < 0.9 else "Strain collected during field survey; see lab notebook.",
+    ]
+
+
+def _synthetic_png(i: int, rng: random.Random) -> bytes:
+    # 每张图片内容不同（否则按内容摘要去重后提取测不到真实开销），但体积小、可压缩
+    from PIL import Image, ImageDraw
+
+    im = Image.new("RGB", (160, 120), (rng.randint(180, 255), rng.randint(180, 255), rng.randint(180, 255)))
+    draw = ImageDraw.Draw(im)
+    for _ in range(4):
+        x, y = rng.randint(0, 140), rng.randint(0, 100)
+        draw.ellipse((x, y, x + rng.randint(8, 30), y + rng.randint(8, 30)), fill=(rng.randint(0, 200),) * 3)
+    draw.text((4, 4), str(i), fill=(0, 0, 0))
+    buf = BytesIO()
+    im.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_synthetic_workbook(path: str, n_rows: int, image_density: float = DEFAULT_IMAGE_DENSITY, seed: int = 0) -> str:
+    """写出 n_rows 行的合成工作簿（openpyxl 只写模式），约 image_density 比例的行在“菌种照片”列锚定一张图片。"""
+    from openpyxl import Workbook
+    from openpyxl.drawing.image import Image as XLImage
+
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(COLUMNS)
+    for i in range(n_rows):
+        ws.append(_synthetic_row(i, rng))
+        if rng.random() < image_density:
+            img = XLImage(BytesIO(_synthetic_png(i, rng)))
+            img.anchor = f"{IMAGE_COLUMN_LETTER}{i + 2}"
+            ws.add_image(img)
+    tmp = path + ".tmp"
+    wb.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def workbook_for(n_rows: int, image_density: float, seed: int) -> str:
+    """同参数的合成工作簿只生成一次。"""
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"synthetic_{n_rows}_{image_density:g}_{seed}.xlsx")
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        make_synthetic_workbook(path, n_rows, image_density, seed)
+        print(f"  生成 {os.path.basename(path)}（{time.perf_counter() - t0:.1f}s）", flush=True)
+    return path
+
+
+# ---------------------------
+# 峰值内存
+# ---------------------------
+def _reset_peak_rss() -> bool:
+    # Linux：向 clear_refs 写 5 可重置 VmHWM，使峰值只统计计时区间
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb() -> float:
+    peak = _proc_status_mb("VmHWM")
+    if peak is not None:
+        return peak
+    # 其他平台退回进程生命周期内峰值（macOS 单位为字节，Linux 为 KB）
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _current_rss_mb() -> float:
+    rss = _proc_status_mb("VmRSS")
+    return rss if rss is not None else _peak_rss_mb()
+
+
+# ---------------------------
+# 用例（均在子进程中执行）
+# ---------------------------
+def _isolate(app, workdir: str):
+    """每个用例使用独立的快照/图片/派生图目录，并清空 Streamlit 缓存。"""
+    app.SNAPSHOT_ROOT = os.path.join(workdir, "snapshots")
+    app.EXPORT_ROOT = os.path.join(workdir, "images")
+    app.DERIVATIVE_ROOT = os.path.join(workdir, "derivatives")
+    app.st.cache_data.clear()
+    app.st.cache_resource.clear()
+
+
+def _queries(df) -> List[Dict[str, str]]:
+    """从数据中取检索词，保证各规模下都有命中（与 render_list 的字段检索一致）。"""
+    return [
+        {"菌种来源": "西藏"},
+        {"申请人": str(df["申请人"].iloc[len(df) // 2])[:2]},
+        {"菌种编号": str(df["菌种编号"].iloc[len(df) // 3])[-7:-1]},
+        {"菌种命名": "CC-H", "菌种来源": "重庆"},
+    ]
+
+
+def _setup_frame(app, excel_path: str):
+    return app.read_catalog_frame(excel_path, app.excel_fingerprint(excel_path))
+
+
+def _case_load_excel_cold(app, excel_path, workdir):
+    # 冷启动：解析工作簿 + 清洗 + 写快照
+    def run():
+        _isolate(app, tempfile.mkdtemp(dir=workdir))
+        return len(app.load_excel(excel_path))
+
+    return run
+
+
+def _case_load_excel_snapshot(app, excel_path, workdir):
+    # 已有快照、Streamlit 缓存为空（如进程重启后）
+    _setup_frame(app, excel_path)
+
+    def run():
+        app.st.cache_resource.clear()
+        return len(app.load_excel(excel_path))
+
+    return run
+
+
+def _case_filter(app, excel_path, workdir):
+    # render_list 的检索路径：倒排索引求交（索引构建单独计时）
+    df = _setup_frame(app, excel_path)
+    index = app.SearchIndex(df, app.SEARCH_COLS)
+    queries = _queries(df)
+
+    def run():
+        for q in queries:
+            index.filter(q)
+        return len(df) * len(queries)
+
+    return run
+
+
+def _case_search_index_build(app, excel_path, workdir):
+    df = _setup_frame(app, excel_path)
+
+    def run():
+        app.SearchIndex(df, app.SEARCH_COLS)
+        return len(df)
+
+    return run
+
+
+def _case_global_search(app, excel_path, workdir):
+    df = _setup_frame(app, excel_path)
+    search_text = app.build_search_text(df)
+    queries = ["西藏", "bacillus 耐盐", "CC-H 重庆 甘油"]
+
+    def run():
+        for q in queries:
+            app.build_global_search_mask(df, q, search_text)
+        return len(df) * len(queries)
+
+    return run
+
+
+def _case_search_text_build(app, excel_path, workdir):
+    df = _setup_frame(app, excel_path)
+
+    def run():
+        app.build_search_text(df)
+        return len(df)
+
+    return run
+
+
+def _case_render_table(app, excel_path, workdir):
+    # 列表页的 HTML 渲染：按最大每页条数逐页渲染（截断 + 转义 + 拼接）
+    df = _setup_frame(app, excel_path)
+    id_col = app.detect_id_col(df)
+    show_cols = [c for c in [id_col, "菌种命名", "属、种", "保藏日期", "菌种来源"] if c in df.columns]
+    page = max(app.PAGE_SIZE_OPTIONS)
+    pages = [df.iloc[s:s + page] for s in range(0, min(len(df), page * 20), page)]
+
+    def run():
+        for page_df in pages:
+            app._render_table_html(app._build_display_frame(page_df, show_cols, id_col), {id_col, "保藏日期", "操作"})
+        return sum(len(p) for p in pages)
+
+    return run
+
+
+def _case_extract_images(app, excel_path, workdir):
+    # 冷提取：解析锚点 + 解码/编码全部嵌入图片写入内容寻址目录
+    def run():
+        _isolate(app, tempfile.mkdtemp(dir=workdir))
+        mapping = app.extract_embedded_images(excel_path)
+        return sum(len(v) for v in mapping.values())
+
+    return run
+
+
+CASES: Dict[str, Tuple[Callable, str]] = {
+    "load_excel_cold": (_case_load_excel_cold, "rows/s"),
+    "load_excel_snapshot": (_case_load_excel_snapshot, "rows/s"),
+    "search_index_build": (_case_search_index_build, "rows/s"),
+    "filter": (_case_filter, "rows/s"),
+    "search_text_build": (_case_search_text_build, "rows/s"),
+    "global_search": (_case_global_search, "rows/s"),
+    "render_table": (_case_render_table, "rows/s"),
+    "extract_images": (_case_extract_images, "images/s"),
+}
+
+
+def _run_case(case: str, excel_path: str, repeat: int) -> dict:
+    """子进程入口：准备数据后重复计时，返回耗时（最小/中位）、吞吐量与计时区间的峰值 RSS。"""
+    # 只在子进程内导入 app：父进程不承担 Streamlit/pyarrow 的内存，也不共享缓存
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")  # 不输出 bare mode 警告
+    import app
+
+    workdir = tempfile.mkdtemp(dir=BENCH_DIR)
+    try:
+        _isolate(app, workdir)
+        run = CASES[case][0](app, excel_path, workdir)
+        base_rss = _current_rss_mb()
+        exact = _reset_peak_rss()
+        times, units = [], 0
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            units = run()
+            times.append(time.perf_counter() - t0)
+        best = min(times)
+        peak = _peak_rss_mb()
+        return {
+            "seconds_min": round(best, 6),
+            "seconds_median": round(statistics.median(times), 6),
+            "units": int(units),
+            "throughput": round(units / best, 1) if best > 0 else None,
+            "unit": CASES[case][1],
+            "peak_rss_mb": round(peak, 1),
+            "rss_before_mb": round(base_rss, 1),
+            # 计时区间内相对准备完成时的内存增量（不含 import 与数据准备）
+            "peak_rss_delta_mb": round(max(0.0, peak - base_rss), 1),
+            "peak_rss_exact": exact,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------
+# 运行与对比
+# ---------------------------
+def parse_sizes(spec: str) -> List[int]:
+    sizes = []
+    for part in [p.strip().lower() for p in spec.split(",") if p.strip()]:
+        mult = {"k": 1_000, "m": 1_000_000}.get(part[-1], 1)
+        sizes.append(int(float(part.rstrip("km")) * mult))
+    return sizes
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+        return out.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_benchmarks(sizes: List[int], cases: List[str], image_density: float, seed: int, repeat: int) -> dict:
+    import numpy
+    import pandas
+    import pyarrow
+
+    result = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "pyarrow": pyarrow.__version__,
+            "image_density": image_density,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    # spawn + 每任务一个新进程：各用例的内存与缓存互不影响
+    ctx = multiprocessing.get_context("spawn")
+    for n in sizes:
+        print(f"[{n} 行]", flush=True)
+        excel_path = workbook_for(n, image_density, seed)
+        result["results"][str(n)] = {}
+        for case in cases:
+            with cf.ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                try:
+                    r = pool.submit(_run_case, case, excel_path, repeat).result()
+                except Exception as e:
+                    r = {"error": f"{type(e).__name__}: {e}"}
+            result["results"][str(n)][case] = r
+            if "error" in r:
+                print(f"  {case:<22} 失败：{r['error']}", flush=True)
+            else:
+                print(
+                    f"  {case:<22} {r['seconds_min'] * 1000:>10.1f} ms  {r['throughput'] or 0:>12,.0f} {r['unit']:<9}"
+                    f" 峰值 {r['peak_rss_mb']:.0f} MB（+{r['peak_rss_delta_mb']:.0f}）",
+                    flush=True,
+                )
+    return result
+
+
+def compare(base: dict, new: dict, threshold: float = REGRESSION_THRESHOLD, noise_ms: float = NOISE_FLOOR_MS) -> int:
+    """逐项对比两次结果（按最小耗时与峰值 RSS），返回退化项数量。"""
+    regressions = 0
+    print(f"对比：{base['meta'].get('commit') or '?'} -> {new['meta'].get('commit') or '?'}（阈值 {threshold:.0%}）")
+    print(f"{'规模':>9} {'用例':<22} {'基线ms':>10} {'本次ms':>10} {'耗时比':>7} {'基线MB':>8} {'本次MB':>8}")
+    for size, cases in new["results"].items():
+        for case, r in cases.items():
+            b = base["results"].get(size, {}).get(case)
+            if not b or "error" in b or "error" in r:
+                continue
+            ratio = r["seconds_min"] / b["seconds_min"] if b["seconds_min"] else float("inf")
+            mem_ratio = r["peak_rss_mb"] / b["peak_rss_mb"] if b["peak_rss_mb"] else 1.0
+            significant = abs(r["seconds_min"] - b["seconds_min"]) * 1000 >= noise_ms
+            flag = ""
+            if (significant and ratio > 1 + threshold) or mem_ratio > 1 + threshold:
+                flag = "  退化"
+                regressions += 1
+            elif significant and ratio < 1 - threshold:
+                flag = "  提升"
+            print(
+                f"{size:>9} {case:<22} {b['seconds_min'] * 1000:>10.1f} {r['seconds_min'] * 1000:>10.1f}"
+                f" {ratio:>7.2f} {b['peak_rss_mb']:>8.0f} {r['peak_rss_mb']:>8.0f}{flag}"
+            )
+    return regressions
+
+
+def _load_json(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微生物资源目录热点函数基准测试")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="行数列表，逗号分隔，支持 k/m 后缀，如 1k,10k,100k,1m")
+    parser.add_argument("--cases", default=",".join(CASES), help="要运行的用例，逗号分隔")
+    parser.add_argument("--image-density", type=float, default=DEFAULT_IMAGE_DENSITY, help="带嵌入图片的行占比")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数（取最小值）")
+    parser.add_argument("--out", default="", help="结果 JSON 路径")
+    parser.add_argument("--compare", nargs="+", default=[], metavar="JSON", help="基线 JSON；给两个文件时只对比不运行")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--noise-ms", type=float, default=NOISE_FLOOR_MS, help="小于该毫秒数的耗时差异不计")
+    args = parser.parse_args()
+
+    if len(args.compare) == 2:
+        sys.exit(1 if compare(_load_json(args.compare[0]), _load_json(args.compare[1]), args.threshold, args.noise_ms) else 0)
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"未知用例：{', '.join(unknown)}（可选：{', '.join(CASES)}）")
+
+    result = run_benchmarks(parse_sizes(args.sizes), cases, args.image_density, args.seed, max(1, args.repeat))
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.out}")
+    if args.compare:
+        sys.exit(1 if compare(_load_json(args.compare[0]), result, args.threshold, args.noise_ms) else 0)
+
+
+if __name__ == "__main__":
+    main()
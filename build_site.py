@@ -0,0 +1,576 @@
+# build_site.py
+# 运行：python build_site.py --out site
+#       python build_site.py --out site --excel 目录.xlsx --workers 8
+#
+# 静态站点预渲染（公开只读访问，不必为每位访客运行 Python 进程）：
+#   - 每个列表页（index.html、page-2.html …）与每条记录的详情页（strain/<编号>.html），
+#     旧链接 ?id=编号 由首页脚本跳转到对应详情页；
+#   - 图片复制到 images/（展示图 + 原图），URL 图片构建前先预取到本地；
+#   - search.json：紧凑的检索索引，列表页脚本在浏览器端过滤；
+#   - 增量构建：按整行哈希 + 图片签名（本地文件 mtime/size、嵌入图片 CRC32）只重写变化的页面；
+#   - 详情页（含嵌入图片解码、派生图生成）在进程池中并行渲染。
+
+import argparse
+import concurrent.futures as cf
+import hashlib
+import html
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from typing import Dict, List, Optional
+
+# 构建时同步预取 URL 图片（见 build），不需要后台预取线程；须在导入 app 之前设置
+os.environ["MRC_URL_PREFETCH"] = "0"
+
+import numpy as np
+import pandas as pd
+
+from app import (
+    CATALOG_SHEETS,
+    CSS,
+    HEADER_HTML,
+    CatalogVersion,
+    SEARCH_COLS,
+    LiveCatalog,
+    _build_display_frame,
+    _kv_html,
+    _render_table_html,
+    breadcrumb_html,
+    catalog_display_frame,
+    column_text,
+    excel_fingerprint,
+    get_image_derivatives,
+    get_image_index,
+    list_columns,
+    parse_sheet_list,
+    pick_catalog_source,
+    prefetch_remote_images,
+    split_image_tokens,
+)
+
+# 页面模板/目录结构变化时递增，触发全量重建
+BUILD_VERSION = 1
+MANIFEST_NAME = "_manifest.json"
+DEFAULT_PAGE_SIZE = 10
+SEARCH_RESULT_LIMIT = 200  # 浏览器端检索最多展示的条数
+
+_SLUG_SAFE_RE = re.compile(r"[A-Za-z0-9.-]")
+
+# 静态页面没有 Streamlit 的外层容器：补上页面底色与内容宽度，其余沿用 app.CSS
+EXTRA_CSS = """
+body{margin:0;background:var(--bg);}
+.main .block-container{margin:0 auto;padding-left:1rem;padding-right:1rem;}
+.mrc-search{width:100%;box-sizing:border-box;margin-top:8px;padding:9px 12px;font-size:14px;
+  border:1px solid var(--border2);border-radius:var(--radius2);}
+.detail-grid{display:grid;grid-template-columns:1.85fr 1fr;gap:24px;align-items:start;}
+.detail-grid img{width:100%;border-radius:var(--radius2);margin-top:10px;}
+.pager a.pill{text-decoration:none;color:inherit;}
+.pager span.pill{opacity:.45;}
+@media (max-width: 900px){ .detail-grid{grid-template-columns:1fr;} }
+"""
+
+# 旧版链接 ?id=编号：跳转到对应详情页（文件名规则同 page_slug）
+REDIRECT_JS = """
+(function () {
+  var m = /[?&]id=([^&]*)/.exec(location.search);
+  if (!m) return;
+  var id = decodeURIComponent(m[1].replace(/\\+/g, " ")).trim();
+  if (!id) return;
+  var slug = Array.from(id).map(function (c) {
+    return /[A-Za-z0-9.-]/.test(c) ? c : "_" + c.codePointAt(0).toString(16).padStart(6, "0");
+  }).join("");
+  location.replace("strain/" + slug + ".html");
+})();
+"""
+
+# 浏览器端检索：在展示列与检索列（SEARCH_COLS）上查找，NFKC + 小写，按空白拆词，所有词都命中
+SEARCH_JS = """
+(function () {
+  var input = document.getElementById("mrc-search");
+  if (!input) return;
+  var results = document.getElementById("mrc-results");
+  var hideOnSearch = document.querySelectorAll("[data-hide-on-search]");
+  var index = null, timer = null;
+
+  function norm(s) { return String(s || "").normalize("NFKC").toLowerCase().replace(/\\s+/g, " ").trim(); }
+  function esc(s) {
+    return String(s).replace(/[&<>"']/g, function (c) {
+      return { "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;" }[c];
+    });
+  }
+  function shorten(s, n) { s = String(s).replace(/\\n/g, " / ").trim(); return s.length > n ? s.slice(0, n) + "…" : s; }
+  function load() {
+    if (!index) {
+      index = fetch("search.json").then(function (r) { return r.json(); }).then(function (d) {
+        d.text = d.rows.map(function (r) { return norm(r.slice(1).join(" | ")); });
+        return d;
+      });
+    }
+    return index;
+  }
+  function show(searching) {
+    results.hidden = !searching;
+    hideOnSearch.forEach(function (el) { el.hidden = searching; });
+  }
+  function run() {
+    var terms = norm(input.value).split(" ").filter(Boolean);
+    if (!terms.length) { show(false); return; }
+    load().then(function (d) {
+      var hits = [];
+      for (var i = 0; i < d.rows.length; i++) {
+        var t = d.text[i];
+        if (terms.every(function (w) { return t.indexOf(w) >= 0; })) hits.push(i);
+      }
+      var n = d.show.length;
+      var head = d.show.map(function (c) { return "<th>" + esc(c) + "</th>"; }).join("") + "<th>操作</th>";
+      var body = hits.slice(0, d.limit).map(function (i) {
+        var r = d.rows[i], cells = "";
+        for (var j = 0; j < n; j++) {
+          var cls = d.center.indexOf(j) >= 0 ? "td-center" : "td-left";
+          cells += '<td class="' + cls + '">' + (esc(shorten(r[j + 1], 60)) || "&nbsp;") + "</td>";
+        }
+        var link = r[0] ? '<a class="nimr-link" href="strain/' + r[0] + '.html">查看</a>' : "-";
+        return "<tr>" + cells + '<td class="td-center">' + link + "</td></tr>";
+      }).join("");
+      var note = hits.length > d.limit ? "（显示前 " + d.limit + " 条）" : "";
+      results.innerHTML = '<table class="nimr-table"><thead><tr>' + head + "</tr></thead><tbody>" + body +
+        '</tbody></table><div class="pager"><div class="pill">共 ' + hits.length + " 条记录" + note + "</div></div>";
+      show(true);
+    });
+  }
+  input.addEventListener("input", function () { clearTimeout(timer); timer = setTimeout(run, 200); });
+})();
+"""
+
+
+def page_slug(rid: str) -> str:
+    """编号 -> 详情页文件名（ASCII、互不冲突）：字母/数字/点/连字符原样保留，其余字符写成 _ + 6 位十六进制码点。"""
+    return "".join(c if _SLUG_SAFE_RE.fullmatch(c) else f"_{ord(c):06x}" for c in rid)
+
+
+def list_page_name(page: int) -> str:
+    return "index.html" if page == 1 else f"page-{page}.html"
+
+
+def _write_file(path: str, data: bytes):
+    # 先写临时文件再原子替换：构建过程中对外提供的始终是完整页面
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_text(path: str, text: str):
+    _write_file(path, text.encode("utf-8"))
+
+
+def _write_if_changed(path: str, text: str) -> bool:
+    data = text.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    _write_file(path, data)
+    return True
+
+
+def _copy_once(src: str, dst: str):
+    # 目标文件名已包含源文件特征（内容/mtime/size），存在即相同
+    if os.path.exists(dst):
+        return
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")
+    os.close(fd)
+    shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def _html_page(title: str, body: str, root: str, head: str = "") -> str:
+    return f"""<!doctype html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<link rel="stylesheet" href="{root}assets/style.css">
+{head}
+</head>
+<body>
+<div class="main"><div class="block-container">
+{HEADER_HTML}
+{body}
+</div></div>
+</body>
+</html>
+"""
+
+
+# ---------------------------
+# 列表页
+# ---------------------------
+def _pager_html(page: int, total_pages: int, total: int, start: int, end: int) -> str:
+    def link(label: str, target: int, enabled: bool) -> str:
+        if not enabled:
+            return f'<span class="pill">{label}</span>'
+        return f'<a class="pill" href="{list_page_name(target)}">{label}</a>'
+
+    return f"""
+<div class="pager" data-hide-on-search>
+  {link("⏮ 首页", 1, page > 1)}
+  {link("◀ 上一页", page - 1, page > 1)}
+  {link("下一页 ▶", page + 1, page < total_pages)}
+  {link("末页 ⏭", total_pages, page < total_pages)}
+  <div class="pill">共 {total} 条记录</div>
+  <div class="pill">第 {page} / {total_pages} 页（当前显示 {start + 1 if total > 0 else 0}-{min(end, total)}）</div>
+</div>
+"""
+
+
+def list_page_html(cat: CatalogVersion, page: int, page_size: int, slugs: np.ndarray) -> str:
+    df, id_col = cat.df, cat.id_col
+    total = len(df)
+    total_pages = max(1, math.ceil(total / page_size))
+    start, end = (page - 1) * page_size, page * page_size
+    show_cols = list_columns(df, id_col)
+
+    display_df = _build_display_frame(df.iloc[start:end], show_cols, id_col)
+    page_slugs = pd.Series(slugs[start:end], index=display_df.index)
+    display_df["操作"] = ('<a class="nimr-link" href="strain/' + page_slugs + '.html">查看</a>').where(page_slugs != "", "-")
+    table = _render_table_html(display_df, {id_col, "保藏日期", "操作"})
+
+    body = f"""
+{breadcrumb_html([("首页", False), ("资源目录", True)])}
+<div class="nimr-section-title">微生物资源目录</div>
+<div class="card">
+  <b>菌种检索</b>
+  <input id="mrc-search" class="mrc-search" type="search" autocomplete="off"
+         placeholder="在所有检索字段中查找，多个关键词用空格分隔（需同时命中）">
+</div>
+<div class="table-wrap" id="mrc-results" hidden></div>
+<div class="table-wrap" data-hide-on-search>{table}</div>
+{_pager_html(page, total_pages, total, start, end)}
+<script src="assets/search.js" defer></script>
+"""
+    head = f"<script>{REDIRECT_JS}</script>" if page == 1 else ""
+    return _html_page("微生物资源目录", body, "", head)
+
+
+def search_index_json(cat: CatalogVersion, slugs: np.ndarray) -> str:
+    """
+    浏览器端检索用的紧凑索引：每行 [详情页文件名, 展示列…, 其余检索列…]，按列表顺序。
+    只收录展示列与 SEARCH_COLS（不含基因序列、图片路径等长字段），首次检索时才下载。
+    """
+    df, id_col = cat.df, cat.id_col
+    show_cols = list_columns(df, id_col)
+    cols = show_cols + [c for c in SEARCH_COLS if c in df.columns and c not in show_cols]
+    values = [column_text(catalog_display_frame(df[[c]])[c]).replace("nan", "").tolist() for c in cols]
+    payload = {
+        "show": show_cols,
+        "center": [i for i, c in enumerate(show_cols) if c in (id_col, "保藏日期")],
+        "limit": SEARCH_RESULT_LIMIT,
+        "rows": [[slug, *row] for slug, row in zip(slugs.tolist(), zip(*values))],
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+# ---------------------------
+# 详情页（进程池中渲染）
+# ---------------------------
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(excel_path: str, sheets: Optional[List[str]], out_dir: str):
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")  # 不输出 bare mode 警告
+    # fork 时直接沿用父进程已加载的目录；spawn 时重新加载（内存映射快照，毫秒级）
+    if "cat" not in _worker:
+        _worker["cat"] = LiveCatalog(excel_path, watch=False, sheets=sheets).version
+    _worker["out"] = out_dir
+
+
+def _publish_images(paths: List[str], out_dir: str) -> List[Dict[str, str]]:
+    """把一条记录的图片复制到 images/：展示图 + 原图（按源文件特征命名，内容不变时不重复复制）。"""
+    published = []
+    for p in paths:
+        if re.match(r"^https?://", p, re.IGNORECASE):
+            # 预取失败的 URL：直接引用远程地址
+            published.append({"display": p, "original": p})
+            continue
+        try:
+            st_info = os.stat(p)
+        except OSError:
+            continue
+        key = hashlib.sha1(f"{os.path.abspath(p)}|{st_info.st_mtime_ns}|{st_info.st_size}".encode("utf-8")).hexdigest()
+        original = f"images/{key[:20]}{os.path.splitext(p)[1].lower()}"
+        _copy_once(p, os.path.join(out_dir, original))
+        display = original
+        derivs = get_image_derivatives(p)
+        if "display" in derivs:
+            display = f"images/{os.path.basename(derivs['display'])}"
+            _copy_once(derivs["display"], os.path.join(out_dir, display))
+        published.append({"display": display, "original": original})
+    return published
+
+
+def detail_page_html(cat: CatalogVersion, pos: int, images: List[Dict[str, str]]) -> str:
+    df, id_col, img_col = cat.df, cat.id_col, cat.img_col
+    rid = str(df[id_col].iloc[pos]).strip()
+    row = catalog_display_frame(df.iloc[[pos]]).iloc[0].to_dict()
+    kv = _kv_html(df.columns.tolist(), row, [img_col] if img_col else [])
+
+    def url(p: str) -> str:
+        return html.escape(p if re.match(r"^https?://", p, re.IGNORECASE) else "../" + p)
+
+    if images:
+        figures = "".join(
+            f'<a href="{url(img["original"])}" target="_blank"><img src="{url(img["display"])}" loading="lazy" alt=""></a>'
+            f'<div><a class="nimr-link" href="{url(img["original"])}" target="_blank">查看原图</a></div>'
+            for img in images
+        )
+    else:
+        figures = '<p class="nimr-subtitle" style="color:var(--muted2);">暂无图片</p>'
+
+    body = f"""
+{breadcrumb_html([("首页", False), ("资源目录", False), (f"详情：{html.escape(rid)}", True)])}
+<div class="nimr-section-title" style="display:flex;justify-content:space-between;align-items:center;gap:12px;">
+  <div>资源详情</div>
+  <a href="../index.html" class="nimr-link"
+     style="padding:7px 12px;border-radius:12px;background:var(--soft);border:1px solid var(--border2);">
+     ← 返回资源目录
+  </a>
+</div>
+<div class="detail-grid">
+  <div class="card"><b>基本信息</b>{kv}</div>
+  <div class="card"><b>菌种图片</b>{figures}</div>
+</div>
+"""
+    return _html_page(f"{rid} · 微生物资源目录", body, "../")
+
+
+def _render_details(positions: List[int]) -> Dict[str, List[str]]:
+    """渲染一批详情页，返回 {详情页文件名: 引用的图片文件}。"""
+    cat: CatalogVersion = _worker["cat"]
+    out_dir: str = _worker["out"]
+    result = {}
+    for pos in positions:
+        slug = page_slug(str(cat.df[cat.id_col].iloc[pos]).strip())
+        images = _publish_images(cat.images_for(pos), out_dir)
+        _write_text(os.path.join(out_dir, "strain", f"{slug}.html"), detail_page_html(cat, pos, images))
+        result[slug] = sorted({p for img in images for p in img.values() if p.startswith("images/")})
+    return result
+
+
+# ---------------------------
+# 增量构建
+# ---------------------------
+def image_signatures(cat: CatalogVersion) -> List[str]:
+    """
+    每行图片的签名（不解码任何图片）：文本 token 的解析结果（本地文件附 mtime/size）
+    + 本行嵌入图片成员的 CRC32。图片文件被替换时签名随之变化。
+    """
+    df = cat.df
+    texts = column_text(df[cat.img_col]).tolist() if cat.img_col else [""] * len(df)
+    fingerprints: Dict[str, str] = {}
+    crcs: Dict[str, Dict[str, int]] = {}
+    signatures = []
+    for pos in range(len(df)):
+        if cat.locator is None:
+            path, sheet, excel_row = cat.excel_path, 0, int(df.index[pos]) + 2
+        else:
+            path, sheet, excel_row = cat.locator.locate(pos)
+        resolver = cat.image_resolver(path)
+        parts = []
+        for token in split_image_tokens(texts[pos]):
+            p = resolver.resolve(token)
+            if p and not re.match(r"^https?://", p, re.IGNORECASE):
+                try:
+                    st_info = os.stat(p)
+                    p = f"{p}|{st_info.st_mtime_ns}|{st_info.st_size}"
+                except OSError:
+                    pass
+            parts.append(str(p))
+
+        if path not in fingerprints:
+            fingerprints[path] = excel_fingerprint(path)
+        members = get_image_index(path, fingerprints[path], sheet).get(excel_row, [])
+        if members:
+            if path not in crcs:
+                with zipfile.ZipFile(path) as zf:
+                    crcs[path] = {info.filename: info.CRC for info in zf.infolist()}
+            parts += [f"{m}|{crcs[path].get(m)}" for m in members]
+        signatures.append("\n".join(parts))
+    return signatures
+
+
+def _load_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def build_site(
+    excel_path: str,
+    out_dir: str,
+    sheets: Optional[List[str]] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    workers: int = 0,
+    force: bool = False,
+) -> Dict[str, int]:
+    t0 = time.perf_counter()
+    out_dir = os.path.abspath(out_dir)
+    cat = LiveCatalog(excel_path, watch=False, sheets=sheets).version
+    df, id_col = cat.df, cat.id_col
+
+    # URL 图片先下载到本地缓存，详情页引用站内副本
+    sources = [cat.excel_path] if cat.locator is None else [p for p, _ in cat.locator.sources]
+    for path in dict.fromkeys(sources):
+        prefetch_remote_images(cat.image_resolver(path).urls())
+
+    layout = hashlib.sha1(
+        json.dumps([BUILD_VERSION, list(map(str, df.columns)), id_col, cat.img_col, page_size], ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    old = _load_manifest(out_dir)
+    if force or old.get("layout") != layout:
+        old = {}
+
+    # 每行的内容键：整行哈希 + 图片签名；编号重复时详情页取首条（与页面一致）
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    signatures = image_signatures(cat)
+    row_keys = [
+        hashlib.sha1(f"{h}|{sig}".encode("utf-8")).hexdigest()[:16] for h, sig in zip(row_hash.tolist(), signatures)
+    ]
+    ids = df[id_col].astype(str).str.strip()
+    slugs = np.array([page_slug(rid) if rid else "" for rid in ids.tolist()], dtype=object)
+    detail_pos = {slugs[pos]: pos for pos in cat.id_index.values() if slugs[pos]}
+
+    old_details: Dict[str, dict] = old.get("details", {})
+    details: Dict[str, dict] = {}
+    todo: List[int] = []
+    for slug, pos in detail_pos.items():
+        prev = old_details.get(slug)
+        if prev and prev["key"] == row_keys[pos] and os.path.exists(os.path.join(out_dir, "strain", f"{slug}.html")):
+            details[slug] = prev
+        else:
+            details[slug] = {"key": row_keys[pos], "images": []}
+            todo.append(pos)
+
+    # 变化的详情页分批交给进程池（图片解码与派生图生成是 CPU 密集型）
+    workers = workers or os.cpu_count() or 1
+    _worker["cat"] = cat
+    if todo:
+        chunk = max(1, min(64, math.ceil(len(todo) / (workers * 4))))
+        batches = [todo[i:i + chunk] for i in range(0, len(todo), chunk)]
+        if workers <= 1 or len(batches) == 1:
+            _init_worker(excel_path, sheets, out_dir)
+            results = list(map(_render_details, batches))
+        else:
+            with cf.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(excel_path, sheets, out_dir)
+            ) as pool:
+                results = list(pool.map(_render_details, batches))
+        for rendered in results:
+            for slug, images in rendered.items():
+                details[slug]["images"] = images
+
+    # 列表页：页内各行的内容键 + 总数（分页信息）未变则跳过
+    total = len(df)
+    total_pages = max(1, math.ceil(total / page_size))
+    old_pages: Dict[str, str] = old.get("pages", {})
+    pages: Dict[str, str] = {}
+    pages_written = 0
+    for page in range(1, total_pages + 1):
+        start, end = (page - 1) * page_size, page * page_size
+        key = hashlib.sha1(
+            f"{total}|{'|'.join(row_keys[start:end])}|{'|'.join(slugs[start:end])}".encode("utf-8")
+        ).hexdigest()[:16]
+        pages[str(page)] = key
+        path = os.path.join(out_dir, list_page_name(page))
+        if old_pages.get(str(page)) != key or not os.path.exists(path):
+            _write_text(path, list_page_html(cat, page, page_size, slugs))
+            pages_written += 1
+
+    # 清理：已删除的记录、多余的列表页、不再被引用的图片
+    removed = [slug for slug in old_details if slug not in details]
+    for slug in removed:
+        _remove(os.path.join(out_dir, "strain", f"{slug}.html"))
+    for page in old_pages:
+        if page not in pages:
+            _remove(os.path.join(out_dir, list_page_name(int(page))))
+    referenced = {p for d in details.values() for p in d["images"]}
+    images_dir = os.path.join(out_dir, "images")
+    if os.path.isdir(images_dir):
+        for name in os.listdir(images_dir):
+            if f"images/{name}" not in referenced:
+                _remove(os.path.join(images_dir, name))
+
+    _write_if_changed(os.path.join(out_dir, "search.json"), search_index_json(cat, slugs))
+    _write_if_changed(os.path.join(out_dir, "assets", "style.css"), CSS.replace("<style>", "").replace("</style>", "") + EXTRA_CSS)
+    _write_if_changed(os.path.join(out_dir, "assets", "search.js"), SEARCH_JS)
+    _write_text(
+        os.path.join(out_dir, MANIFEST_NAME),
+        json.dumps(
+            {"version": BUILD_VERSION, "layout": layout, "fingerprint": cat.fingerprint, "pages": pages, "details": details},
+            ensure_ascii=False,
+        ),
+    )
+    return {
+        "details": len(details),
+        "details_written": len(todo),
+        "details_removed": len(removed),
+        "pages": total_pages,
+        "pages_written": pages_written,
+        "seconds": round(time.perf_counter() - t0, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微生物资源目录静态站点构建（增量）")
+    parser.add_argument("--out", default="site", help="输出目录")
+    parser.add_argument(
+        "--excel",
+        default="",
+        help="工作簿路径，或目录/通配符（联合目录）；缺省与 app.py 相同（含 MRC_CATALOG_SOURCES）",
+    )
+    parser.add_argument("--sheets", default="", help='参与合并的工作表名，逗号分隔，"*" 表示全部（缺省取 MRC_CATALOG_SHEETS）')
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="列表每页条数")
+    parser.add_argument("--workers", type=int, default=0, help="渲染详情页的进程数（缺省为 CPU 核数）")
+    parser.add_argument("--force", action="store_true", help="忽略上次构建记录，全部重写")
+    args = parser.parse_args()
+
+    import streamlit.logger
+
+    streamlit.logger.set_log_level("error")  # 不输出 bare mode 警告
+    stats = build_site(
+        args.excel or pick_catalog_source(),
+        args.out,
+        sheets=parse_sheet_list(args.sheets or CATALOG_SHEETS),
+        page_size=max(1, args.page_size),
+        workers=max(0, args.workers),
+        force=args.force,
+    )
+    print(
+        f"详情页 {stats['details_written']} / {stats['details']} 重写，删除 {stats['details_removed']}；"
+        f"列表页 {stats['pages_written']} / {stats['pages']} 重写；用时 {stats['seconds']}s → {os.path.abspath(args.out)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# tests/conftest.py
+# 运行：python -m pytest -q
+#
+# 所有用例使用各自的快照/图片/派生图/目录库临时目录，并在开始前清空 Streamlit 缓存，
+# 互不影响，也不读写系统临时目录下正在使用的缓存。
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# 远程图片预取只在 test_prefetch 中显式调用，加载目录时不启动后台下载
+os.environ.setdefault("MRC_URL_PREFETCH", "0")
+
+import pytest
+
+import app
+import bench
+
+
+@pytest.fixture(autouse=True)
+def isolated_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SNAPSHOT_ROOT", str(tmp_path / "snapshots"))
+    monkeypatch.setattr(app, "EXPORT_ROOT", str(tmp_path / "images"))
+    monkeypatch.setattr(app, "DERIVATIVE_ROOT", str(tmp_path / "derivatives"))
+    monkeypatch.setattr(app, "STORE_ROOT", str(tmp_path / "store"))
+    monkeypatch.setattr(app, "EXPORT_DIR", str(tmp_path / "exports"))
+    app.st.cache_data.clear()
+    app.st.cache_resource.clear()
+    yield
+
+
+@pytest.fixture(scope="session")
+def synthetic_xlsx(tmp_path_factory) -> str:
+    """600 行合成工作簿（无嵌入图片），整个测试会话只生成一次，用例不得修改。"""
+    return bench.make_synthetic_workbook(str(tmp_path_factory.mktemp("wb") / "synthetic.xlsx"), 600, 0.0, seed=7)
+
+
+def load_version(excel_path: str) -> app.CatalogVersion:
+    fingerprint = app.excel_fingerprint(excel_path)
+    return app.CatalogVersion(excel_path, fingerprint, app.read_catalog_frame(excel_path, fingerprint))
+
+
+@pytest.fixture
+def catalog(synthetic_xlsx) -> app.CatalogVersion:
+    return load_version(synthetic_xlsx)
@@ -0,0 +1,107 @@
+# tests/test_api.py
+# REST/JSON 接口：直接调用 WSGI 应用，检查路由、分页、ETag/304 与图片接口（内存与 SQLite 后端结果一致）。
+
+import json
+import os
+import time
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+import pandas as pd
+import pytest
+from PIL import Image
+
+import api
+import app
+
+REMOTE = "https://images.example.org/strain/r1.jpg"
+
+
+@pytest.fixture
+def live(tmp_path):
+    Image.new("RGB", (200, 120), (20, 120, 60)).save(tmp_path / "a.png")
+    rows = [
+        {"菌种编号": f"CQ-{i:03d}", "菌种命名": f"菌株{i}", "菌种来源": "重庆" if i % 3 else "西藏", "菌种照片": ""}
+        for i in range(45)
+    ]
+    rows[0]["菌种照片"] = f"a.png; {REMOTE}"
+    rows.append({"菌种编号": "中文编号-1", "菌种命名": "中文", "菌种来源": "西藏", "菌种照片": ""})
+    path = tmp_path / "catalog.xlsx"
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return app.LiveCatalog(str(path), watch=False)
+
+
+def _get(application, path, query="", **headers):
+    environ = {"PATH_INFO": path.encode("utf-8").decode("latin-1"), "QUERY_STRING": query}
+    environ.update({f"HTTP_{k.upper()}": v for k, v in headers.items()})
+    setup_testing_defaults(environ)
+    captured = {}
+
+    def start_response(status, response_headers):
+        captured["status"] = int(status.split()[0])
+        captured["headers"] = dict(response_headers)
+
+    body = b"".join(application(environ, start_response))
+    return captured["status"], captured["headers"], body
+
+
+def test_list_paging_and_filters(live):
+    application = api.make_app(live)
+    status, _, body = _get(application, "/strains", "page=3&page_size=20")
+    data = json.loads(body)
+    assert status == 200 and data["total"] == 46 and len(data["items"]) == 6
+    assert data["items"][0]["菌种编号"] == "CQ-040"
+
+    data = json.loads(_get(application, "/strains", "菌种来源=西藏&q=菌株")[2])
+    assert data["total"] == 15 and all(r["菌种来源"] == "西藏" for r in data["items"])
+    assert _get(application, "/strains", "page=x")[0] == 400
+    assert _get(application, "/other")[0] == 404
+
+
+def test_detail_and_etag(live):
+    application = api.make_app(live)
+    status, headers, body = _get(application, "/strains/中文编号-1")
+    assert status == 200 and json.loads(body)["菌种命名"] == "中文"
+    etag = headers["ETag"]
+    assert _get(application, "/strains/中文编号-1", if_none_match=etag)[0] == 304
+    assert _get(application, "/strains/CQ-001", if_none_match=etag)[0] == 200  # ETag 按路径区分
+    assert _get(application, "/strains/不存在")[0] == 404
+
+    # 工作簿更新后旧 ETag 失效
+    df = pd.read_excel(live.excel_path)
+    df.loc[df["菌种编号"] == "中文编号-1", "菌种命名"] = "改名"
+    time.sleep(0.01)
+    df.to_excel(live.excel_path, index=False)
+    assert live.refresh() is not None
+    status, headers, body = _get(application, "/strains/中文编号-1", if_none_match=etag)
+    assert status == 200 and headers["ETag"] != etag and json.loads(body)["菌种命名"] == "改名"
+
+
+def test_image_routes(live):
+    application = api.make_app(live)
+    items = json.loads(_get(application, "/strains/CQ-000/images")[2])["images"]
+    # 本地图片只给文件名，远程图片给原 URL
+    assert [i["source"] for i in items] == ["a.png", REMOTE]
+
+    status, headers, body = _get(application, items[0]["url"])
+    assert status == 200 and headers["Content-Type"] == "image/png"
+    with open(os.path.join(os.path.dirname(live.excel_path), "a.png"), "rb") as f:
+        assert body == f.read()
+    status, _, body = _get(application, items[0]["url"], "size=thumb")
+    assert status == 200 and Image.open(BytesIO(body)).size[0] <= app.DERIVATIVE_SIZES["thumb"]
+
+    status, headers, _ = _get(application, items[1]["url"])
+    assert status == 302 and headers["Location"] == REMOTE
+    assert _get(application, "/strains/CQ-000/images/9")[0] == 404
+
+
+def test_sqlite_backend_same_responses(live, monkeypatch):
+    application = api.make_app(live)
+    queries = ["page=2&page_size=7", "菌种来源=西藏", "q=菌株 1", "菌种命名=菌株4&page_size=3"]
+    expected = [json.loads(_get(application, "/strains", q)[2]) for q in queries]
+    monkeypatch.setattr(app, "STORAGE_BACKEND", "sqlite")
+    live = app.LiveCatalog(live.excel_path, watch=False)
+    application = api.make_app(live)
+    assert live.version.store is not None
+    assert [json.loads(_get(application, "/strains", q)[2]) for q in queries] == expected
+    assert json.loads(_get(application, "/strains/中文编号-1")[2])["菌种命名"] == "中文"
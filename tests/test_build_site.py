@@ -0,0 +1,84 @@
+# tests/test_build_site.py
+# 静态站点增量构建：内容未变时不重写；改一行、删一行只重写/删除对应详情页；站内链接都能解析到文件。
+
+import json
+import os
+import re
+import shutil
+
+import pytest
+from openpyxl import load_workbook
+
+import app
+import bench
+import build_site
+
+ROWS = 120
+PAGE_SIZE = 20
+
+
+@pytest.fixture(scope="module")
+def image_xlsx(tmp_path_factory) -> str:
+    return bench.make_synthetic_workbook(str(tmp_path_factory.mktemp("wb") / "images.xlsx"), ROWS, 0.1, seed=5)
+
+
+def _build(xlsx, out):
+    return build_site.build_site(xlsx, str(out), page_size=PAGE_SIZE, workers=1)
+
+
+def _assert_links_resolve(out):
+    for root, _, files in os.walk(out):
+        for name in files:
+            if not name.endswith(".html"):
+                continue
+            with open(os.path.join(root, name), encoding="utf-8") as f:
+                text = f.read()
+            for href in re.findall(r'(?:href|src)="([^"#?]+)"', text):
+                if not href.startswith(("http://", "https://")):
+                    assert os.path.exists(os.path.normpath(os.path.join(root, href))), (name, href)
+
+
+def test_incremental_rebuild(image_xlsx, tmp_path):
+    xlsx = str(tmp_path / "catalog.xlsx")
+    shutil.copyfile(image_xlsx, xlsx)
+    out = tmp_path / "site"
+
+    first = _build(xlsx, out)
+    assert first["details_written"] == first["details"] == ROWS and first["pages_written"] == ROWS // PAGE_SIZE
+    assert os.listdir(out / "images")  # 嵌入图片复制到站内
+    _assert_links_resolve(out)
+
+    second = _build(xlsx, out)
+    assert second["details_written"] == 0 and second["pages_written"] == 0 and second["details_removed"] == 0
+
+    wb = load_workbook(xlsx)
+    ws = wb.active
+    edited_id = str(ws.cell(row=10, column=1).value).strip()
+    removed_id = str(ws.cell(row=ROWS + 1, column=1).value).strip()
+    ws.cell(row=10, column=2).value = "改过的命名"
+    ws.delete_rows(ROWS + 1)
+    wb.save(xlsx)
+
+    third = _build(xlsx, out)
+    assert third["details_written"] == 1 and third["details_removed"] == 1
+    assert third["pages_written"] >= 1
+    with open(out / "strain" / f"{build_site.page_slug(edited_id)}.html", encoding="utf-8") as f:
+        assert "改过的命名" in f.read()
+    assert not (out / "strain" / f"{build_site.page_slug(removed_id)}.html").exists()
+    _assert_links_resolve(out)
+
+
+def test_search_index_covers_shown_and_search_columns(image_xlsx, tmp_path):
+    out = tmp_path / "site"
+    _build(image_xlsx, out)
+    with open(out / "search.json", encoding="utf-8") as f:
+        index = json.load(f)
+
+    cat = app.LiveCatalog(image_xlsx, watch=False).version
+    show_cols = app.list_columns(cat.df, cat.id_col)
+    extra = [c for c in app.SEARCH_COLS if c in cat.df.columns and c not in show_cols]
+    assert len(index["rows"]) == ROWS
+    assert all(len(r) == 1 + len(show_cols) + len(extra) for r in index["rows"])
+    assert "text" not in index  # 全字段文本不下发，浏览器端由各列拼接
+    slug = index["rows"][0][0]
+    assert (out / "strain" / f"{slug}.html").exists()
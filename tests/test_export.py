@@ -0,0 +1,84 @@
+# tests/test_export.py
+# 批量导出：各格式的行数、列与取值须与命中行一致；临时文件与过期导出不留在导出目录。
+
+import os
+import time
+import zipfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pytest
+from docx import Document
+from openpyxl import load_workbook
+
+import app
+
+
+@pytest.fixture
+def positions(catalog) -> np.ndarray:
+    return np.arange(0, len(catalog.df), 7)[::-1]  # 非升序：导出须保持给定顺序
+
+
+def _expected(cat, positions) -> pd.DataFrame:
+    return app.catalog_display_frame(cat.df.iloc[positions]).reset_index(drop=True)
+
+
+def test_csv_export_matches_rows(catalog, positions, monkeypatch):
+    monkeypatch.setattr(app, "EXPORT_CHUNK_ROWS", 16)  # 跨多个分块
+    job = app.ExportJob("csv", len(positions))
+    path = app.export_catalog(catalog, positions, "csv", job)
+    assert job.done == len(positions)
+
+    got = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    expected = _expected(catalog, positions)
+    assert list(got.columns) == [str(c) for c in catalog.df.columns]
+    for col in (catalog.id_col, "菌种命名"):
+        assert got[col].tolist() == expected[col].astype(str).tolist()
+
+
+def test_xlsx_export_matches_rows(catalog, positions):
+    path = app.export_catalog(catalog, positions, "xlsx")
+    rows = list(load_workbook(path, read_only=True).active.iter_rows(values_only=True))
+    assert list(rows[0]) == [str(c) for c in catalog.df.columns]
+    assert len(rows) - 1 == len(positions)
+    i = list(catalog.df.columns).index(catalog.id_col)
+    assert [str(r[i]) for r in rows[1:]] == _expected(catalog, positions)[catalog.id_col].astype(str).tolist()
+
+
+def test_docx_export_one_document_per_strain(catalog):
+    positions = np.array([3, 10, 3])  # 重复编号的文件名加序号，不互相覆盖
+    path = app.export_catalog(catalog, positions, "docx")
+    rid = str(catalog.df[catalog.id_col].iloc[3]).strip()
+    with zipfile.ZipFile(path) as zf:
+        names = zf.namelist()
+        assert len(names) == 3 and f"{rid}.docx" in names and f"{rid}_2.docx" in names
+        doc = Document(BytesIO(zf.read(f"{rid}.docx")))
+    assert rid in doc.paragraphs[0].text
+    cells = {r.cells[0].text: r.cells[1].text for r in doc.tables[0].rows}
+    assert cells[catalog.id_col] == rid
+
+
+def test_failed_export_leaves_no_file(catalog, monkeypatch):
+    def broken(cat, positions, path, job):
+        with open(path, "w") as f:
+            f.write("half")
+        raise RuntimeError("disk full")
+
+    monkeypatch.setitem(app._EXPORTERS, "csv", (broken, ".csv"))
+    with pytest.raises(RuntimeError):
+        app.export_catalog(catalog, np.arange(5), "csv")
+    assert os.listdir(app.EXPORT_DIR) == []
+
+
+def test_sweep_and_download_remove_export_files(catalog):
+    stale = app.export_catalog(catalog, np.arange(5), "csv")
+    old = time.time() - app.EXPORT_MAX_AGE_SEC - 10
+    os.utime(stale, (old, old))
+    fresh = app.export_catalog(catalog, np.arange(5), "csv")  # 每次导出前先清理过期文件
+    assert not os.path.exists(stale) and os.path.exists(fresh)
+
+    job = app.ExportJob("csv", 5)
+    job.path = fresh
+    app._export_downloaded(job)
+    assert not os.path.exists(fresh)
@@ -0,0 +1,64 @@
+# tests/test_facets.py
+# 分面筛选：编码计数与倒排表求交的结果须与逐行暴力计算一致（每个分面的计数不受自身选择影响）。
+
+import random
+from collections import Counter
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def _row_values(cat) -> dict:
+    values = {}
+    for name, (col, fn) in app.FACETS.items():
+        text = app.column_text(cat.df[col]).tolist()
+        values[name] = [fn(v) if fn else v for v in text]
+    return values
+
+
+def _random_case(cat, rng: random.Random):
+    facets = cat.facets
+    selections = {
+        name: rng.sample(facet.options[:12], rng.randint(1, 3)) if rng.random() < 0.4 else []
+        for name, facet in facets.facets.items()
+    }
+    date_range = None
+    if rng.random() < 0.5:
+        span = (facets.date.max - facets.date.min).days
+        lo = facets.date.min + timedelta(days=rng.randrange(span))
+        date_range = (lo, lo + timedelta(days=rng.randrange(span // 2)))
+    base = np.arange(len(cat.df))
+    if rng.random() < 0.5:
+        base = np.array(rng.sample(range(len(cat.df)), rng.randint(0, len(cat.df))))  # 乱序，如模糊检索结果
+    return base, selections, date_range
+
+
+def test_counts_and_apply_match_brute_force(catalog):
+    facets = catalog.facets
+    assert set(facets.facets) == set(app.FACETS) and facets.date is not None
+    values = _row_values(catalog)
+    days = pd.to_datetime(catalog.df[app.DATE_FACET_COL]).dt.date.tolist()
+    rng = random.Random(18)
+
+    for _ in range(60):
+        base, selections, date_range = _random_case(catalog, rng)
+
+        def passes(pos, skip=""):
+            for name, selected in selections.items():
+                if name != skip and selected and values[name][pos] not in selected:
+                    return False
+            if date_range and skip != app.DATE_FACET_COL:
+                d = days[pos]
+                return not pd.isna(d) and date_range[0] <= d <= date_range[1]
+            return True
+
+        counts = facets.counts(base, selections, date_range)
+        for name in facets.facets:
+            expected = Counter(values[name][p] for p in base.tolist() if passes(p, skip=name))
+            assert {v: n for v, n in counts[name].items() if n} == dict(expected), (name, selections, date_range)
+
+        narrowed = facets.apply(base, selections, date_range)
+        assert narrowed.tolist() == [p for p in base.tolist() if passes(p)], (selections, date_range)
@@ -0,0 +1,73 @@
+# tests/test_federation.py
+# 联合目录：多个工作簿/工作表合并后，每行经 RowLocator 回到源工作表的同一行（嵌入图片按源行查找）。
+
+import os
+
+import numpy as np
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.drawing.image import Image as XlImage
+from PIL import Image
+
+import app
+
+
+@pytest.fixture
+def sources(tmp_path):
+    src = tmp_path / "sources"
+    src.mkdir()
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "2024"
+    ws.append(["菌种编号", "菌种命名", "菌种照片"])
+    for i in range(4):
+        ws.append([f"A24-{i}", f"甲{i}", ""])
+    ws2 = wb.create_sheet("2025")
+    ws2.append(["菌种编号", "菌种命名", "菌种照片"])
+    ws2.append(["A25-0", "乙0", ""])
+    ws2.append([None, None, None])  # 中间的空行也占一行，之后的行号不能错位
+    ws2.append(["A25-2", "乙2", ""])
+    wb.save(src / "a.xlsx")
+
+    # b 的编号列、图片列用别名，合并时对齐为首选列名；第 3 行带嵌入图片
+    png = tmp_path / "embedded.png"
+    Image.new("RGB", (60, 40), (200, 30, 30)).save(png)
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["编号", "菌种命名", "照片"])
+    for i in range(3):
+        ws.append([f"B-{i}", f"丙{i}", ""])
+    ws.add_image(XlImage(str(png)), "C3")
+    wb.save(src / "b.xlsx")
+    (src / "~$a.xlsx").write_bytes(b"lock")  # Excel 锁文件不参与合并
+    return str(src)
+
+
+def test_resolve_sources_skips_lock_files(sources):
+    assert [os.path.basename(p) for p in app.resolve_catalog_sources(sources)] == ["a.xlsx", "b.xlsx"]
+
+
+def test_locator_maps_rows_back_to_source_sheets(sources):
+    cat = app.LiveCatalog(sources, watch=False, sheets=["*"]).version
+    df, locator = cat.df, cat.locator
+    assert locator is not None and cat.id_col == "菌种编号" and cat.img_col == "菌种照片"
+    assert len(df) == 4 + 3 + 3
+    assert df[app.SOURCE_COL].value_counts().to_dict() == {"a.xlsx / 2024": 4, "a.xlsx / 2025": 3, "b.xlsx / Sheet": 3}
+
+    books = {}
+    for pos in range(len(df)):
+        path, sheet, excel_row = locator.locate(pos)
+        ws = books.setdefault(path, load_workbook(path))[sheet]
+        assert str(ws.cell(row=excel_row, column=1).value or "").strip() == str(df[cat.id_col].iloc[pos]).strip(), pos
+
+    # 嵌入图片只属于 b.xlsx 第 3 行（B-1）
+    with_images = [pos for pos in range(len(df)) if cat.images_for(pos)]
+    assert [df[cat.id_col].iloc[p] for p in with_images] == ["B-1"]
+
+
+def test_first_sheet_only_by_default(sources):
+    cat = app.LiveCatalog(sources, watch=False).version
+    assert sorted(cat.df[app.SOURCE_COL].unique()) == ["a.xlsx", "b.xlsx"]
+    assert np.array_equal(np.unique(cat.locator.source_ids), [0, 1])
+    assert cat.position_of("B-2") == 6
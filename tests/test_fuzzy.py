@@ -0,0 +1,76 @@
+# tests/test_fuzzy.py
+# 模糊检索：子串编辑距离与候选筛选。
+
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def _brute_substring_distance(pattern: str, text: str) -> int:
+    # 经典 DP：首行全 0（文本任意位置起始），取末行最小值
+    prev = [0] * (len(text) + 1)
+    for i, pc in enumerate(pattern, 1):
+        cur = [i] + [0] * len(text)
+        for j, tc in enumerate(text, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (pc != tc))
+        prev = cur
+    return min(prev)
+
+
+def test_substring_edit_distance_matches_dp():
+    rng = random.Random(2)
+    for _ in range(500):
+        p = "".join(rng.choice("abcd芽孢") for _ in range(rng.randint(0, 8)))
+        t = "".join(rng.choice("abcd芽孢") for _ in range(rng.randint(0, 20)))
+        assert app.substring_edit_distance(p, t) == _brute_substring_distance(p, t), (p, t)
+
+
+@pytest.mark.parametrize(
+    "pattern, text, expected",
+    [
+        ("bacillus", "Bacillus subtilis".lower(), 0),
+        ("bacilus", "bacillus subtilis", 1),
+        ("subtilsi", "bacillus subtilis", 1),  # 删去 s 即为子串 subtili
+        ("xyz", "bacillus", 3),
+        ("", "anything", 0),
+        ("abc", "", 3),
+    ],
+)
+def test_substring_edit_distance_examples(pattern, text, expected):
+    assert app.substring_edit_distance(pattern, text) == expected
+
+
+def _fuzzy_index(names):
+    return app.FuzzyIndex(pd.DataFrame({"菌种命名": names}), ["菌种命名"])
+
+
+@pytest.mark.parametrize("query", ["cc-h", "CC-H-1", "h-9", "c"])
+def test_fuzzy_returns_every_exact_substring_hit(query):
+    # 精确子串命中多于候选上限时也须全部返回，不能被 FUZZY_CANDIDATES 截断
+    names = [f"CC-H-{i}" for i in range(1000)] + ["其他菌株"]
+    hits = _fuzzy_index(names).search(query)
+    q = app.normalize_search_text(query)
+    expected = {i for i, v in enumerate(names) if q in v.lower()}
+    assert len(expected) > 0
+    # 精确命中全部在前；较长的查询之后还可以有近似命中
+    assert set(hits[:len(expected)].tolist()) == expected
+    assert len(hits) == len(set(hits.tolist()))
+
+
+def test_fuzzy_ranks_exact_hits_before_near_misses():
+    names = ["Bacillus subtilis"] * 3 + ["Bacilus subtilis", "Pseudomonas putida"]
+    hits = _fuzzy_index(names).search("bacillus")
+    assert hits.tolist() == [0, 1, 2, 3]
+    assert len(_fuzzy_index(names).search("bacilus sub")) == 4
+
+
+def test_fuzzy_near_misses_still_found_past_exact_hits():
+    names = [f"Sphingomonas sp. {i}" for i in range(500)] + ["Sphingomonsa sp."]
+    hits = _fuzzy_index(names).search("sphingomonas")
+    assert set(hits.tolist()) == set(range(501))
+    assert hits[-1] == 500
+    assert np.all(hits[:500] < 500)
@@ -0,0 +1,124 @@
+# tests/test_hot_reload.py
+# 热更新：行级差异 + 增量修补出的新版本必须与对新工作簿完整重建的版本一致。
+
+import shutil
+
+import numpy as np
+from openpyxl import load_workbook
+
+import app
+from conftest import load_version
+
+ID_COLUMN = 1
+NAME_COLUMN = 2
+SOURCE_COLUMN = 14  # 菌种来源
+
+
+def _edited_copy(src: str, dst: str):
+    """修改 3 行、删除 2 行、末尾追加 2 行（其中一行复用已有编号，即重复编号）。"""
+    shutil.copyfile(src, dst)
+    wb = load_workbook(dst)
+    ws = wb.active
+    ws.cell(row=5, column=NAME_COLUMN).value = "改过的命名"
+    ws.cell(row=40, column=SOURCE_COLUMN).value = "西藏 新增采样点"
+    ws.cell(row=300, column=NAME_COLUMN).value = "CC-Z-热更新"
+    removed = [str(ws.cell(row=r, column=ID_COLUMN).value) for r in (100, 101)]
+    ws.delete_rows(100, 2)
+    template = [c.value for c in ws[10]]
+    ws.append(["NEW-0001"] + template[1:])
+    ws.append([ws.cell(row=20, column=ID_COLUMN).value] + template[1:])
+    wb.save(dst)
+    return removed
+
+
+def _assert_same_ngram(a: app.NgramIndex, b: app.NgramIndex):
+    assert a.values == b.values
+    assert a.postings.keys() == b.postings.keys()
+    for g, p in a.postings.items():
+        assert np.array_equal(p, b.postings[g]), g
+
+
+def test_diff_and_patch_match_fresh_build(synthetic_xlsx, tmp_path):
+    old = load_version(synthetic_xlsx)
+    # 全字段文本与倒排索引在旧版本上已构建时，修补路径也要迁移它们
+    old.global_ngram_index
+    new_path = str(tmp_path / "edited.xlsx")
+    removed = _edited_copy(synthetic_xlsx, new_path)
+
+    fingerprint = app.excel_fingerprint(new_path)
+    new_df = app.read_catalog_frame(new_path, fingerprint)
+    diff = app.diff_catalog_rows(old.df, new_df, old.id_col)
+    assert sorted(diff.removed) == sorted(removed)
+    assert len(diff.added) == 2 and "NEW-0001" in diff.added
+    assert len(diff.changed) == 3
+
+    patched = app.patch_catalog_version(old, new_df, fingerprint, diff)
+    fresh = app.CatalogVersion(new_path, fingerprint, new_df)
+
+    assert patched.id_index == fresh.id_index
+    assert patched.search_index.columns.keys() == fresh.search_index.columns.keys()
+    for col, idx in patched.search_index.columns.items():
+        _assert_same_ngram(idx, fresh.search_index.columns[col])
+    assert patched.search_text.astype(str).tolist() == fresh.search_text.astype(str).tolist()
+    _assert_same_ngram(patched.global_ngram_index, fresh.global_ngram_index)
+
+    for conditions, query in [
+        ({}, ""),
+        ({"菌种命名": "改过"}, ""),
+        ({"菌种来源": "西藏"}, ""),
+        ({}, "新增采样点"),
+        ({"菌种编号": "NEW"}, "西藏"),
+        ({}, "cc-z"),
+    ]:
+        assert np.array_equal(
+            patched.filter_positions(conditions, query), fresh.filter_positions(conditions, query)
+        ), (conditions, query)
+
+
+def test_row_html_migrated_on_patch(synthetic_xlsx, tmp_path):
+    old = load_version(synthetic_xlsx)
+    show_cols = app.list_columns(old.df, old.id_col)
+    center = {old.id_col, "保藏日期", "操作"}
+    app.render_rows_html(old.df, np.arange(len(old.df)), show_cols, old.id_col, center, old.fingerprint)
+
+    new_path = str(tmp_path / "edited.xlsx")
+    _edited_copy(synthetic_xlsx, new_path)
+    fingerprint = app.excel_fingerprint(new_path)
+    new_df = app.read_catalog_frame(new_path, fingerprint)
+    diff = app.diff_catalog_rows(old.df, new_df, old.id_col)
+    app.patch_catalog_version(old, new_df, fingerprint, diff)
+
+    # 旧版本的片段全部迁移或丢弃；迁移后的片段与直接渲染新版本的结果一致
+    entries = app._row_html_cache().entries
+    assert not any(k[0] == old.fingerprint for k in entries)
+    assert sum(k[0] == fingerprint for k in entries) == len(new_df) - len(diff.dirty)
+    positions = np.arange(len(new_df))
+    migrated = app.render_rows_html(new_df, positions, show_cols, old.id_col, center, fingerprint)
+    app.st.cache_resource.clear()
+    rebuilt = app.render_rows_html(new_df, positions, show_cols, old.id_col, center, fingerprint)
+    assert migrated == rebuilt
+
+
+def test_refresh_keeps_serving_while_workbook_is_half_written(synthetic_xlsx, tmp_path, caplog):
+    path = str(tmp_path / "live.xlsx")
+    shutil.copyfile(synthetic_xlsx, path)
+    live = app.LiveCatalog(path, watch=False)
+    current = live.version
+
+    # 管理员正在替换工作簿：文件只复制了一半，解析失败
+    edited = str(tmp_path / "edited.xlsx")
+    _edited_copy(synthetic_xlsx, edited)
+    data = open(edited, "rb").read()
+    with open(path, "wb") as f:
+        f.write(data[: len(data) // 2])
+    assert live.refresh() is None
+    assert live.refresh() is None
+    assert live.version is current
+    assert sum("热更新失败" in r.getMessage() for r in caplog.records) == 1  # 同一文件特征只记一次
+
+    # 复制完成后下一次轮询即更新
+    with open(path, "wb") as f:
+        f.write(data)
+    diff = live.refresh()
+    assert diff is not None and "NEW-0001" in diff.added
+    assert live.version is not current
@@ -0,0 +1,66 @@
+# tests/test_ingest.py
+# 流式解析（大工作簿）与 pd.read_excel 解析须得到相同的列类型与取值，检索/展示不随文件大小变化。
+
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from openpyxl import Workbook
+
+import app
+
+
+def _pandas_frame(path: str) -> pd.DataFrame:
+    return app.compact_catalog_frame(app._clean_excel_frame(pd.read_excel(path)))
+
+
+def _stream_frame(path: str, chunk_rows: int) -> pd.DataFrame:
+    table = app.stream_excel(path, chunk_rows=chunk_rows)
+    return app.compact_catalog_frame(table.to_pandas(types_mapper={pa.string(): app._ARROW_STRING}.get))
+
+
+def _assert_same(a: pd.DataFrame, b: pd.DataFrame):
+    assert list(a.columns) == list(b.columns)
+    for c in a.columns:
+        assert a[c].dtype == b[c].dtype, c
+        assert app.column_text(a[c]).tolist() == app.column_text(b[c]).tolist(), c
+
+
+@pytest.fixture
+def typed_xlsx(tmp_path) -> str:
+    """覆盖各类单元格：整数、含空整数、数字文本、NA 文本、日期（含整块空值）、浮点、整浮混合、错误值。"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["菌种编号", "整数后文本", "整数含空", "联系电话", "NA文本", "采样时间", "浮点", "整浮混合", "错误值", "保藏日期"])
+    for i in range(23):
+        ws.append([
+            f"X-{i}",
+            i if i < 15 else f"t{i}",
+            i * 7 if i < 20 else None,
+            str(13800000000 + i),
+            "NA" if i % 5 == 0 else f"v{i}",
+            None if 5 <= i < 12 else datetime(2024, 1, 1 + i),
+            i + 0.25,
+            i if i % 2 else i + 0.5,
+            "#N/A" if i == 4 else "ok",
+            None if i == 7 else f"2025年6月{1 + i}日",
+        ])
+    path = str(tmp_path / "typed.xlsx")
+    wb.save(path)
+    return path
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 8, 5000])
+def test_stream_matches_pandas(typed_xlsx, chunk_rows):
+    _assert_same(_pandas_frame(typed_xlsx), _stream_frame(typed_xlsx, chunk_rows))
+
+
+def test_stream_matches_pandas_on_synthetic(synthetic_xlsx):
+    _assert_same(_pandas_frame(synthetic_xlsx), _stream_frame(synthetic_xlsx, 97))
+
+
+def test_integer_values_render_without_decimal(typed_xlsx):
+    df = _pandas_frame(typed_xlsx)
+    assert app.column_text(df["整数含空"]).tolist()[:3] == ["0", "7", "14"]
+    assert app.column_text(df["整数含空"]).iloc[-1] == ""
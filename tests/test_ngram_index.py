@@ -0,0 +1,46 @@
+# tests/test_ngram_index.py
+# 字段检索的 n-gram 倒排索引：结果须与逐行子串匹配（str.contains）一致。
+
+import random
+
+import numpy as np
+import pandas as pd
+
+import app
+
+_ALPHABET = "abcAB-0123 菌种芽孢杆西藏"
+
+
+def _random_values(rng: random.Random, n: int):
+    return [
+        "".join(rng.choice(_ALPHABET) for _ in range(rng.randint(0, 12)))
+        for _ in range(n)
+    ]
+
+
+def _queries(rng: random.Random, values, n: int):
+    out = []
+    for _ in range(n):
+        v = rng.choice(values)
+        if v and rng.random() < 0.7:
+            s = rng.randrange(len(v))
+            out.append(v[s:s + rng.randint(1, 5)])
+        else:
+            out.append("".join(rng.choice(_ALPHABET) for _ in range(rng.randint(1, 4))))
+    # NgramIndex 会去除查询首尾空白，对照组使用去除后的查询
+    return [q.strip() for q in out if q.strip()]
+
+
+def test_ngram_index_matches_str_contains():
+    rng = random.Random(1)
+    values = _random_values(rng, 800)
+    index = app.NgramIndex(values)
+    s = pd.Series(values)
+    for q in _queries(rng, values, 400):
+        expected = np.flatnonzero(s.str.contains(q, case=False, regex=False).to_numpy())
+        assert np.array_equal(index.search(q), expected), q
+
+
+def test_ngram_index_empty_query_returns_all_rows():
+    index = app.NgramIndex(["a", "b", ""])
+    assert index.search("  ").tolist() == [0, 1, 2]
@@ -0,0 +1,123 @@
+# tests/test_prefetch.py
+# 远程图片预取：用本地 http.server 代替真实图床，检查并发上限、失败的负缓存与联合目录的 URL 汇总。
+
+import functools
+import http.server
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+from PIL import Image
+
+import app
+
+CONCURRENCY = 2
+
+
+class _CountingHandler(http.server.SimpleHTTPRequestHandler):
+    """记录同时在处理的请求数；每个请求稍作停顿，使并发上限可被观察到。"""
+
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+    requests = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.requests += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(0.1)
+        try:
+            super().do_GET()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server(tmp_path):
+    www = tmp_path / "www"
+    www.mkdir()
+    for i in range(6):
+        Image.new("RGB", (120, 80), (i * 40, 10, 10)).save(www / f"u{i}.png")
+    (www / "bad.png").write_bytes(b"not an image")
+
+    handler = type("Handler", (_CountingHandler,), {"active": 0, "peak": 0, "requests": 0})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=str(www)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def test_prefetch_bounded_concurrency_and_negative_cache(image_server):
+    base, handler = image_server
+    good = [f"{base}/u{i}.png" for i in range(6)]
+    bad = [f"{base}/bad.png", f"{base}/missing.png"]
+
+    result = app.prefetch_remote_images(good + bad, concurrency=CONCURRENCY)
+    assert result == {**{u: True for u in good}, **{u: False for u in bad}}
+    assert handler.peak <= CONCURRENCY
+
+    for u in good:
+        path = app.cached_remote_image(u)
+        assert path is not None and path.startswith(os.path.join(app.DERIVATIVE_ROOT, "remote"))
+        assert "display" in app.get_image_derivatives(path)
+    assert all(app.cached_remote_image(u) is None for u in bad)
+
+    # 已缓存的 URL 与 TTL 内失败过的 URL 都不再请求
+    requests = handler.requests
+    assert app.prefetch_remote_images(good + bad, concurrency=CONCURRENCY) == {}
+    assert handler.requests == requests
+
+
+def _workbook(path, rows):
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return str(path)
+
+
+def test_federated_catalog_prefetches_urls_from_every_source(image_server, tmp_path, monkeypatch):
+    base, _ = image_server
+    src = tmp_path / "sources"
+    src.mkdir()
+    _workbook(src / "a.xlsx", [{"菌种编号": f"A{i}", "菌种命名": "a", "菌种照片": f"{base}/u{i}.png"} for i in range(3)])
+    _workbook(src / "b.xlsx", [{"菌种编号": f"B{i}", "菌种命名": "b", "菌种照片": f"{base}/u{i + 3}.png"} for i in range(3)])
+
+    cat = app.LiveCatalog(str(src), watch=False).version
+    assert cat.locator is not None and len(cat.locator.sources) == 2
+
+    monkeypatch.setattr(app, "URL_PREFETCH", True)
+    thread = cat.warm_images()
+    assert thread is not None
+    thread.join(timeout=30)
+    assert all(app.cached_remote_image(f"{base}/u{i}.png") for i in range(6))
+    # 预取完成后详情页取到的是本地副本
+    assert cat.images_for(0)[0].startswith(os.path.join(app.DERIVATIVE_ROOT, "remote"))
+
+
+def test_remote_cache_has_its_own_lru_cap(image_server, monkeypatch):
+    base, _ = image_server
+    urls = [f"{base}/u{i}.png" for i in range(6)]
+    assert all(app.prefetch_remote_images(urls, concurrency=CONCURRENCY).values())
+    paths = [app.cached_remote_image(u) for u in urls]
+    size = max(os.path.getsize(p) for p in paths)
+
+    # u0 最旧但刚被详情页读过；其余按 u1 < u2 < … 的顺序使用
+    now = time.time()
+    for i, p in enumerate(paths):
+        os.utime(p, (now - 100 + i, now - 100 + i))
+    app.cached_remote_image(urls[0])
+
+    # 上限约 3.5 张：淘汰到 90% 以下后留下最近使用的 3 张
+    monkeypatch.setattr(app, "REMOTE_CACHE_MB", 3.5 * size / (1024 * 1024))
+    assert app._enforce_remote_cap() <= 3.5 * size * 0.9
+    assert [app.cached_remote_image(u) is not None for u in urls] == [True, False, False, False, True, True]
+    # 派生图不计入远程原图的上限
+    assert app._enforce_derivative_cap() > 0
@@ -0,0 +1,39 @@
+# tests/test_sort.py
+# 排序：自然顺序、空值置后的排序置换，以及命中行按缓存名次重排。
+
+import numpy as np
+import pandas as pd
+
+import app
+
+
+def test_natural_sort_key_orders_numbers_by_value():
+    ids = ["CQUT-B-102", "CQUT-B-9", "cqut-b-10", "CQUT-A-200", "ＣＱＵＴ-B-11"]
+    assert sorted(ids, key=app.natural_sort_key) == ["CQUT-A-200", "CQUT-B-9", "cqut-b-10", "ＣＱＵＴ-B-11", "CQUT-B-102"]
+
+
+def test_sort_permutations_text_natural_order_with_empties_last():
+    s = pd.Series(["CQUT-B-102", "", "CQUT-B-9", None, "CQUT-B-9", "CQUT-B-10"], dtype=object)
+    asc, desc = app.sort_permutations(s)
+    assert asc.tolist() == [2, 4, 5, 0, 1, 3]
+    # 降序时同值仍保持工作簿顺序，空值仍在最后
+    assert desc.tolist() == [0, 5, 2, 4, 1, 3]
+
+
+def test_sort_permutations_dates_with_empties_last():
+    s = pd.Series(pd.to_datetime(["2020-01-02", None, "2019-05-01", "2021-01-01", None]))
+    asc, desc = app.sort_permutations(s)
+    assert asc.tolist() == [2, 0, 3, 1, 4]
+    assert desc.tolist() == [3, 0, 2, 1, 4]
+
+
+def test_sorted_positions_matches_full_permutation(catalog):
+    rng = np.random.default_rng(3)
+    n = len(catalog.df)
+    for col in catalog.sort_columns:
+        for descending in (False, True):
+            perm, _ = catalog._sort_order(col, descending)
+            for k in (1, 5, n // 3, n):
+                positions = np.sort(rng.choice(n, k, replace=False))
+                got = catalog.sorted_positions(positions, col, descending)
+                assert np.array_equal(got, perm[np.isin(perm, positions)]), (col, descending, k)
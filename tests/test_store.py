@@ -0,0 +1,100 @@
+# tests/test_store.py
+# SQLite 存储后端：字段检索、全字段检索、计数、分页与编号查询须与内存后端结果一致。
+
+import random
+import sqlite3
+
+import numpy as np
+import pytest
+
+import app
+from conftest import load_version
+
+
+@pytest.fixture
+def sqlite_backend(monkeypatch):
+    monkeypatch.setattr(app, "STORAGE_BACKEND", "sqlite")
+
+
+def _random_queries(df, cols, n: int, seed: int):
+    rng = random.Random(seed)
+
+    def sub(col):
+        v = str(df[col].iloc[rng.randrange(len(df))])
+        k = rng.randint(1, 6)
+        s = rng.randrange(max(1, len(v) - k + 1))
+        return v[s:s + k] or "x"
+
+    for _ in range(n):
+        conditions = {c: sub(c) for c in rng.sample(cols, rng.randint(0, 2))}
+        query = " ".join(sub(rng.choice(list(df.columns))) for _ in range(rng.randint(0, 2)))
+        if rng.random() < 0.1:
+            query += ' "q%_'  # 引号与 LIKE 通配符须按字面匹配
+        yield conditions, query
+
+
+def _assert_parity(store: app.CatalogStore, memory: app.CatalogVersion):
+    df = memory.df
+    for conditions, query in _random_queries(df, list(memory.search_index.columns), 150, seed=1):
+        expected = memory.filter_positions(conditions, query)
+        assert np.array_equal(store.filter_positions(conditions, query), expected), (conditions, query)
+        assert store.count(conditions, query) == len(expected)
+        page = store.page(conditions, query, 5, 7)
+        rows = app.catalog_display_frame(df.iloc[expected[5:12]]).reset_index(drop=True)
+        assert list(page.columns) == list(df.columns)
+        assert page.astype(str).equals(rows.astype(str)), (conditions, query)
+
+
+def test_sqlite_matches_memory(synthetic_xlsx, sqlite_backend, monkeypatch):
+    cat = load_version(synthetic_xlsx)
+    store = cat.store
+    assert store is not None and store.fts
+    monkeypatch.setattr(app, "STORAGE_BACKEND", "memory")  # 对照组走内存索引
+    _assert_parity(store, load_version(synthetic_xlsx))
+
+    rid = str(cat.df[cat.id_col].iloc[123]).strip()
+    assert store.position_of(f" {rid} ") == cat.id_index[rid]
+    assert store.position_of("不存在的编号") is None
+
+
+def test_sqlite_without_fts5_matches_memory(synthetic_xlsx, sqlite_backend, monkeypatch):
+    real_connect = sqlite3.connect
+
+    class NoFts5:
+        # 模拟未编译 FTS5 的 SQLite：创建虚表失败，建库退回普通表
+        def __init__(self, con):
+            self.con = con
+
+        def execute(self, sql, *args):
+            if "VIRTUAL" in sql:
+                raise sqlite3.OperationalError("no such module: fts5")
+            return self.con.execute(sql, *args)
+
+        def __getattr__(self, name):
+            return getattr(self.con, name)
+
+    monkeypatch.setattr(app.sqlite3, "connect", lambda p, **kw: real_connect(p, **kw) if kw else NoFts5(real_connect(p)))
+    store = load_version(synthetic_xlsx).store
+    monkeypatch.setattr(app.sqlite3, "connect", real_connect)
+    assert store is not None and not store.fts
+    monkeypatch.setattr(app, "STORAGE_BACKEND", "memory")
+    _assert_parity(store, load_version(synthetic_xlsx))
+
+
+def test_sqlite_backend_skips_memory_indexes(synthetic_xlsx, sqlite_backend):
+    cat = load_version(synthetic_xlsx)
+    cat.warm()
+    rid = str(cat.df[cat.id_col].iloc[42]).strip()
+    assert cat.position_of(rid) == 42
+    query = str(cat.df["菌种命名"].iloc[42])[:3]
+    assert len(cat.filter_positions({"菌种命名": query}, rid)) >= 1
+    # 检索与编号查询都走目录库：内存检索索引、编号索引与全字段文本都未构建
+    assert cat._search_index is None and cat._id_index is None and cat._search_text is None
+
+    fields, q, _ = cat.filter_key({"菌种命名": query}, "")
+    assert cat.store.count(dict(fields), q) == len(cat.filter_positions({"菌种命名": query}))
+    # 热更新修补出的新版本同样不构建
+    new_df = cat.df.iloc[::-1].reset_index(drop=True)
+    diff = app.diff_catalog_rows(cat.df, new_df, cat.id_col)
+    patched = app.patch_catalog_version(cat, new_df, "patched", diff)
+    assert patched._search_index is None and patched._id_index is None and patched._search_text is None